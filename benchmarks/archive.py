@@ -0,0 +1,77 @@
+"""
+List latency before and after moving past events to the archive.
+
+Seeds events of which --past are in the past (with seed_events), measures the
+listings, runs archive_events for every past event and measures them again.
+Every request carries a unique query parameter so that the listing cache is
+bypassed and each request reaches the database.
+
+    python -m benchmarks.archive --events 100000 --past 0.9
+"""
+import argparse
+import io
+
+from benchmarks import utils
+
+SCENARIOS = [
+    ('allevents upcoming', 'all-event-list', {'upcoming': 'true'}),
+    ('allevents type', 'all-event-list', {'upcoming': 'true', 'type': 'Concert'}),
+    ('allevents status', 'all-event-list', {'upcoming': 'true', 'status': 'Postponed'}),
+    ('my registrations', 'my-registrations', {'upcoming': 'true'}),
+    ('search', 'event-search', {'q': 'jazz'}),
+]
+
+
+def measure(client, token, requests):
+    from django.urls import reverse
+
+    results = {}
+    for name, url_name, params in SCENARIOS:
+        samples = []
+        for i in range(requests):
+            with utils.timer() as elapsed:
+                response = client.get(reverse(url_name), dict(params, n=i), HTTP_AUTHORIZATION=token)
+            assert response.status_code == 200, response.status_code
+            samples.append(elapsed['seconds'])
+        results[name] = utils.summarize(samples)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--past', type=float, default=0.9, help='Fraction of events in the past.')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per listing and phase.')
+    args = parser.parse_args()
+
+    utils.setup()
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.test import Client
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from event_app.models import ArchivedEvent, Event
+
+    with utils.test_database():
+        call_command('seed_events', users=args.users, events=args.events, past=args.past, stdout=io.StringIO())
+        user = User.objects.filter(username__startswith='seed-').order_by('id').first()
+        token = 'Bearer %s' % RefreshToken.for_user(user).access_token
+        client = Client()
+
+        before = measure(client, token, args.requests)
+        with utils.timer() as elapsed:
+            call_command('archive_events', days=0, stdout=io.StringIO())
+        print('Archived %d of %d events in %.1fs; %d remain live.\n' % (
+            ArchivedEvent.objects.count(), args.events, elapsed['seconds'], Event.objects.count(),
+        ))
+        after = measure(client, token, args.requests)
+
+        print('%-20s %12s %12s %12s %12s' % ('', 'p50 before', 'p50 after', 'p95 before', 'p95 after'))
+        for name, _, _ in SCENARIOS:
+            print('%-20s %10.2fms %10.2fms %10.2fms %10.2fms' % (
+                name, before[name]['p50_ms'], after[name]['p50_ms'], before[name]['p95_ms'], after[name]['p95_ms'],
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+WSGI vs ASGI load comparison for the event endpoints.
+
+Drives the same requests in-process at a given concurrency through:
+
+- wsgi: the DRF views via Django's WSGI handler, one thread per client;
+- asgi-sync: the DRF views via the ASGI handler (each request hops to a thread);
+- asgi-async: the async-native views under /async/ via the ASGI handler.
+
+Every request carries a unique query parameter so that the listing cache is
+bypassed and each request reaches the database.
+
+    python -m benchmarks.asgi_vs_wsgi --concurrency 64 --requests 2000
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+from benchmarks import utils
+
+ENDPOINTS = {
+    'allevents': ('all-event-list', 'async-all-event-list'),
+    'events': ('event-list', 'async-event-list'),
+    'detail': ('event-detail', 'async-event-detail'),
+}
+
+
+def run_wsgi(path, token, requests, concurrency):
+    from django.db import connection
+    from django.test import Client
+
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(count):
+        client = Client()
+        samples = []
+        try:
+            for i in range(count):
+                start = time.perf_counter()
+                response = client.get(path, {'n': i}, HTTP_AUTHORIZATION=token)
+                samples.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.status_code
+        finally:
+            connection.close()
+        with lock:
+            latencies.extend(samples)
+
+    threads = [threading.Thread(target=worker, args=(requests // concurrency,)) for _ in range(concurrency)]
+    with utils.timer() as elapsed:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return latencies, elapsed['seconds']
+
+
+def run_asgi(path, token, requests, concurrency):
+    from django.test import AsyncClient
+
+    async def main():
+        client = AsyncClient()
+        latencies = []
+
+        async def worker(count):
+            for i in range(count):
+                start = time.perf_counter()
+                response = await client.get(path, {'n': i}, headers={'Authorization': token})
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.status_code
+
+        with utils.timer() as elapsed:
+            await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+        return latencies, elapsed['seconds']
+
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--events', type=int, default=500)
+    parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), action='append')
+    args = parser.parse_args()
+
+    utils.setup()
+    from datetime import timedelta
+    from django.contrib.auth.models import User
+    from django.urls import reverse
+    from django.utils import timezone
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from event_app.models import Event
+
+    with utils.test_database():
+        user = User.objects.create(username='benchmark')
+        events = Event.objects.bulk_create([
+            Event(creator=user, title='Event %d' % i, description='Description ' * 20,
+                  date=timezone.now() + timedelta(hours=i), type='Concert', status='Scheduled', capacity=100)
+            for i in range(args.events)
+        ])
+        token = 'Bearer %s' % RefreshToken.for_user(user).access_token
+
+        for endpoint in args.endpoint or sorted(ENDPOINTS):
+            sync_name, async_name = ENDPOINTS[endpoint]
+            kwargs = {'kwargs': {'pk': events[0].pk}} if endpoint == 'detail' else {}
+            runs = (
+                ('wsgi', run_wsgi, reverse(sync_name, **kwargs)),
+                ('asgi-sync', run_asgi, reverse(sync_name, **kwargs)),
+                ('asgi-async', run_asgi, reverse(async_name, **kwargs)),
+            )
+            for name, run, path in runs:
+                latencies, seconds = run(path, token, args.requests, args.concurrency)
+                summary = utils.summarize(latencies)
+                print('%-10s %-11s %8.0f req/s  p50 %7.1fms  p95 %7.1fms  p99 %7.1fms' % (
+                    endpoint, name, len(latencies) / seconds, summary['p50_ms'], summary['p95_ms'], summary['p99_ms'],
+                ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Per-request cost of resolving the user of a JWT, with and without the cache.
+
+Authenticates the same bearer token N times with simplejwt's JWTAuthentication
+(one users-table SELECT per request) and with CachedJWTAuthentication, then
+times full requests to the cached /events/ listing, where authentication is
+the only thing left that could touch the database.
+
+    python -m benchmarks.auth --requests 5000
+"""
+import argparse
+
+from benchmarks import utils
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    utils.setup()
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test import Client
+    from django.test.client import RequestFactory
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from event_app.authentication import CachedJWTAuthentication
+    from event_app.views import EventListView
+
+    with utils.test_database():
+        user = User.objects.create(username='benchmark')
+        token = 'Bearer %s' % RefreshToken.for_user(user).access_token
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=token)
+
+        def report(name, samples, queries):
+            summary = utils.summarize(samples)
+            print('%-40s mean %7.1fus  p99 %7.1fus  %.2f queries/request' % (
+                name, summary['mean_ms'] * 1000, summary['p99_ms'] * 1000, queries / len(samples),
+            ))
+
+        for authentication in (JWTAuthentication(), CachedJWTAuthentication()):
+            cache.clear()
+            samples = []
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(args.requests):
+                    with utils.timer() as elapsed:
+                        authentication.authenticate(request)
+                    samples.append(elapsed['seconds'])
+            report('authenticate %s' % type(authentication).__name__, samples, len(queries))
+
+        client = Client()
+        url = reverse('event-list')
+        for authentication_class in (JWTAuthentication, CachedJWTAuthentication):
+            cache.clear()
+            EventListView.authentication_classes = [authentication_class]
+            samples = []
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(args.requests):
+                    with utils.timer() as elapsed:
+                        response = client.get(url, HTTP_AUTHORIZATION=token)
+                    assert response.status_code == 200, response.status_code
+                    samples.append(elapsed['seconds'])
+            report('GET /events/ %s' % authentication_class.__name__, samples, len(queries))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Bulk event create/update against the per-row path.
+
+Creates N events with one POST per event and then with a single POST of a
+JSON array to /events/, and does the same for partial updates with PATCH.
+Reports wall time, rows per second and queries for each.
+
+    python -m benchmarks.bulk_events --rows 2000
+"""
+import argparse
+
+from benchmarks import utils
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2000)
+    args = parser.parse_args()
+
+    utils.setup()
+    from datetime import timedelta
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+    from django.utils import timezone
+    from rest_framework.test import APIClient
+    from event_app.models import Event
+
+    with utils.test_database():
+        user = User.objects.create(username='organizer')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        url = reverse('event-list')
+        start_date = timezone.now() + timedelta(days=1)
+        rows = [
+            {
+                'creator': user.id,
+                'title': 'Event %d' % i,
+                'description': 'Imported event',
+                'date': (start_date + timedelta(minutes=i)).isoformat(),
+                'type': 'Concert',
+                'status': 'Scheduled',
+                'capacity': 100,
+            }
+            for i in range(args.rows)
+        ]
+
+        def report(name, seconds, queries):
+            print('%-16s %8.2fs %10.0f rows/s %8d queries' % (name, seconds, args.rows / seconds, queries))
+
+        with CaptureQueriesContext(connection) as queries, utils.timer() as elapsed:
+            for row in rows:
+                response = client.post(url, row, format='json')
+                assert response.status_code == 201, response.data
+        report('per-row create', elapsed['seconds'], len(queries))
+        ids = list(Event.objects.values_list('id', flat=True))
+        with CaptureQueriesContext(connection) as queries, utils.timer() as elapsed:
+            for event_id in ids:
+                response = client.patch(reverse('event-detail', kwargs={'pk': event_id}), {'status': 'Moved'},
+                                        format='json')
+                assert response.status_code == 200, response.data
+        report('per-row update', elapsed['seconds'], len(queries))
+
+        Event.objects.all().delete()
+        with CaptureQueriesContext(connection) as queries, utils.timer() as elapsed:
+            response = client.post(url, rows, format='json')
+        assert response.status_code == 201, response.data
+        report('bulk create', elapsed['seconds'], len(queries))
+        changes = [{'id': event_id, 'status': 'Moved'} for event_id in Event.objects.values_list('id', flat=True)]
+        with CaptureQueriesContext(connection) as queries, utils.timer() as elapsed:
+            response = client.patch(url, changes, format='json')
+        assert response.status_code == 200, response.data
+        report('bulk update', elapsed['seconds'], len(queries))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Concurrent read/write throughput of the SQLite database layer.
+
+Runs reader threads (first page of the event listing) next to writer threads
+(register/unregister) for a fixed time, each operation followed by the
+end-of-request connection handling, under two configurations:
+
+- defaults: rollback journal, synchronous=FULL, CONN_MAX_AGE=0, reads on the primary;
+- tuned: WAL, synchronous=NORMAL, busy_timeout, persistent connections and
+  listing reads routed to the replica alias.
+
+    python -m benchmarks.database --readers 8 --writers 4 --seconds 10
+"""
+import argparse
+import random
+import threading
+import time
+
+from benchmarks import utils
+
+CONFIGURATIONS = {
+    'defaults': {
+        'pragmas': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+        'conn_max_age': 0,
+        'replica': False,
+    },
+    'tuned': {
+        'pragmas': {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 5000},
+        'conn_max_age': 60,
+        'replica': True,
+    },
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--events', type=int, default=2000)
+    args = parser.parse_args()
+
+    utils.setup()
+    from contextlib import nullcontext
+    from datetime import timedelta
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.db import OperationalError, close_old_connections, connections
+    from django.utils import timezone
+    from event_app.models import Event
+    from event_app.routers import replica_reads
+
+    with utils.test_database():
+        organizer = User.objects.create(username='organizer')
+        Event.objects.bulk_create([
+            Event(creator=organizer, title='Event %d' % i, description='Description',
+                  date=timezone.now() + timedelta(days=1, minutes=i), type='Concert', status='Scheduled',
+                  capacity=args.writers + 1)
+            for i in range(args.events)
+        ])
+        event_ids = list(Event.objects.values_list('id', flat=True))
+        writers = [User.objects.create(username='writer%d' % i) for i in range(args.writers)]
+
+        for name, configuration in CONFIGURATIONS.items():
+            connections.close_all()
+            settings.SQLITE_PRAGMAS = configuration['pragmas']
+            for alias in ('default', 'replica'):
+                connections[alias].settings_dict['CONN_MAX_AGE'] = configuration['conn_max_age']
+            connections['default'].ensure_connection()  # Switch the journal mode before the threads start.
+
+            stop = time.perf_counter() + args.seconds
+            lock = threading.Lock()
+            counts = {'reads': 0, 'writes': 0, 'errors': 0}
+            latencies = {'reads': [], 'writes': []}
+
+            def run(kind, operation):
+                samples = []
+                done = errors = 0
+                try:
+                    while time.perf_counter() < stop:
+                        start = time.perf_counter()
+                        try:
+                            operation()
+                            done += 1
+                            samples.append(time.perf_counter() - start)
+                        except OperationalError:
+                            errors += 1
+                        close_old_connections()
+                finally:
+                    connections.close_all()
+                with lock:
+                    counts[kind] += done
+                    counts['errors'] += errors
+                    latencies[kind].extend(samples)
+
+            def read():
+                with replica_reads() if configuration['replica'] else nullcontext():
+                    list(Event.objects.order_by('date', 'id').values('id', 'title', 'date', 'registered_count')[:100])
+
+            def write(user, rng):
+                event_id = rng.choice(event_ids)
+                if Event.objects.register(event_id, user) != 'registered':
+                    Event.objects.unregister(event_id, user)
+
+            threads = [threading.Thread(target=run, args=('reads', read)) for _ in range(args.readers)]
+            threads += [
+                threading.Thread(target=run, args=('writes', lambda user=user, rng=random.Random(i): write(user, rng)))
+                for i, user in enumerate(writers)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            reads = utils.summarize(latencies['reads'])
+            writes = utils.summarize(latencies['writes'])
+            print('%-9s reads %7.0f/s (p99 %6.1fms)  writes %6.0f/s (p99 %6.1fms)  errors %d' % (
+                name, counts['reads'] / args.seconds, reads['p99_ms'],
+                counts['writes'] / args.seconds, writes['p99_ms'], counts['errors'],
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Peak memory of the streaming event export against serializing every event.
+
+For each table size, consumes /allevents/export/ (NDJSON, with attendees) and
+compares its tracemalloc peak with EventSerializer(many=True) over the whole
+table, which is what an unpaginated listing has to build in memory.
+
+    python -m benchmarks.export --rows 1000 10000 50000
+"""
+import argparse
+import tracemalloc
+
+from benchmarks import utils
+
+
+def measure(func):
+    tracemalloc.start()
+    try:
+        with utils.timer() as elapsed:
+            func()
+        return tracemalloc.get_traced_memory()[1], elapsed['seconds']
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    utils.setup()
+    from datetime import timedelta
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.urls import reverse
+    from django.utils import timezone
+    from event_app.models import Event
+    from event_app.serializers import EventSerializer
+
+    with utils.test_database():
+        user = User.objects.create(username='analytics')
+        client = Client()
+        created = 0
+        for rows in sorted(args.rows):
+            Event.objects.bulk_create([
+                Event(creator=user, title='Event %d' % i, description='Description ' * 20,
+                      date=timezone.now() + timedelta(minutes=i), type='Concert', status='Scheduled', capacity=100)
+                for i in range(created, rows)
+            ], batch_size=1000)
+            created = rows
+
+            def export():
+                response = client.get(reverse('event-export'), {'attendees': 'true'})
+                assert response.status_code == 200, response.status_code
+                for _ in response.streaming_content:
+                    pass
+
+            def serialize():
+                EventSerializer(Event.objects.with_attendees(), many=True).data
+
+            for name, func in (('export', export), ('serializer', serialize)):
+                peak, seconds = measure(func)
+                print('%8d rows  %-10s peak %8.1f MiB  %6.2fs' % (rows, name, peak / 2 ** 20, seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Login throughput, and what a login spike does to event traffic.
+
+Logs in --requests times from --concurrency threads with:
+
+- authenticate: django.contrib.auth.authenticate, hashing on the request threads;
+- pool, first login: event_app.passwords.authenticate, hashing on the bounded pool;
+- pool, repeat login: the same credentials again, served by the verified-credential cache.
+
+Meanwhile one more thread keeps requesting /async/allevents/ (which is not
+cached), whose latency shows how much CPU the logins leave to the rest of the
+site.
+
+    python -m benchmarks.logins --concurrency 16 --requests 400
+"""
+import argparse
+import os
+import threading
+import time
+
+from benchmarks import utils
+
+
+def run(login, usernames, concurrency, path):
+    from django.db import connection
+    from django.test import Client
+
+    lock = threading.Lock()
+    pending = list(usernames)
+    outcomes = {'ok': 0, 'failed': 0, 'busy': 0}
+    done = threading.Event()
+    listing = []
+
+    def worker():
+        try:
+            while True:
+                with lock:
+                    if not pending:
+                        return
+                    username = pending.pop()
+                outcome = login(username)
+                with lock:
+                    outcomes[outcome] += 1
+        finally:
+            connection.close()
+
+    def browse():
+        client = Client()
+        i = 0
+        try:
+            while not done.is_set():
+                i += 1
+                start = time.perf_counter()
+                response = client.get(path, {'n': i})
+                listing.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.status_code
+        finally:
+            connection.close()
+
+    browser = threading.Thread(target=browse)
+    browser.start()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    with utils.timer() as elapsed:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    done.set()
+    browser.join()
+    return outcomes, elapsed['seconds'], utils.summarize(listing)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=400)
+    args = parser.parse_args()
+
+    utils.setup()
+    from django.conf import settings
+    from django.contrib.auth import authenticate
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.urls import reverse
+    from event_app import passwords
+
+    def django_login(username):
+        return 'ok' if authenticate(username=username, password='password') else 'failed'
+
+    def pool_login(username):
+        try:
+            return 'ok' if passwords.authenticate(username, 'password') else 'failed'
+        except passwords.HashingBusy:
+            return 'busy'
+
+    with utils.test_database():
+        call_command('seed_events', users=10, events=2000, stdout=open(os.devnull, 'w'))
+        password = make_password('password')
+        User.objects.bulk_create([
+            User(username='login-%d-%d' % (round, i), password=password)
+            for round in range(2) for i in range(args.requests)
+        ])
+        path = reverse('async-all-event-list')
+        cores = os.cpu_count() or 1
+        print('%d cores, %d hashing workers, queue %d\n' % (
+            cores, settings.PASSWORD_HASHING_WORKERS, settings.PASSWORD_HASHING_QUEUE,
+        ))
+
+        cases = (
+            ('authenticate', django_login, 0),
+            ('pool, first login', pool_login, 1),
+            ('pool, repeat login', pool_login, 1),
+        )
+        print('%-20s %10s %14s %8s %10s %16s' % ('', 'logins/s', 'logins/s/core', 'refused', 'listings', 'listing p50'))
+        for name, login, round in cases:
+            usernames = ['login-%d-%d' % (round, i) for i in range(args.requests)]
+            outcomes, seconds, listing = run(login, usernames, args.concurrency, path)
+            rate = outcomes['ok'] / seconds
+            assert not outcomes['failed'], outcomes
+            print('%-20s %10.1f %14.1f %8d %10d %14.2fms' % (
+                name, rate, rate / cores, outcomes['busy'], listing['count'], listing['p50_ms'],
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Registration throughput under a flash crowd.
+
+Many threads register distinct users for a handful of events at once, first
+through the old check-then-add sequence and then through
+Event.objects.register(). Reports registrations per second and how many seats
+each path oversold. The check constraint on registered_count now turns the
+legacy path's oversells into IntegrityErrors, reported as 'rejected'.
+
+    python -m benchmarks.registration --threads 16 --users 2000 --events 4 --capacity 300
+"""
+import argparse
+import threading
+
+from benchmarks import utils
+
+
+def legacy_register(event_id, user):
+    # The pre-registered_count implementation of EventRegisterView.post.
+    from django.utils import timezone
+    from event_app.models import Event, RegistrationStatus
+
+    event = Event.objects.get(id=event_id)
+    if event.date < timezone.now():
+        return RegistrationStatus.PAST
+    if event.attendees.count() >= event.capacity:
+        return RegistrationStatus.FULL
+    event.attendees.add(user)
+    event.save()
+    return RegistrationStatus.REGISTERED
+
+
+def run(register, users, event_ids, threads):
+    from django.db import IntegrityError, OperationalError, connection
+
+    barrier = threading.Barrier(threads)
+    results = []
+    lock = threading.Lock()
+
+    def worker(index):
+        outcome = []
+        barrier.wait()
+        try:
+            for position, user in enumerate(users[index::threads]):
+                event_id = event_ids[position % len(event_ids)]
+                try:
+                    outcome.append(register(event_id, user))
+                except OperationalError:
+                    outcome.append('locked')
+                except IntegrityError:
+                    outcome.append('rejected')
+        finally:
+            connection.close()
+        with lock:
+            results.extend(outcome)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    with utils.timer() as elapsed:
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+    return results, elapsed['seconds']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--events', type=int, default=4)
+    parser.add_argument('--capacity', type=int, default=300)
+    args = parser.parse_args()
+
+    utils.setup()
+    from datetime import timedelta
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from event_app.models import Event, RegistrationStatus
+
+    with utils.test_database():
+        creator = User.objects.create(username='creator')
+        User.objects.bulk_create([User(username='user%d' % i) for i in range(args.users)])
+        users = list(User.objects.exclude(pk=creator.pk))
+
+        for name, register in (('legacy', legacy_register), ('conditional update', Event.objects.register)):
+            Event.objects.all().delete()
+            events = Event.objects.bulk_create([
+                Event(creator=creator, title='Event %d' % i, description='', date=timezone.now() + timedelta(days=1),
+                      type='Type', status='Status', capacity=args.capacity)
+                for i in range(args.events)
+            ])
+            event_ids = [event.pk for event in events]
+            results, seconds = run(register, users, event_ids, args.threads)
+
+            registered = results.count(RegistrationStatus.REGISTERED)
+            oversold = sum(
+                max(0, event.attendees.count() - event.capacity) for event in Event.objects.filter(pk__in=event_ids)
+            )
+            print('%-20s %8.0f registrations/s  registered=%d full=%d locked=%d rejected=%d oversold=%d' % (
+                name, registered / seconds, registered, results.count(RegistrationStatus.FULL),
+                results.count('locked'), results.count('rejected'), oversold,
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+CPU cost of serving /swagger.json: drf_yasg generation per request against the
+prebuilt schema served from memory.
+
+    python -m benchmarks.schema --requests 200
+"""
+import argparse
+import time
+
+from benchmarks import utils
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    utils.setup()
+    from drf_yasg.views import get_schema_view
+    from rest_framework import permissions
+    from rest_framework.test import APIRequestFactory
+    from event_app import docs, schema
+
+    # Loads drf_yasg and applies the views' schema overrides.
+    schema_view = docs.get_schema_view()
+    generated = get_schema_view(schema.api_info, public=True, permission_classes=(permissions.AllowAny,))
+    views = (
+        ('generated', generated.without_ui(cache_timeout=0)),
+        ('prebuilt', schema_view.without_ui(cache_timeout=0)),
+    )
+    factory = APIRequestFactory()
+    schema.get_schema()  # Build or load the artifact outside the measurement.
+
+    # The test environment allows the 'testserver' host of the request factory.
+    with utils.test_database():
+        for name, view in views:
+            cpu = []
+            samples = []
+            for _ in range(args.requests):
+                request = factory.get('/swagger.json')
+                start = time.process_time()
+                with utils.timer() as elapsed:
+                    response = view(request, format='.json')
+                    if hasattr(response, 'render'):
+                        response.render()
+                cpu.append(time.process_time() - start)
+                samples.append(elapsed['seconds'])
+                assert response.status_code == 200, response.status_code
+            summary = utils.summarize(samples)
+            print('%-10s cpu %8.2fms/request  p50 %8.2fms  p99 %8.2fms' % (
+                name, sum(cpu) / len(cpu) * 1000, summary['p50_ms'], summary['p99_ms'],
+            ))
+
+
+if __name__ == '__main__':
+    main()
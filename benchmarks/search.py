@@ -0,0 +1,84 @@
+"""
+Full-text search against a naive icontains scan.
+
+Fills the events table with N events whose titles and descriptions are drawn
+from a vocabulary with Zipf-like word frequencies, then times the first page of
+results for common and rare queries through Event.objects.search (FTS5, ranked)
+and through an icontains filter on title or description (what a search without
+an index has to do).
+
+    python -m benchmarks.search --rows 1000000
+"""
+import argparse
+import random
+
+from benchmarks import utils
+
+WORDS = (
+    'jazz rock opera ballet concert festival workshop meetup lecture seminar '
+    'garden market gallery theatre cinema marathon charity auction tasting '
+    'python django database design startup poetry chess yoga salsa tango'
+).split()
+SYLLABLES = 'ka lo mi ne ru sa ti vo ze bra cle dri fo gu'.split()
+# The real words first, followed by made-up ones, drawn with Zipf-like
+# frequencies so that some words are common and most are rare.
+VOCABULARY = WORDS + sorted({a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES} - set(WORDS))
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+QUERIES = ('jazz', 'python', 'opera festival', 'salsa tango', 'pyth', VOCABULARY[500], VOCABULARY[2500], 'nonexistentword')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--page-size', type=int, default=100)
+    args = parser.parse_args()
+
+    utils.setup()
+    from datetime import timedelta
+    from django.contrib.auth.models import User
+    from django.db.models import Q
+    from django.utils import timezone
+    from event_app.models import Event
+
+    rng = random.Random(0)
+
+    def text(words):
+        return ' '.join(rng.choices(VOCABULARY, WEIGHTS, k=words))
+
+    with utils.test_database():
+        user = User.objects.create(username='organizer')
+        start = timezone.now()
+        with utils.timer() as elapsed:
+            for offset in range(0, args.rows, 10000):
+                Event.objects.bulk_create([
+                    Event(creator=user, title=text(3), description=text(12),
+                          date=start + timedelta(minutes=i), type='Concert', status='Scheduled', capacity=100)
+                    for i in range(offset, min(offset + 10000, args.rows))
+                ])
+        print('seeded %d events (indexed by triggers) in %.1fs' % (args.rows, elapsed['seconds']))
+
+        def fts(q):
+            return list(Event.objects.search(q).order_by('rank', 'id').values_list('id', flat=True)[:args.page_size])
+
+        def icontains(q):
+            condition = Q()
+            for word in q.split():
+                condition &= Q(title__icontains=word) | Q(description__icontains=word)
+            return list(Event.objects.filter(condition).order_by('date', 'id').values_list('id', flat=True)[:args.page_size])
+
+        for q in QUERIES:
+            for name, search in (('fts5', fts), ('icontains', icontains)):
+                samples = []
+                for _ in range(args.repeat):
+                    with utils.timer() as elapsed:
+                        results = search(q)
+                    samples.append(elapsed['seconds'])
+                summary = utils.summarize(samples)
+                print('%-16s %-10s %4d results  p50 %8.1fms  max %8.1fms' % (
+                    q, name, len(results), summary['p50_ms'], max(samples) * 1000,
+                ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Serialization throughput of the event listings: EventSerializer(many=True)
+over model instances against EventValuesSerializer over `values()` rows, with
+every field and with a sparse fieldset.
+
+Each run includes the query, so the sparse rows also show what reading fewer
+columns saves.
+
+    python -m benchmarks.serializers --rows 10000 --repeat 5
+"""
+import argparse
+import statistics
+
+from benchmarks import utils
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--fields', default='id,title,date', help='Sparse fieldset to compare.')
+    args = parser.parse_args()
+
+    utils.setup()
+    from datetime import timedelta
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from event_app.models import Event
+    from event_app.serializers import EventSerializer, EventValuesSerializer
+
+    with utils.test_database():
+        user = User.objects.create(username='analytics')
+        Event.objects.bulk_create([
+            Event(creator=user, title='Event %d' % i, description='Description ' * 20,
+                  date=timezone.now() + timedelta(minutes=i), type='Concert', status='Scheduled', capacity=100)
+            for i in range(args.rows)
+        ], batch_size=1000)
+        queryset = Event.objects.order_by('date', 'id')
+        sparse = EventValuesSerializer(args.fields.split(','))
+
+        def serializer():
+            request = type('Request', (), {'user': user})
+            return EventSerializer(queryset.all(), many=True, context={'request': request}).data
+
+        cases = (
+            ('EventSerializer', serializer),
+            ('values, all fields', lambda: EventValuesSerializer().serialize(
+                list(queryset.values(*EventValuesSerializer().get_columns())), user)),
+            ('values, %s' % args.fields, lambda: sparse.serialize(
+                list(queryset.values(*sparse.get_columns('date'))), user)),
+        )
+        for name, func in cases:
+            samples = []
+            for _ in range(args.repeat):
+                with utils.timer() as elapsed:
+                    func()
+                samples.append(elapsed['seconds'])
+            seconds = statistics.median(samples)
+            print('%-28s %8d rows  %8.1f ms  %10.0f rows/s' % (name, args.rows, seconds * 1000, args.rows / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+What the token-bucket throttles cost, and what a refused request costs.
+
+Measures:
+
+- the throttle check on its own: allow_request for both throttles, per call,
+  against THROTTLE_CACHE;
+- /allevents/ (served from the listing cache) with THROTTLE_RATES lifted and
+  with the configured rates;
+- the same request once its bucket is empty, answered with 429.
+
+    python -m benchmarks.throttle --requests 2000
+"""
+import argparse
+import io
+import logging
+
+from benchmarks import utils
+
+
+def requests(client, path, count, expected):
+    samples = []
+    for _ in range(count):
+        with utils.timer() as elapsed:
+            response = client.get(path, {'upcoming': 'true'})
+        assert response.status_code == expected, response.status_code
+        samples.append(elapsed['seconds'])
+    return utils.summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--checks', type=int, default=100000, help='Direct allow_request calls.')
+    args = parser.parse_args()
+
+    utils.setup()
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.core.cache import caches
+    from django.core.management import call_command
+    from django.test import Client, RequestFactory, override_settings
+    from django.urls import resolve, reverse
+    from rest_framework.request import Request
+    from event_app.throttling import IPTokenBucketThrottle, UserTokenBucketThrottle
+
+    # Every refusal would log a warning.
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+    path = reverse('all-event-list')
+    buckets = caches[settings.THROTTLE_CACHE]
+    with utils.test_database():
+        call_command('seed_events', users=10, events=2000, stdout=io.StringIO())
+
+        request = RequestFactory().get(path)
+        request.resolver_match = resolve(path)
+        request = Request(request)
+        request.user = User.objects.filter(username__startswith='seed-').first()
+        throttles = [UserTokenBucketThrottle(), IPTokenBucketThrottle()]
+        rate = '%d/s' % (args.checks * 10)
+        with override_settings(THROTTLE_RATES={'*': {'user': rate, 'ip': rate}}):
+            with utils.timer() as elapsed:
+                for _ in range(args.checks):
+                    for throttle in throttles:
+                        assert throttle.allow_request(request, None)
+        print('throttle check: %.2fus per request (%s cache)\n' % (
+            elapsed['seconds'] / args.checks * 1e6, settings.CACHES[settings.THROTTLE_CACHE]['BACKEND'],
+        ))
+
+        client = Client()
+        client.get(path, {'upcoming': 'true'})
+        buckets.clear()
+        results = {}
+        with override_settings(THROTTLE_RATES={}):
+            results['unthrottled'] = requests(client, path, args.requests, 200)
+        # Per day, so that the bucket hardly refills while the refusals are measured.
+        limit = '%d/d' % args.requests
+        with override_settings(THROTTLE_RATES={'*': {'ip': limit}}):
+            results['throttled, allowed'] = requests(client, path, args.requests, 200)
+            results['throttled, refused'] = requests(client, path, args.requests, 429)
+
+        print('%-20s %10s %10s %10s' % ('', 'p50', 'p95', 'p99'))
+        for name, result in results.items():
+            print('%-20s %8.3fms %8.3fms %8.3fms' % (name, result['p50_ms'], result['p95_ms'], result['p99_ms']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""
+Helpers shared by the benchmark scripts in this package.
+
+Each benchmark is run from the project root as a module, e.g.
+
+    python -m benchmarks.registration
+
+and works against a throwaway copy of the test database, never db.sqlite3.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+import django
+
+# Kept in the app so the bench_api management command can use them too.
+from event_app.benchmarking import percentile, summarize, test_database  # noqa: F401
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'event_manager.settings')
+    django.setup()
+
+
+@contextmanager
+def timer():
+    """
+        Yield a dict whose 'seconds' key is filled in when the block exits.
+    """
+    result = {}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result['seconds'] = time.perf_counter() - start
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class EventAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'event_app'
+
+    def ready(self):
+        from event_app import signals  # noqa: F401
+        from event_app.search import check_triggers
+
+        checks.register(check_triggers, checks.Tags.database)
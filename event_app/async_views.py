@@ -0,0 +1,281 @@
+"""
+Async-native versions of the hot read and registration endpoints.
+
+These run directly on the event loop under ASGI, using the async ORM instead of
+DRF's sync views (which Django has to run in a worker thread). They return the
+same payloads as their DRF counterparts in views.py.
+"""
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated, NotFound, Throttled
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from event_app import live, passwords
+from event_app.authentication import CachedJWTAuthentication
+from event_app.filters import EventFilterBackend
+from event_app.models import Event, RegistrationStatus
+from event_app.pagination import EventPagination
+from event_app.routers import replica_reads
+from event_app.serializers import EventValuesSerializer, UserLoginSerializer, UserRegisterSerializer
+from event_app.views import event_model, parse_event_id
+
+
+async def aauthenticate(request):
+    """
+        Resolve the user of a JWT-authenticated request without blocking the
+        event loop. Returns None when no token was sent.
+    """
+    authentication = CachedJWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+    return await authentication.aget_user(authentication.get_validated_token(raw_token))
+
+
+class AsyncAPIView(View):
+    """
+        Base class for the async views: JWT authentication, DRF-style error
+        bodies and JSON responses. Like DRF's APIView it is exempt from CSRF,
+        since it does not authenticate with cookies.
+    """
+    authentication_required = True
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # csrf_exempt() would hide that the view is async on Django 4.2.
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.drf_request = Request(request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES])
+        try:
+            request.user = await aauthenticate(request)
+            if request.user is None and self.authentication_required:
+                raise NotAuthenticated
+            await self.check_throttles(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            response = self.respond(detail, status=exc.status_code)
+            if getattr(exc, 'wait', None):
+                response['Retry-After'] = '%d' % exc.wait
+            return response
+
+    async def check_throttles(self, request):
+        """
+            Refuse the request with 429 if any throttle does, as DRF's APIView does.
+        """
+        waits = []
+        for throttle in [throttle() for throttle in self.throttle_classes]:
+            if not await throttle.aallow_request(request, self):
+                waits.append(throttle.wait())
+        if waits:
+            raise Throttled(max((wait for wait in waits if wait is not None), default=None))
+
+    def respond(self, data, status=status.HTTP_200_OK):
+        return JsonResponse(data, status=status, safe=False, encoder=DjangoJSONEncoder)
+
+
+class AsyncEventListMixin:
+    async def list(self, queryset):
+        serializer = EventValuesSerializer.from_request(self.drf_request)
+        queryset = EventFilterBackend().filter_queryset(self.drf_request, queryset, self)
+        paginator = EventPagination()
+        with replica_reads():
+            rows = await paginator.apaginate_queryset(
+                queryset.values(*serializer.get_columns(*paginator.ordering)), self.drf_request, self,
+            )
+            results = await serializer.aserialize(rows, self.request.user, queryset.model)
+        return self.respond({
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'results': results,
+        })
+
+
+class AsyncAllEventListView(AsyncEventListMixin, AsyncAPIView):
+    """
+        get:
+        Retrieve a list of all events, regardless of creator, ordered by date.
+        Past events moved to the archive are listed with `archived=true`.
+    """
+    authentication_required = False
+
+    async def get(self, request):
+        return await self.list(event_model(self.drf_request).objects.all())
+
+
+class AsyncEventListView(AsyncEventListMixin, AsyncAPIView):
+    """
+        get:
+        Return a list of all events created by the current user, ordered by date.
+        Past events moved to the archive are listed with `archived=true`.
+    """
+    async def get(self, request):
+        return await self.list(event_model(self.drf_request).objects.filter(creator=request.user))
+
+
+class AsyncEventDetailView(AsyncAPIView):
+    """
+        get:
+        Retrieve a detailed view of an event created by the current user.
+    """
+    async def get(self, request, pk):
+        serializer = EventValuesSerializer.from_request(self.drf_request)
+        row = await Event.objects.filter(pk=pk, creator=request.user).values(*serializer.get_columns()).afirst()
+        if row is None:
+            raise NotFound
+        event, = await serializer.aserialize([row], request.user)
+        return self.respond(event)
+
+
+class AsyncEventRegisterView(AsyncAPIView):
+    """
+        post:
+        Register the current user for a specific event.
+
+        delete:
+        Unregister the current user from a specific event.
+    """
+    async def post(self, request):
+        event_id = parse_event_id(self.drf_request.data.get('event_id', None))
+        if event_id is None:
+            return self.respond({'error': 'No event_id provided'}, status=status.HTTP_400_BAD_REQUEST)
+        result = await Event.objects.aregister(event_id, request.user)
+
+        if result == RegistrationStatus.NOT_FOUND:
+            raise NotFound
+        if result == RegistrationStatus.PAST:
+            return self.respond({'error': 'Cannot register for past events'}, status=status.HTTP_400_BAD_REQUEST)
+        if result == RegistrationStatus.FULL:
+            return self.respond({'error': 'Event is full'}, status=status.HTTP_400_BAD_REQUEST)
+        if result == RegistrationStatus.ALREADY_REGISTERED:
+            return self.respond({'message': 'Already registered'})
+
+        return self.respond({'message': 'Registered successfully'})
+
+    async def delete(self, request):
+        event_id = parse_event_id(self.drf_request.query_params.get('event_id', None))
+        if event_id is None:
+            return self.respond({'error': 'No event_id provided'}, status=status.HTTP_400_BAD_REQUEST)
+        result = await Event.objects.aunregister(event_id, request.user)
+
+        if result == RegistrationStatus.NOT_FOUND:
+            raise NotFound
+        if result == RegistrationStatus.PAST:
+            return self.respond({'error': 'Cannot unregister from past events'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return self.respond({'message': 'Unregistered successfully'})
+
+
+class AsyncUserRegisterView(AsyncAPIView):
+    """
+        post:
+        Register a new user.
+    """
+    authentication_required = False
+
+    async def post(self, request):
+        serializer = UserRegisterSerializer(data=self.drf_request.data)
+        # The unique username check queries the users table.
+        if not await sync_to_async(serializer.is_valid)():
+            return self.respond(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        await User.objects.acreate(
+            username=User.normalize_username(serializer.validated_data['username']),
+            password=await passwords.ahash_password(serializer.validated_data['password']),
+        )
+        return self.respond({'message': 'User created successfully'}, status=status.HTTP_201_CREATED)
+
+
+class AsyncUserLoginView(AsyncAPIView):
+    """
+        post:
+        Log in an existing user.
+    """
+    authentication_required = False
+
+    async def post(self, request):
+        serializer = UserLoginSerializer(data=self.drf_request.data)
+        if not serializer.is_valid():
+            return self.respond(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        user = await passwords.aauthenticate(serializer.validated_data['username'],
+                                             serializer.validated_data['password'])
+        if user is None:
+            return self.respond({'error': 'Invalid username or password'}, status=status.HTTP_400_BAD_REQUEST)
+        refresh = RefreshToken.for_user(user)
+        return self.respond({
+            'access': str(refresh.access_token),
+            'refresh': str(refresh),
+        })
+
+
+class SeatUpdatesView(AsyncAPIView):
+    """
+        get:
+        Stream seat availability as Server-Sent Events (ASGI only). Each `seats`
+        event carries a JSON list of {id, capacity, attendee_count, seats_left}
+        for the events whose registrations changed, coalesced per event. Pass
+        `events=1,2,3` to follow only those events, starting with their current
+        counts. The stream ends after LIVE_STREAM_SECONDS; EventSource clients
+        reconnect on their own.
+    """
+    authentication_required = False
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return self.respond({'error': 'Live updates need the ASGI server'},
+                                status=status.HTTP_501_NOT_IMPLEMENTED)
+        event_ids = None
+        if request.GET.get('events'):
+            try:
+                event_ids = {int(value) for value in request.GET['events'].split(',')}
+            except ValueError:
+                return self.respond({'events': 'Expected comma-separated event ids.'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+
+        broker = live.get_broker()
+        subscription = broker.subscribe(event_ids)
+        try:
+            initial = await live.seat_counts(event_ids) if event_ids else []
+        except BaseException:
+            broker.unsubscribe(subscription)
+            raise
+        response = StreamingHttpResponse(self.stream(broker, subscription, initial),
+                                         content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, broker, subscription, initial):
+        deadline = time.monotonic() + settings.LIVE_STREAM_SECONDS
+        try:
+            if initial:
+                yield self.message(initial)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                updates = await subscription.get(min(settings.LIVE_KEEPALIVE_SECONDS, remaining))
+                yield self.message(updates) if updates else ': keepalive\n\n'
+        finally:
+            broker.unsubscribe(subscription)
+
+    @staticmethod
+    def message(updates):
+        return 'event: seats\ndata: %s\n\n' % json.dumps(updates)
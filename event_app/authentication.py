@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+USER_KEY = 'auth:user:%s'
+
+
+def forget_user(user_id):
+    """
+        Drop the cached user, now and again on commit, so a request racing the
+        open transaction cannot cache the old row past it.
+    """
+    key = USER_KEY % user_id
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+        JWTAuthentication that resolves the token's user from Django's cache
+        instead of querying the users table on every request.
+
+        Entries live for AUTH_USER_CACHE_TIMEOUT seconds and are dropped when
+        the user is saved or deleted (see event_app.signals), which covers
+        password changes and deactivation.
+    """
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        key = USER_KEY % user_id
+        user = cache.get(key)
+        if user is None:
+            user = self.fetch_user(user_id)
+            cache.set(key, user, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        return self.check_user(user)
+
+    async def aget_user(self, validated_token):
+        """
+            Async variant of `get_user` for the async views.
+        """
+        user_id = self.get_user_id(validated_token)
+        key = USER_KEY % user_id
+        user = await cache.aget(key)
+        if user is None:
+            user = await self.afetch_user(user_id)
+            await cache.aset(key, user, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        return self.check_user(user)
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+    def fetch_user(self, user_id):
+        try:
+            return self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+    async def afetch_user(self, user_id):
+        try:
+            return await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+    @staticmethod
+    def check_user(user):
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
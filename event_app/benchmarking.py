@@ -0,0 +1,61 @@
+"""
+Helpers shared by the bench_api management command and the benchmark scripts
+in the top-level benchmarks package (which re-exports them from its utils).
+"""
+import statistics
+from contextlib import contextmanager
+
+
+@contextmanager
+def test_database(throttled=False):
+    """
+        Create the test database for the duration of the block, like the test
+        runner does, with the test mirrors (the replica) pointed at it.
+        THROTTLE_RATES are lifted unless `throttled` is set: a benchmark sends
+        every request from one user and address, and would time 429s.
+    """
+    from django.db import connection, connections
+    from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    rates = None if throttled else override_settings(THROTTLE_RATES={})
+    if rates is not None:
+        rates.enable()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    mirrors = {alias: connections[alias].settings_dict['NAME'] for alias in connections
+               if connections[alias].settings_dict['TEST'].get('MIRROR') == connection.alias}
+    for alias in mirrors:
+        connections[alias].close()
+        connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+    try:
+        yield
+    finally:
+        for alias, name in mirrors.items():
+            connections[alias].close()
+            connections[alias].settings_dict['NAME'] = name
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        if rates is not None:
+            rates.disable()
+        teardown_test_environment()
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    """
+        Summarize latency samples (in seconds) as milliseconds.
+    """
+    return {
+        'count': len(samples),
+        'mean_ms': statistics.fmean(samples) * 1000 if samples else 0.0,
+        'p50_ms': percentile(samples, 0.50) * 1000,
+        'p95_ms': percentile(samples, 0.95) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+    }
@@ -0,0 +1,128 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework.response import Response
+
+from event_app.filters import EventFilterBackend
+from event_app.models import Event
+from event_app.serializers import registered_event_ids
+
+VERSION_KEY = 'events:version'
+STATS_KEY = 'events:stats:%s'
+STATS = ('hit', 'miss', 'not_modified')
+
+
+def get_version():
+    """
+        Return the current event data version, a microsecond timestamp of the
+        last change that increases with every change.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = time.time_ns() // 1000
+        cache.add(VERSION_KEY, version, timeout=None)
+        version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def bump_version():
+    version = max(time.time_ns() // 1000, (cache.get(VERSION_KEY) or 0) + 1)
+    cache.set(VERSION_KEY, version, timeout=None)
+
+
+def invalidate():
+    """
+        Invalidate every cached listing. The version is bumped now and again on
+        commit, so a response cached from a read racing the open transaction
+        cannot outlive it.
+    """
+    bump_version()
+    transaction.on_commit(bump_version)
+
+
+def record(stat):
+    key = STATS_KEY % stat
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def stats():
+    """
+        Return the hit, miss and not_modified counters of the listing cache.
+    """
+    values = cache.get_many([STATS_KEY % stat for stat in STATS])
+    return {stat: values.get(STATS_KEY % stat, 0) for stat in STATS}
+
+
+def mark_registered(data, user, model=Event):
+    """
+        Return a cached page of events (of `model`) with `is_registered` set for `user`.
+    """
+    results = data['results'] if isinstance(data, dict) else data
+    if not results or 'is_registered' not in results[0]:
+        return data
+    registered = registered_event_ids(user, [event['id'] for event in results], model)
+    results = [dict(event, is_registered=event['id'] in registered) for event in results]
+    return dict(data, results=results) if isinstance(data, dict) else results
+
+
+class CachedListMixin:
+    """
+        Serve `list()` responses from Django's cache, keyed by the full request
+        URL and the event data version (and the user, with `cache_per_user`,
+        and whatever `get_cache_variant` returns).
+        Cached pages are shared between users; their `is_registered` flags are
+        set for the requesting user with one query per hit.
+
+        Responses carry an ETag derived from the version, so a client
+        revalidating an unchanged page gets a 304 before any query runs. There
+        is no Last-Modified: its one-second resolution would answer 304 for a
+        change made in the same second as the client's previous fetch.
+    """
+    cache_per_user = False
+
+    def get_cache_variant(self, request):
+        """
+            Return what else, besides the version, the user and the URL, the
+            cached page and its ETag depend on. For filters relative to now,
+            such as `upcoming`, that is the current EVENT_LIST_CACHE_WINDOW:
+            events leave them without any write bumping the version.
+        """
+        if EventFilterBackend in getattr(self, 'filter_backends', []) and EventFilterBackend.is_time_relative(request):
+            return str(int(timezone.now().timestamp() // settings.EVENT_LIST_CACHE_WINDOW))
+        return ''
+
+    def list(self, request, *args, **kwargs):
+        version = get_version()
+        user_id = request.user.pk if self.cache_per_user else None
+        digest = hashlib.md5(('%s:%s:%s:%s' % (
+            version, user_id, self.get_cache_variant(request), request.build_absolute_uri(),
+        )).encode()).hexdigest()
+        # Pages carry the user's `is_registered` flags, so the ETag is per user.
+        etag = quote_etag(hashlib.md5(('%s:%s' % (digest, request.user.pk)).encode()).hexdigest())
+
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            record('not_modified')
+        else:
+            key = 'events:list:%s' % digest
+            data = cache.get(key)
+            if data is None:
+                record('miss')
+                response = super().list(request, *args, **kwargs)
+                cache.set(key, response.data, timeout=settings.EVENT_LIST_CACHE_TIMEOUT)
+            else:
+                record('hit')
+                response = Response(mark_registered(data, request.user, self.get_queryset().model))
+
+        response['ETag'] = etag
+        return response
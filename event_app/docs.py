@@ -0,0 +1,140 @@
+"""
+The API docs (schema and Swagger/ReDoc pages), loaded on first use.
+
+Importing drf_yasg costs every worker tens of milliseconds at startup (most of
+it pkg_resources), although the docs see little traffic. So nothing imports it
+until a docs page is requested or the schema is generated:
+
+- views declare their schema overrides with this module's `openapi` and
+  `swagger_auto_schema`, which only record them; `install` hands them to
+  drf_yasg once it is loaded;
+- the docs URLs are served by `lazy_view`s, which build drf_yasg's views on
+  their first request;
+- drf_yasg is not an installed app: settings point the template and static file
+  lookups at its package directly.
+
+With settings.API_DOCS off the docs URLs are not routed at all.
+"""
+import threading
+
+from django.urls import URLPattern, URLResolver, get_resolver
+
+DEFERRED_ATTRIBUTE = '_deferred_swagger_auto_schema'
+
+_schema_view = None
+_installed = False
+_lock = threading.RLock()
+
+
+class Deferred:
+    """
+        A reference into drf_yasg.openapi, such as `openapi.IN_QUERY` or
+        `openapi.Parameter(...)`, looked up once drf_yasg is loaded.
+    """
+    def __init__(self, name=None, args=None, kwargs=None):
+        self.name = name
+        self.args = args
+        self.kwargs = kwargs
+
+    def __getattr__(self, name):
+        if self.name is not None or name.startswith('__'):
+            raise AttributeError(name)
+        return Deferred(name)
+
+    def __call__(self, *args, **kwargs):
+        return Deferred(self.name, args, kwargs)
+
+    def resolve(self):
+        from drf_yasg import openapi as yasg_openapi
+
+        value = getattr(yasg_openapi, self.name)
+        if self.args is None:
+            return value
+        return value(*resolve(self.args), **resolve(self.kwargs))
+
+
+openapi = Deferred()
+
+
+def resolve(value):
+    if isinstance(value, Deferred):
+        return value.resolve()
+    if isinstance(value, (list, tuple)):
+        return type(value)(resolve(item) for item in value)
+    if isinstance(value, dict):
+        return {key: resolve(item) for key, item in value.items()}
+    return value
+
+
+def swagger_auto_schema(**kwargs):
+    """
+        Record drf_yasg.utils.swagger_auto_schema arguments on a view method,
+        to be applied by `install`. Works with method_decorator like the original.
+    """
+    def decorator(view_method):
+        setattr(view_method, DEFERRED_ATTRIBUTE, kwargs)
+        return view_method
+
+    return decorator
+
+
+def views(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from views(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            view = getattr(pattern.callback, 'cls', None) or getattr(pattern.callback, 'view_class', None)
+            if view is not None:
+                yield view
+
+
+def install():
+    """
+        Apply the recorded schema overrides of every routed view with drf_yasg.
+    """
+    global _installed
+    with _lock:
+        if _installed:
+            return
+        from drf_yasg.utils import swagger_auto_schema as apply
+
+        for view in views(get_resolver().url_patterns):
+            for method in view.http_method_names:
+                view_method = getattr(view, method, None)
+                kwargs = getattr(view_method, DEFERRED_ATTRIBUTE, None)
+                # Methods shared through mixins are reached from several views.
+                if kwargs is not None and not hasattr(view_method, '_swagger_auto_schema'):
+                    apply(**resolve(kwargs))(view_method)
+        _installed = True
+
+
+def get_schema_view():
+    """
+        Return the drf_yasg schema view class, loading drf_yasg the first time.
+    """
+    global _schema_view
+    with _lock:
+        if _schema_view is None:
+            install()
+            from event_app.schema import build_schema_view
+
+            _schema_view = build_schema_view()
+        return _schema_view
+
+
+def lazy_view(renderer, *args, **kwargs):
+    """
+        A view that serves `get_schema_view().<renderer>(*args, **kwargs)`,
+        e.g. lazy_view('with_ui', 'swagger'), built on its first request.
+    """
+    view = None
+
+    def lazy(request, *view_args, **view_kwargs):
+        nonlocal view
+        if view is None:
+            view = getattr(get_schema_view(), renderer)(*args, **kwargs)
+        return view(request, *view_args, **view_kwargs)
+
+    lazy.csrf_exempt = True
+    return lazy
+
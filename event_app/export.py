@@ -0,0 +1,124 @@
+"""
+Streaming exports of events as NDJSON or CSV.
+
+Rows are read as `values()` dicts through `QuerySet.iterator()`, so memory use
+stays flat however large the table is. Attendee ids, when asked for, are
+fetched with one query per chunk of events.
+
+Under ASGI, Django 4.2 collects a sync streaming iterator into a list before
+sending it, so the export view hands ASGI requests `aiterate(...)` instead, an
+async iterator that advances the sync one chunk at a time.
+"""
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer
+
+from event_app.models import Event
+from event_app.serializers import format_datetime
+
+EXPORT_FIELDS = ['id', 'creator', 'title', 'description', 'date', 'type', 'status', 'capacity', 'attendee_count']
+
+
+def export_fields(attendees=False):
+    return EXPORT_FIELDS + ['attendees'] if attendees else EXPORT_FIELDS
+
+
+def export_chunks(queryset, attendees=False, chunk_size=None):
+    """
+        Yield the events of `queryset` in id order as lists of at most
+        `chunk_size` dicts shaped like the API payload.
+    """
+    chunk_size = chunk_size or settings.EVENT_EXPORT_CHUNK_SIZE
+    tz = timezone.get_current_timezone()
+    rows = queryset.order_by('id').values(
+        *EXPORT_FIELDS[:-1], attendee_count=F('registered_count'),
+    ).iterator(chunk_size=chunk_size)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        if attendees:
+            attending = {row['id']: [] for row in chunk}
+            through = Event.attendees.through.objects.using(queryset.db).filter(
+                event_id__in=list(attending),
+            ).order_by('id')
+            for event_id, user_id in through.values_list('event_id', 'user_id').iterator():
+                attending[event_id].append(user_id)
+        for row in chunk:
+            row['date'] = format_datetime(row['date'], tz)
+            if attendees:
+                row['attendees'] = attending[row['id']]
+        yield chunk
+
+
+async def aiterate(iterator):
+    """
+        Yield the items of a sync iterator from async code, advancing it in
+        Django's sync thread (where its database cursor lives) one item at a time.
+    """
+    advance = sync_to_async(next)
+    done = object()
+    while True:
+        item = await advance(iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+class Echo:
+    """
+        A file-like object that hands back what is written to it, so that
+        csv.writer can produce strings for a streaming response.
+    """
+    def write(self, value):
+        return value
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+        One JSON object per line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return ''.join(self.stream([data if isinstance(data, list) else [data]]))
+
+    def stream(self, chunks, fields=None):
+        for chunk in chunks:
+            yield ''.join(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in chunk)
+
+
+class CSVRenderer(BaseRenderer):
+    """
+        CSV with a header row. Lists, such as attendee ids, are joined with spaces.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        fields = list(rows[0]) if rows else []
+        return ''.join(self.stream([rows], fields))
+
+    def stream(self, chunks, fields):
+        writer = csv.writer(Echo())
+        yield writer.writerow(fields)
+        for chunk in chunks:
+            yield ''.join(writer.writerow([self.format_value(row[field]) for field in fields]) for row in chunk)
+
+    @staticmethod
+    def format_value(value):
+        if isinstance(value, list):
+            return ' '.join(str(item) for item in value)
+        return value
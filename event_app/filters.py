@@ -0,0 +1,95 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+class EventFilterBackend(BaseFilterBackend):
+    """
+        Filters event listings by query parameters:
+
+        - `date_from` / `date_to`: ISO date or datetime bounds on the event date,
+          both inclusive (a bare `date_to` date covers the whole day).
+        - `type`, `status`: exact match.
+        - `upcoming`: `true` for events that have not started yet, `false` for
+          past events.
+
+        Each filter is served by one of the composite indexes on Event together
+        with the (date, id) pagination order.
+    """
+    true_values = ('1', 'true', 'yes')
+    false_values = ('0', 'false', 'no')
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        filters = {}
+
+        date_from = params.get('date_from')
+        if date_from:
+            filters['date__gte'], _ = self.parse_bound(date_from, 'date_from')
+        date_to = params.get('date_to')
+        if date_to:
+            value, whole_day = self.parse_bound(date_to, 'date_to')
+            if whole_day:
+                filters['date__lt'] = value + timedelta(days=1)
+            else:
+                filters['date__lte'] = value
+
+        for field in ('type', 'status'):
+            value = params.get(field)
+            if value:
+                filters[field] = value
+
+        upcoming = params.get('upcoming', '').lower()
+        now = timezone.now()
+        if upcoming in self.true_values:
+            filters['date__gte'] = max(filters.get('date__gte', now), now)
+        elif upcoming in self.false_values:
+            queryset = queryset.filter(date__lt=now)
+        elif upcoming:
+            raise ValidationError({'upcoming': 'Expected true or false.'})
+
+        return queryset.filter(**filters)
+
+    @classmethod
+    def is_time_relative(cls, request):
+        """
+            Whether the events the request selects change with the current
+            time, and not only with the data (`upcoming`).
+        """
+        return bool(request.query_params.get('upcoming'))
+
+    def parse_bound(self, value, name):
+        """
+            Return the bound as an aware datetime, and whether it was given as a bare date.
+        """
+        try:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time.min) if day is not None else parse_datetime(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({name: 'Expected an ISO 8601 date or datetime.'})
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed, day is not None
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': name,
+                'required': False,
+                'in': 'query',
+                'description': description,
+                'schema': {'type': 'string'},
+            }
+            for name, description in (
+                ('date_from', 'Only events on or after this ISO date or datetime.'),
+                ('date_to', 'Only events on or before this ISO date or datetime.'),
+                ('type', 'Only events of this type.'),
+                ('status', 'Only events with this status.'),
+                ('upcoming', 'true for events that have not started yet, false for past events.'),
+            )
+        ]
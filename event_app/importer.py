@@ -0,0 +1,214 @@
+"""
+Streaming bulk import of events and their attendees from NDJSON or CSV.
+
+The input is read row by row and flows through a pipeline of generators:
+parsed rows are grouped into batches, each batch is validated with
+EventListSerializer (which loads the users of the whole batch with one query)
+and written with bulk_create in one transaction. Memory use therefore depends
+on the batch size, not on the size of the file.
+
+Rows look like those written by the export (export.py): `id` and
+`attendee_count` are ignored, and in CSV `attendees` holds user ids separated
+by spaces.
+
+The number of input rows consumed so far is saved in an ImportProgress row in
+the same transaction as each batch, so an interrupted import resumes after the
+last committed batch, never re-importing or skipping one.
+"""
+import csv
+import json
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from event_app.models import ImportProgress
+from event_app.serializers import EventListSerializer, EventSerializer
+
+
+class ImportRowError(Exception):
+    """
+        Raised for the first invalid row of a batch when invalid rows are not skipped.
+    """
+    def __init__(self, number, errors):
+        super().__init__('Row %d is invalid: %s' % (number, json.dumps(errors)))
+        self.number = number
+        self.errors = errors
+
+
+class UnreadableRow:
+    """
+        Stands in for a row that could not be parsed, to be reported as invalid.
+    """
+    def __init__(self, error):
+        self.error = error
+
+
+def read_ndjson(lines):
+    """
+        Yield (row number, row) for each non-blank line.
+    """
+    number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            yield number, json.loads(line)
+        except ValueError as error:
+            yield number, UnreadableRow('Invalid JSON: %s' % error)
+
+
+def read_csv(lines):
+    """
+        Yield (row number, row) for each CSV record, with the attendee ids
+        split into a list and blank cells left out.
+    """
+    for number, row in enumerate(csv.DictReader(lines), 1):
+        row = {field: value for field, value in row.items() if field is not None and value not in ('', None)}
+        if 'attendees' in row:
+            row['attendees'] = row['attendees'].split()
+        yield number, row
+
+
+READERS = {'ndjson': read_ndjson, 'csv': read_csv}
+
+
+def batches(rows, batch_size):
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def repeated_attendees(row):
+    """
+        Return the attendee ids listed more than once in `row`.
+    """
+    attendees = row.get('attendees') if isinstance(row, dict) else None
+    if not isinstance(attendees, list):
+        return []
+    seen = set()
+    repeated = []
+    for value in map(str, attendees):
+        if value in seen and value not in repeated:
+            repeated.append(value)
+        seen.add(value)
+    return repeated
+
+
+def validate(batch):
+    """
+        Validate a batch of (row number, row) and return the validated rows
+        with the errors of the invalid ones as (row number, errors).
+    """
+    def serializer(rows):
+        return EventListSerializer(child=EventSerializer(), data=rows, max_length=None)
+
+    errors = []
+    parsed = []
+    for number, row in batch:
+        if isinstance(row, UnreadableRow):
+            errors.append((number, {'non_field_errors': [row.error]}))
+            continue
+        # The API merges a repeated attendee; in a file it more likely means a
+        # broken export, so the row is reported rather than changed.
+        repeated = repeated_attendees(row)
+        if repeated:
+            errors.append((number, {'attendees': ['Repeated attendees: %s.' % ', '.join(repeated)]}))
+        else:
+            parsed.append((number, row))
+    batch = parsed
+    if not batch:
+        return [], errors
+    valid = serializer([row for _, row in batch])
+    if valid.is_valid():
+        return valid.validated_data, errors
+
+    good = []
+    for (number, row), error in zip(batch, valid.errors):
+        if error:
+            errors.append((number, error))
+        else:
+            good.append(row)
+    errors.sort(key=lambda error: error[0])
+    if not good:
+        return [], errors
+    # Validation stops short of returning the valid rows of a failing batch.
+    valid = serializer(good)
+    valid.is_valid(raise_exception=True)
+    return valid.validated_data, errors
+
+
+class Checkpoint:
+    """
+        The progress of an import, kept in the ImportProgress row called
+        `name`. Saved inside the transaction of each batch.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.rows = self.events = self.links = self.invalid = 0
+        self.complete = False
+
+    def exists(self):
+        return ImportProgress.objects.filter(name=self.name).exists()
+
+    def load(self):
+        progress = ImportProgress.objects.get(name=self.name)
+        self.rows, self.events, self.links, self.invalid = (
+            progress.rows, progress.events, progress.links, progress.invalid,
+        )
+        self.complete = progress.complete
+
+    def save(self):
+        state = {
+            'rows': self.rows, 'events': self.events, 'links': self.links,
+            'invalid': self.invalid, 'complete': self.complete,
+        }
+        if not ImportProgress.objects.filter(name=self.name).update(**state):
+            ImportProgress.objects.create(name=self.name, **state)
+
+    def delete(self):
+        ImportProgress.objects.filter(name=self.name).delete()
+
+
+def import_events(lines, format, checkpoint, batch_size=None, skip_invalid=False, on_error=None, on_batch=None):
+    """
+        Import the rows of `lines` after the `checkpoint.rows` already
+        imported, updating and saving `checkpoint` with each batch.
+
+        Invalid rows raise ImportRowError before their batch is written,
+        unless `skip_invalid` is set, in which case they are passed to
+        `on_error(number, errors)` and left out. `on_batch(checkpoint, rate)`
+        is called after each batch with the rows per second so far.
+    """
+    batch_size = batch_size or settings.EVENT_IMPORT_BATCH_SIZE
+    rows = islice(READERS[format](lines), checkpoint.rows, None)
+    imported = 0
+    start = time.perf_counter()
+
+    for batch in batches(rows, batch_size):
+        validated, errors = validate(batch)
+        if errors and not skip_invalid:
+            raise ImportRowError(*errors[0])
+        for number, error in errors:
+            if on_error is not None:
+                on_error(number, error)
+
+        with transaction.atomic():
+            events, links = EventListSerializer.insert(validated)
+            checkpoint.rows = batch[-1][0]
+            checkpoint.events += len(events)
+            checkpoint.links += links
+            checkpoint.invalid += len(errors)
+            checkpoint.save()
+
+        imported += len(batch)
+        if on_batch is not None:
+            on_batch(checkpoint, imported / (time.perf_counter() - start))
+
+    checkpoint.complete = True
+    checkpoint.save()
+    return checkpoint
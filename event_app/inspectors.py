@@ -0,0 +1,36 @@
+from drf_yasg import openapi
+from drf_yasg.inspectors import FilterInspector, NotHandled, PaginatorInspector
+from drf_yasg.utils import force_real_str
+
+from event_app.filters import EventFilterBackend
+from event_app.pagination import KeysetPagination
+
+
+class OperationParametersInspector(PaginatorInspector, FilterInspector):
+    """
+        Describes the query parameters of this app's paginators and filter
+        backends from their get_schema_operation_parameters(), without going
+        through coreapi, which is not installed.
+    """
+    handles = (KeysetPagination, EventFilterBackend)
+
+    def get_paginator_parameters(self, paginator):
+        return self.get_parameters(paginator)
+
+    def get_filter_parameters(self, filter_backend):
+        return self.get_parameters(filter_backend)
+
+    def get_parameters(self, component):
+        if not isinstance(component, self.handles):
+            return NotHandled
+
+        return [
+            openapi.Parameter(
+                name=parameter['name'],
+                in_=openapi.IN_QUERY,
+                required=parameter['required'],
+                description=force_real_str(parameter['description']),
+                type=openapi.TYPE_INTEGER if parameter['schema']['type'] == 'integer' else openapi.TYPE_STRING,
+            )
+            for parameter in component.get_schema_operation_parameters(self.view)
+        ]
@@ -0,0 +1,153 @@
+"""
+Live seat availability, pushed to clients as Server-Sent Events.
+
+Registration changes are published to the broker named by
+settings.LIVE_BROKER. The broker coalesces them per event over
+LIVE_COALESCE_SECONDS, reads the seat counts of every changed event with one
+query, and hands the result to each subscription of the worker. A burst of
+registrations on a popular event therefore costs one query and one message per
+subscriber, however many seats were taken.
+
+Subscriptions live on the worker's event loop, so they only work under ASGI.
+The base Broker delivers within one process. To fan out across workers, a
+subclass sends the published ids to every worker from `publish` (e.g. over
+Redis pub/sub), and each worker passes the ids it receives to `dispatch`.
+"""
+import asyncio
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from event_app.models import Event
+
+
+class Subscription:
+    """
+        The updates not yet sent to one client, merged per event so a slow
+        client only ever holds the latest count of each event.
+    """
+    def __init__(self, loop, event_ids=None):
+        self.loop = loop
+        self.event_ids = event_ids
+        self.updates = {}
+        self.ready = asyncio.Event()
+
+    def push(self, updates):
+        # Runs on self.loop.
+        for update in updates:
+            if self.event_ids is None or update['id'] in self.event_ids:
+                self.updates[update['id']] = update
+        if self.updates:
+            self.ready.set()
+
+    async def get(self, timeout):
+        """
+            Wait up to `timeout` seconds for updates and return them; an empty
+            list means the wait timed out.
+        """
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self.ready.clear()
+        updates, self.updates = list(self.updates.values()), {}
+        return updates
+
+
+async def seat_counts(event_ids):
+    return [
+        {
+            'id': row['id'],
+            'capacity': row['capacity'],
+            'attendee_count': row['registered_count'],
+            'seats_left': row['capacity'] - row['registered_count'],
+        }
+        async for row in Event.objects.using('default').filter(pk__in=event_ids).order_by('id').values(
+            'id', 'capacity', 'registered_count',
+        )
+    ]
+
+
+class Broker:
+    """
+        Delivers seat updates to the subscriptions of this process.
+    """
+    def __init__(self):
+        self.coalesce_seconds = settings.LIVE_COALESCE_SECONDS
+        self.lock = threading.Lock()
+        self.subscriptions = set()
+        self.pending = set()
+        self.flushing = False
+
+    def subscribe(self, event_ids=None):
+        subscription = Subscription(asyncio.get_running_loop(), event_ids)
+        with self.lock:
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+            if not self.subscriptions:
+                # The flush may have been scheduled on a loop that is going away.
+                self.pending = set()
+                self.flushing = False
+
+    def publish(self, event_ids):
+        """
+            Announce that the seat counts of `event_ids` changed. Safe to call
+            from any thread, once the change is committed.
+        """
+        self.dispatch(event_ids)
+
+    def dispatch(self, event_ids):
+        with self.lock:
+            if not self.subscriptions:
+                return
+            self.pending.update(event_ids)
+            if self.flushing:
+                return
+            self.flushing = True
+            loop = next(iter(self.subscriptions)).loop
+        flush = self.flush()
+        try:
+            loop.call_soon_threadsafe(loop.create_task, flush)
+        except RuntimeError:
+            # The loop closed after its last subscription ended.
+            flush.close()
+            with self.lock:
+                self.flushing = False
+
+    async def flush(self):
+        await asyncio.sleep(self.coalesce_seconds)
+        with self.lock:
+            event_ids, self.pending = self.pending, set()
+            self.flushing = False
+            subscriptions = list(self.subscriptions)
+        if not subscriptions:
+            return
+        updates = await seat_counts(event_ids)
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.push, updates)
+
+
+_broker = None
+_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _lock:
+            if _broker is None:
+                _broker = import_string(settings.LIVE_BROKER)()
+    return _broker
+
+
+def reset():
+    """
+        Drop the broker, so the next call to `get_broker` builds it from the settings.
+    """
+    global _broker
+    _broker = None
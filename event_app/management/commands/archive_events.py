@@ -0,0 +1,46 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from event_app.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Move past events and their attendees from the live tables to the archive, in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.EVENT_ARCHIVE_AFTER_DAYS,
+                            help='Archive events that took place more than this many days ago '
+                                 '(EVENT_ARCHIVE_AFTER_DAYS by default).')
+        parser.add_argument('--batch-size', type=int, default=settings.EVENT_ARCHIVE_BATCH_SIZE,
+                            help='Events moved per transaction (EVENT_ARCHIVE_BATCH_SIZE by default).')
+        parser.add_argument('--limit', type=int, help='Stop after archiving this many events.')
+
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError('--days cannot be negative: only past events can be archived.')
+        before = timezone.now() - timedelta(days=options['days'])
+        past = Event.objects.filter(date__lt=before)
+
+        events = links = 0
+        start = time.perf_counter()
+        while options['limit'] is None or events < options['limit']:
+            size = options['batch_size'] if options['limit'] is None else min(options['batch_size'],
+                                                                              options['limit'] - events)
+            event_ids = list(past.order_by('date', 'id').values_list('id', flat=True)[:size])
+            if not event_ids:
+                break
+            # Filtered again in case an event was moved to a later date meanwhile.
+            moved, moved_links = past.filter(pk__in=event_ids).archive()
+            events += moved
+            links += moved_links
+            self.stdout.write('Archived %d events, %d attendee links (%.0f events/s).' % (
+                events, links, events / (time.perf_counter() - start),
+            ))
+
+        self.stdout.write(self.style.SUCCESS('Archived %d events and %d attendee links from before %s.' % (
+            events, links, before.isoformat(),
+        )))
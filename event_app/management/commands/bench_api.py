@@ -0,0 +1,298 @@
+import base64
+import json
+import platform
+import random
+import re
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from contextlib import nullcontext
+from datetime import timedelta
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+from rest_framework_simplejwt.settings import api_settings
+
+from event_app.benchmarking import summarize, test_database
+from event_app.management.commands.seed_events import TOPICS, TYPES
+
+METRIC_LINE = re.compile(r'^http_request_sql_queries_(sum|count)\{view="([^"]*)",method="[^"]*"\} (\S+)$')
+
+
+def get(name, params=None, **kwargs):
+    path = reverse(name, kwargs=kwargs)
+    return 'get', path + '?' + urlencode(params) if params else path, None
+
+
+def register(context, rng, state):
+    """
+        Alternate between registering for an upcoming event and cancelling it.
+    """
+    event_id = rng.choice(context['upcoming'])
+    if state.pop(event_id, False):
+        return 'delete', reverse('event-register') + '?' + urlencode({'event_id': event_id}), None
+    state[event_id] = True
+    return 'post', reverse('event-register'), {'event_id': event_id}
+
+
+# Each scenario returns (method, path, body) for one request, given the shared
+# context built by `prepare`, a per-worker random generator and state dict.
+SCENARIOS = {
+    'all-event-list': lambda context, rng, state: get('all-event-list', {'upcoming': 'true', 'type': rng.choice(TYPES)}),
+    'async-all-event-list': lambda context, rng, state: get('async-all-event-list', {'upcoming': 'true'}),
+    'event-search': lambda context, rng, state: get('event-search', {'q': rng.choice(TOPICS)}),
+    'event-list': lambda context, rng, state: get('event-list'),
+    'event-detail': lambda context, rng, state: get('event-detail', pk=context['event_id']),
+    'event-register': register,
+    'login': lambda context, rng, state: ('post', reverse('login'), context['credentials']),
+    'schema-json': lambda context, rng, state: get('schema-json'),
+    'event-export': lambda context, rng, state: get('event-export', {'format': 'ndjson'}),
+}
+# Exports read the whole table, so they only run when asked for.
+DEFAULT_SCENARIOS = [name for name in SCENARIOS if name != 'event-export']
+
+
+class ClientTransport:
+    """
+        Requests through the Django test client, in this process.
+    """
+    def __init__(self):
+        # DEBUG allows localhost; the test environment allows 'testserver'.
+        host = 'testserver' if 'testserver' in settings.ALLOWED_HOSTS else 'localhost'
+        self.client = Client(HTTP_HOST=host)
+
+    def request(self, method, path, body=None, token=None):
+        headers = {'HTTP_AUTHORIZATION': 'Bearer %s' % token} if token else {}
+        if body is None:
+            response = getattr(self.client, method)(path, **headers)
+        else:
+            response = getattr(self.client, method)(path, json.dumps(body), content_type='application/json', **headers)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response.status_code, content
+
+    def close(self):
+        connections.close_all()
+
+
+class HTTPTransport:
+    """
+        Requests over HTTP to a running server.
+    """
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, body=None, token=None):
+        headers = {'Authorization': 'Bearer %s' % token} if token else {}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method.upper())
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.read()
+
+    def close(self):
+        pass
+
+
+def query_totals(transport):
+    """
+        Return {view: [queries, requests]} from the /metrics endpoint.
+    """
+    status, content = transport.request('get', reverse('metrics'))
+    if status != 200:
+        return {}
+    totals = {}
+    for line in content.decode().splitlines():
+        match = METRIC_LINE.match(line)
+        if match:
+            kind, view, value = match.groups()
+            totals.setdefault(view, [0.0, 0.0])[kind == 'count'] += float(value)
+    return totals
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Load-test the API endpoints concurrently and save throughput, latency and queries per request as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', action='append', choices=sorted(SCENARIOS), dest='endpoints',
+                            help='Endpoint to benchmark; repeat for several (all but event-export by default).')
+        parser.add_argument('--base-url', help='Benchmark a running server, e.g. http://localhost:8000, '
+                                               'instead of serving requests in this process.')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests per endpoint.')
+        parser.add_argument('--test-database', action='store_true',
+                            help='Run in process against a throwaway test database seeded by seed_events.')
+        parser.add_argument('--users', type=int, default=1000, help='Users to seed with --test-database.')
+        parser.add_argument('--events', type=int, default=10000, help='Events to seed with --test-database.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--throttle', action='store_true',
+                            help='Keep THROTTLE_RATES in process runs; by default they are lifted, since every '
+                                 'request comes from one user and address.')
+        parser.add_argument('--output', help='JSON results file (benchmarks/results/api-<time>.json by default).')
+
+    def handle(self, *args, **options):
+        if options['base_url'] and options['test_database']:
+            raise CommandError('--test-database only applies to in-process runs.')
+
+        throttled = options['base_url'] or options['throttle']
+        with test_database(throttled=throttled) if options['test_database'] else nullcontext():
+            if options['test_database']:
+                call_command('seed_events', users=options['users'], events=options['events'],
+                             seed=options['seed'], stdout=self.stdout)
+            if options['base_url']:
+                def transport():
+                    return HTTPTransport(options['base_url'])
+            else:
+                transport = ClientTransport
+            with nullcontext() if throttled else override_settings(THROTTLE_RATES={}):
+                results = self.benchmark(transport, options)
+
+        output = Path(options['output'] or Path(settings.BASE_DIR) / 'benchmarks' / 'results' / (
+            'api-%s.json' % timezone.now().strftime('%Y%m%dT%H%M%S')))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2) + '\n')
+        self.stdout.write(self.style.SUCCESS('Wrote %s' % output))
+
+    def benchmark(self, transport, options):
+        setup = transport()
+        try:
+            context = self.prepare(setup, options['seed'])
+            endpoints = {}
+            for name in options['endpoints'] or DEFAULT_SCENARIOS:
+                self.warm_up(name, setup, context, options)
+                before = query_totals(setup)
+                endpoints[name] = self.run(name, transport, context, options)
+                after = query_totals(setup)
+                queries, requests = (
+                    a - b for a, b in zip(after.get(name, [0, 0]), before.get(name, [0, 0]))
+                )
+                endpoints[name]['queries_per_request'] = queries / requests if requests else None
+                self.report(name, endpoints[name])
+        finally:
+            setup.close()
+
+        return {
+            'timestamp': timezone.now().isoformat(),
+            'revision': git_revision(),
+            'mode': 'http' if options['base_url'] else 'in-process',
+            'base_url': options['base_url'],
+            'concurrency': options['concurrency'],
+            'requests': options['requests'],
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'endpoints': endpoints,
+        }
+
+    def prepare(self, transport, seed):
+        """
+            Register and log in a benchmark user through the API, give it an
+            event of its own and collect upcoming events to register for.
+        """
+        credentials = {'username': 'bench-%d-%d' % (seed, time.time_ns()), 'password': 'bench-password'}
+        status, content = transport.request('post', reverse('register'), credentials)
+        if status != 201:
+            raise CommandError('Could not register the benchmark user (%s): %s' % (status, content[:200]))
+        status, content = transport.request('post', reverse('login'), credentials)
+        if status != 200:
+            raise CommandError('Could not log in the benchmark user (%s): %s' % (status, content[:200]))
+        token = json.loads(content)['access']
+        payload = json.loads(base64.urlsafe_b64decode(token.split('.')[1] + '=='))
+
+        status, content = transport.request('post', reverse('event-list'), {
+            'creator': payload[api_settings.USER_ID_CLAIM], 'title': 'Benchmark event',
+            'description': 'Created by bench_api', 'type': 'Meetup', 'status': 'Scheduled', 'capacity': 10,
+            'date': (timezone.now() + timedelta(days=30)).isoformat(),
+        }, token)
+        if status != 201:
+            raise CommandError('Could not create the benchmark event (%s): %s' % (status, content[:200]))
+        event_id = json.loads(content)['id']
+
+        status, content = transport.request('get', get('all-event-list', {'upcoming': 'true', 'page_size': 100})[1])
+        upcoming = [event['id'] for event in json.loads(content)['results']] if status == 200 else []
+        return {'credentials': credentials, 'token': token, 'event_id': event_id, 'upcoming': upcoming or [event_id]}
+
+    def warm_up(self, name, transport, context, options):
+        rng = random.Random('%s-%s-warmup' % (options['seed'], name))
+        state = {}
+        for _ in range(options['warmup']):
+            transport.request(*SCENARIOS[name](context, rng, state), context['token'])
+
+    def run(self, name, transport, context, options):
+        """
+            Send `--requests` requests for one endpoint from `--concurrency`
+            threads and summarize them.
+        """
+        scenario = SCENARIOS[name]
+        lock = threading.Lock()
+        issued = {'count': 0}
+        samples = []
+        statuses = Counter()
+
+        def worker(index):
+            client = transport()
+            rng = random.Random('%s-%s-%d' % (options['seed'], name, index))
+            state = {}
+            try:
+                while True:
+                    with lock:
+                        if issued['count'] >= options['requests']:
+                            return
+                        issued['count'] += 1
+                    method, path, body = scenario(context, rng, state)
+                    start = time.perf_counter()
+                    try:
+                        status, _ = client.request(method, path, body, context['token'])
+                    except OSError:
+                        status = 'error'
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        samples.append(elapsed)
+                        statuses[str(status)] += 1
+            finally:
+                client.close()
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(options['concurrency'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        summary = summarize(samples)
+        summary.update({
+            'throughput_rps': len(samples) / elapsed if elapsed else 0.0,
+            'statuses': dict(statuses),
+        })
+        return summary
+
+    def report(self, name, result):
+        self.stdout.write('%-22s %8.1f req/s  p50 %8.2fms  p95 %8.2fms  p99 %8.2fms  queries %s  %s' % (
+            name, result['throughput_rps'], result['p50_ms'], result['p95_ms'], result['p99_ms'],
+            '%.1f' % result['queries_per_request'] if result['queries_per_request'] is not None else '-',
+            ' '.join('%s:%d' % item for item in sorted(result['statuses'].items())),
+        ))
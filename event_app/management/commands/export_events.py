@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from event_app.export import CSVRenderer, NDJSONRenderer, export_chunks, export_fields
+from event_app.models import Event
+
+RENDERERS = {renderer.format: renderer for renderer in (NDJSONRenderer, CSVRenderer)}
+
+
+class Command(BaseCommand):
+    help = 'Stream all events as NDJSON or CSV to stdout or a file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(RENDERERS), default=NDJSONRenderer.format)
+        parser.add_argument('--attendees', action='store_true', help='Include the attendee ids of each event.')
+        parser.add_argument('--chunk-size', type=int, help='Rows fetched per query (EVENT_EXPORT_CHUNK_SIZE by default).')
+        parser.add_argument('--output', help='Write to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        renderer = RENDERERS[options['format']]()
+        chunks = export_chunks(Event.objects.all(), options['attendees'], options['chunk_size'])
+        lines = renderer.stream(chunks, export_fields(options['attendees']))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(lines)
+        else:
+            for text in lines:
+                self.stdout.write(text, ending='')
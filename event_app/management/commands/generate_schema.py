@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from event_app import schema
+
+
+class Command(BaseCommand):
+    help = 'Build the OpenAPI schema artifact served by /swagger.json (SCHEMA_ARTIFACT_PATH by default).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Write the schema to this file instead.')
+        parser.add_argument('--check', action='store_true',
+                            help='Only check that the artifact matches the current code; exit 1 if not.')
+
+    def handle(self, *args, **options):
+        path = options['output'] or settings.SCHEMA_ARTIFACT_PATH
+        code_fingerprint = schema.fingerprint()
+
+        if options['check']:
+            content = schema.read_artifact(path)
+            if content is None or not schema.is_current(content, code_fingerprint):
+                raise CommandError('%s is missing or out of date; run generate_schema.' % path)
+            self.stdout.write('%s is up to date.' % path)
+            return
+
+        schema.write_artifact(schema.generate(code_fingerprint), path)
+        self.stdout.write(self.style.SUCCESS('Wrote %s' % path))
@@ -0,0 +1,62 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from event_app.importer import READERS, Checkpoint, ImportRowError, import_events
+
+
+class Command(BaseCommand):
+    help = 'Import events and their attendees from an NDJSON or CSV file, resumably.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import.')
+        parser.add_argument('--format', choices=sorted(READERS),
+                            help='Input format (guessed from the file extension by default).')
+        parser.add_argument('--batch-size', type=int,
+                            help='Rows validated and written per transaction (EVENT_IMPORT_BATCH_SIZE by default).')
+        parser.add_argument('--checkpoint',
+                            help='Name the progress is saved under in the database (the absolute path by default).')
+        parser.add_argument('--resume', action='store_true', help='Continue after the rows in the checkpoint.')
+        parser.add_argument('--restart', action='store_true', help='Discard the checkpoint and import from the start.')
+        parser.add_argument('--skip-invalid', action='store_true',
+                            help='Report invalid rows and import the rest, instead of stopping at the first one.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if format not in READERS:
+            raise CommandError('Cannot tell the format of %s; pass --format.' % path)
+
+        checkpoint = Checkpoint(options['checkpoint'] or os.path.abspath(path))
+        if options['restart']:
+            checkpoint.delete()
+        elif checkpoint.exists():
+            if not options['resume']:
+                raise CommandError('%s has a checkpoint; pass --resume to continue that import, or --restart to start over.'
+                                   % checkpoint.name)
+            checkpoint.load()
+            if checkpoint.complete:
+                self.stdout.write('%s was already imported.' % path)
+                return
+            self.stdout.write('Resuming after row %d.' % checkpoint.rows)
+
+        def on_error(number, errors):
+            self.stderr.write('Skipped row %d: %s' % (number, json.dumps(errors)))
+
+        def on_batch(checkpoint, rate):
+            self.stdout.write('Imported %d rows: %d events, %d attendee links, %d invalid (%.0f rows/s).' % (
+                checkpoint.rows, checkpoint.events, checkpoint.links, checkpoint.invalid, rate,
+            ))
+
+        with open(path, encoding='utf-8', newline='') as lines:
+            try:
+                import_events(lines, format, checkpoint, options['batch_size'], options['skip_invalid'],
+                              on_error, on_batch)
+            except ImportRowError as error:
+                raise CommandError('%s Nothing after row %d was imported; fix the row and run again with --resume.'
+                                   % (error, checkpoint.rows))
+
+        self.stdout.write(self.style.SUCCESS('Imported %d events and %d attendee links from %d rows (%d invalid).' % (
+            checkpoint.events, checkpoint.links, checkpoint.rows, checkpoint.invalid,
+        )))
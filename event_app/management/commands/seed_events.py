@@ -0,0 +1,104 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from event_app.models import Event
+
+TYPES = ['Concert', 'Conference', 'Workshop', 'Meetup', 'Festival', 'Lecture', 'Sports', 'Exhibition']
+STATUSES = ['Scheduled', 'Scheduled', 'Scheduled', 'Postponed', 'Cancelled']
+ADJECTIVES = ['Annual', 'Open', 'Community', 'Late-night', 'Summer', 'Winter', 'Regional', 'Beginner', 'Charity']
+TOPICS = ['jazz', 'rock', 'python', 'django', 'design', 'startup', 'poetry', 'chess', 'yoga', 'salsa', 'opera',
+          'photography', 'cooking', 'robotics', 'gardening', 'marathon', 'film', 'theatre', 'data', 'cycling']
+VENUES = ['the town hall', 'the riverside park', 'the old library', 'the main square', 'the university campus',
+          'the harbour warehouse', 'the community centre', 'the art gallery']
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic users, events and attendee links for load testing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--events', type=int, default=10000)
+        parser.add_argument('--attendees', type=int, default=10, help='Average attendees per event.')
+        parser.add_argument('--past', type=float, default=0.2, help='Fraction of events in the past.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--password', default='password', help='Password of every generated user.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+
+        user_ids = self.create_users(options['users'], options['password'], batch_size)
+        self.stdout.write('Created %d users.' % len(user_ids))
+
+        created = links = 0
+        while created < options['events']:
+            count = min(batch_size, options['events'] - created)
+            events, attendees = self.build_events(rng, count, user_ids, options['attendees'], options['past'])
+            with transaction.atomic():
+                events = Event.objects.bulk_create(events)
+                Event.attendees.through.objects.bulk_create([
+                    Event.attendees.through(event_id=event.pk, user_id=user_id)
+                    for event, event_attendees in zip(events, attendees) for user_id in event_attendees
+                ], batch_size=batch_size)
+            created += count
+            links += sum(len(event_attendees) for event_attendees in attendees)
+            self.stdout.write('Created %d/%d events, %d attendee links.' % (created, options['events'], links))
+
+        self.stdout.write(self.style.SUCCESS(
+            'Seeded %d users, %d events and %d attendee links.' % (len(user_ids), created, links)
+        ))
+
+    def create_users(self, count, password, batch_size):
+        """
+            Create `count` users sharing one password hash, numbered after any
+            users created by earlier runs, and return their ids.
+        """
+        start = User.objects.filter(username__startswith='seed-').count()
+        password = make_password(password)
+        user_ids = []
+        for offset in range(start, start + count, batch_size):
+            users = User.objects.bulk_create([
+                User(username='seed-%07d' % i, password=password, email='seed-%07d@example.com' % i)
+                for i in range(offset, min(offset + batch_size, start + count))
+            ])
+            user_ids.extend(user.pk for user in users)
+        return user_ids
+
+    def build_events(self, rng, count, user_ids, attendees, past):
+        """
+            Return `count` unsaved events and, for each, the ids of its attendees.
+        """
+        now = timezone.now()
+        events = []
+        attendee_ids = []
+        for _ in range(count):
+            topic = rng.choice(TOPICS)
+            event_type = rng.choice(TYPES)
+            capacity = rng.choice([10, 20, 50, 100, 200, 500])
+            if rng.random() < past:
+                date = now - timedelta(minutes=rng.randrange(1, 180 * 24 * 60))
+            else:
+                date = now + timedelta(minutes=rng.randrange(1, 365 * 24 * 60))
+            registered = min(capacity, len(user_ids), int(rng.expovariate(1 / attendees)) if attendees else 0)
+            events.append(Event(
+                creator_id=rng.choice(user_ids),
+                title='%s %s %s' % (rng.choice(ADJECTIVES), topic, event_type.lower()),
+                description='A %s about %s at %s. %s' % (
+                    event_type.lower(), topic, rng.choice(VENUES),
+                    ' '.join(rng.sample(TOPICS, 5)),
+                ),
+                date=date,
+                type=event_type,
+                status=rng.choice(STATUSES),
+                capacity=capacity,
+                registered_count=registered,
+            ))
+            attendee_ids.append(rng.sample(user_ids, registered))
+        return events, attendee_ids
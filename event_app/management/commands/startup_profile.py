@@ -0,0 +1,115 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from event_app.management.commands.bench_api import git_revision
+
+MiB = 1024 * 1024
+
+
+def median_profile(runs):
+    """
+        Merge profiles of several runs, taking the median of every figure.
+        Modules missing from some runs count as costing nothing in them.
+    """
+    modules = defaultdict(lambda: defaultdict(list))
+    for run in runs:
+        for entry in run['modules']:
+            for key in ('seconds', 'self_seconds', 'rss', 'self_rss'):
+                modules[entry['module']][key].append(entry[key])
+    merged = []
+    for name, figures in modules.items():
+        entry = {'module': name}
+        for key, values in figures.items():
+            entry[key] = statistics.median(values + [0] * (len(runs) - len(values)))
+        merged.append(entry)
+    return {
+        'module': runs[0]['module'],
+        'seconds': statistics.median(run['seconds'] for run in runs),
+        'rss': statistics.median(run['rss'] for run in runs),
+        'rss_total': statistics.median(run['rss_total'] for run in runs),
+        'modules': merged,
+    }
+
+
+def by_package(modules):
+    packages = defaultdict(lambda: {'self_seconds': 0.0, 'self_rss': 0, 'count': 0})
+    for entry in modules:
+        package = packages[entry['module'].split('.')[0]]
+        package['self_seconds'] += entry['self_seconds']
+        package['self_rss'] += entry['self_rss']
+        package['count'] += 1
+    return [dict(package, module=name) for name, package in packages.items()]
+
+
+class Command(BaseCommand):
+    help = 'Profile a cold worker start: import time and resident memory per module, in fresh interpreters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default=settings.WSGI_APPLICATION.rsplit('.', 1)[0],
+                            help='Module the server imports, e.g. event_manager.asgi '
+                                 '(the WSGI_APPLICATION module by default).')
+        parser.add_argument('--repeat', type=int, default=3, help='Fresh starts to take the median of.')
+        parser.add_argument('--by', choices=['module', 'package'], default='module',
+                            help='Report modules, or top-level packages with the self cost of their modules summed.')
+        parser.add_argument('--sort', choices=['time', 'rss'], default='time')
+        parser.add_argument('--limit', type=int, default=30, help='Rows to print.')
+        parser.add_argument('--output', help='Also save the full profile as JSON, to compare with later runs.')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1.')
+        runs = [self.run(options['module']) for _ in range(options['repeat'])]
+        result = median_profile(runs)
+
+        self.stdout.write('Cold start of %s (median of %d): %.1fms, +%.1f MiB (%.1f MiB resident), %d modules\n' % (
+            result['module'], len(runs), result['seconds'] * 1000, result['rss'] / MiB,
+            result['rss_total'] / MiB, len(result['modules']),
+        ))
+        if options['by'] == 'package':
+            rows = by_package(result['modules'])
+            key = 'self_seconds' if options['sort'] == 'time' else 'self_rss'
+            self.stdout.write('%-50s %10s %10s %8s' % ('package', 'self ms', 'self KiB', 'modules'))
+            for row in sorted(rows, key=lambda row: row[key], reverse=True)[:options['limit']]:
+                self.stdout.write('%-50s %10.1f %10.0f %8d' % (
+                    row['module'], row['self_seconds'] * 1000, row['self_rss'] / 1024, row['count'],
+                ))
+        else:
+            key = 'seconds' if options['sort'] == 'time' else 'rss'
+            self.stdout.write('%-50s %10s %10s %10s %10s' % ('module', 'ms', 'self ms', 'KiB', 'self KiB'))
+            for row in sorted(result['modules'], key=lambda row: row[key], reverse=True)[:options['limit']]:
+                self.stdout.write('%-50s %10.1f %10.1f %10.0f %10.0f' % (
+                    row['module'], row['seconds'] * 1000, row['self_seconds'] * 1000,
+                    row['rss'] / 1024, row['self_rss'] / 1024,
+                ))
+
+        if options['output']:
+            output = Path(options['output'])
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_text(json.dumps(dict(
+                result, timestamp=timezone.now().isoformat(), revision=git_revision(),
+                python=sys.version.split()[0], api_docs=settings.API_DOCS,
+            ), indent=2) + '\n')
+            self.stdout.write(self.style.SUCCESS('Wrote %s' % output))
+
+    def run(self, module):
+        """
+            Profile one start of `module` in a new interpreter (see event_app.startup).
+        """
+        env = dict(os.environ)
+        if settings.SETTINGS_MODULE:
+            # Unset under override_settings, where the inherited variable still applies.
+            env['DJANGO_SETTINGS_MODULE'] = settings.SETTINGS_MODULE
+        process = subprocess.run([sys.executable, '-m', 'event_app.startup', module], cwd=settings.BASE_DIR,
+                                 env=env, capture_output=True, text=True)
+        if process.returncode:
+            raise CommandError('Starting %s failed:\n%s' % (module, process.stderr[-2000:]))
+        return json.loads(process.stdout)
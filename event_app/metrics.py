@@ -0,0 +1,211 @@
+"""
+Per-endpoint request metrics in Prometheus text format.
+
+MetricsMiddleware records, for every request and labelled by the resolved URL
+name, its latency, SQL query count and SQL time, and response size. SQL is
+measured by an execute wrapper installed on every database connection, which
+reports to the request being served through a context variable, so queries run
+from async views (in a worker thread) are counted too.
+
+The registry lives in process memory: each worker exposes its own counters on
+/metrics, as a Prometheus client library would without a multiprocess setup.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger('event_app.slow_requests')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """
+        A Prometheus histogram with one series per label set.
+    """
+    def __init__(self, name, help, labels, buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        yield '# HELP %s %s' % (self.name, self.help)
+        yield '# TYPE %s histogram' % self.name
+        for labels, (counts, total, count) in sorted(self.series.items()):
+            label_text = format_labels(zip(self.labels, labels))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield '%s_bucket{%s,le="%s"} %d' % (self.name, label_text, bound, cumulative)
+            yield '%s_bucket{%s,le="+Inf"} %d' % (self.name, label_text, count)
+            yield '%s_sum{%s} %s' % (self.name, label_text, repr(float(total)))
+            yield '%s_count{%s} %d' % (self.name, label_text, count)
+
+
+class Counter:
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.series = {}
+
+    def inc(self, labels, value=1):
+        self.series[labels] = self.series.get(labels, 0) + value
+
+    def render(self):
+        yield '# HELP %s %s' % (self.name, self.help)
+        yield '# TYPE %s counter' % self.name
+        for labels, value in sorted(self.series.items()):
+            yield '%s{%s} %s' % (self.name, format_labels(zip(self.labels, labels)), value)
+
+
+def format_labels(pairs):
+    return ','.join('%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"')) for name, value in pairs)
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        labels = ('view', 'method')
+        self.latency = Histogram('http_request_duration_seconds', 'Request latency.',
+                                 labels + ('status',), LATENCY_BUCKETS)
+        self.queries = Histogram('http_request_sql_queries', 'SQL queries per request.', labels, QUERY_BUCKETS)
+        self.sql_seconds = Counter('http_request_sql_duration_seconds_total', 'Time spent in SQL.', labels)
+        self.size = Histogram('http_response_size_bytes', 'Response body size (not streamed responses).',
+                              labels, SIZE_BUCKETS)
+
+    def record(self, view, method, status, seconds, stats, size):
+        labels = (view, method)
+        with self.lock:
+            self.latency.observe(labels + (str(status),), seconds)
+            self.queries.observe(labels, stats.count)
+            self.sql_seconds.inc(labels, stats.seconds)
+            if size is not None:
+                self.size.observe(labels, size)
+
+    def render(self, extra=()):
+        with self.lock:
+            lines = [line for metric in (self.latency, self.queries, self.sql_seconds, self.size)
+                     for line in metric.render()]
+        lines.extend(extra)
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self.lock:
+            self.clear()
+
+
+registry = Registry()
+
+
+class QueryStats:
+    __slots__ = ('count', 'seconds', 'queries')
+
+    def __init__(self, capture_sql=False):
+        self.count = 0
+        self.seconds = 0.0
+        self.queries = [] if capture_sql else None
+
+
+_current_stats = ContextVar('event_app_query_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+        Database execute wrapper that times each query for the request being served.
+    """
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        stats.count += 1
+        stats.seconds += duration
+        if stats.queries is not None:
+            stats.queries.append((duration, sql))
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """
+        connection_created receiver that adds `record_query` to the connection once.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class MetricsMiddleware:
+    """
+        Record latency, SQL and response size per resolved URL name. Requests
+        slower than METRICS_SLOW_REQUEST_SECONDS are logged with their SQL.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        self.finish(request, response, stats, start)
+        return response
+
+    async def __acall__(self, request):
+        stats, token, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        self.finish(request, response, stats, start)
+        return response
+
+    def start(self):
+        stats = QueryStats(capture_sql=settings.METRICS_SLOW_REQUEST_SECONDS is not None)
+        return stats, _current_stats.set(stats), time.perf_counter()
+
+    def finish(self, request, response, stats, start):
+        seconds = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.url_name if match is not None and match.url_name else 'unmatched'
+        size = None if response.streaming else len(response.content)
+        registry.record(view, request.method, response.status_code, seconds, stats, size)
+
+        slow_seconds = settings.METRICS_SLOW_REQUEST_SECONDS
+        if slow_seconds is not None and seconds >= slow_seconds:
+            logger.warning(
+                'Slow request: %s %s (%s) took %.3fs with %d queries in %.3fs\n%s',
+                request.method, request.get_full_path(), view, seconds, stats.count, stats.seconds,
+                '\n'.join('  %.3fs %s' % query for query in stats.queries),
+            )
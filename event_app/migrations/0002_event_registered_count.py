@@ -0,0 +1,36 @@
+# Generated by Django 4.2.3 on 2026-10-18 05:46
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_registered_count(apps, schema_editor):
+    Event = apps.get_model('event_app', 'Event')
+    counts = Event.attendees.through.objects.filter(
+        event_id=OuterRef('pk')
+    ).order_by().values('event_id').annotate(count=Count('*')).values('count')
+    Event.objects.update(registered_count=Coalesce(Subquery(counts), Value(0)))
+    # Events oversold before seats were claimed atomically keep their attendees;
+    # lift their capacity so the new check constraint holds.
+    Event.objects.filter(registered_count__gt=F('capacity')).update(capacity=F('registered_count'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='registered_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_registered_count, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='event',
+            constraint=models.CheckConstraint(check=models.Q(('registered_count__lte', models.F('capacity'))), name='event_registered_count_lte_capacity'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.3 on 2026-10-18 06:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+import event_app.search
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        event_app.search.create_index(schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        event_app.search.drop_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_app', '0003_event_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventSearch',
+            fields=[
+                ('event', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search', serialize=False, to='event_app.event')),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('document', event_app.search.DocumentField(db_column='event_app_event_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'event_app_event_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.3 on 2026-10-18 06:50
+
+from django.db import migrations, models
+import django.utils.timezone
+import event_app.search
+
+
+def reinstall_search_index(apps, schema_editor):
+    # Adding the columns remakes event_app_event on SQLite, dropping the search triggers.
+    if schema_editor.connection.vendor == 'sqlite':
+        event_app.search.reinstall_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_app', '0004_event_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, reinstall_search_index),
+        migrations.AddField(
+            model_name='event',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['updated_at', 'id'], name='event_updated_id_idx'),
+        ),
+        migrations.CreateModel(
+            name='EventTombstone',
+            fields=[
+                ('id', models.BigIntegerField(help_text='Id of the deleted event.', primary_key=True, serialize=False)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_id_idx')],
+            },
+        ),
+        migrations.RunPython(reinstall_search_index, migrations.RunPython.noop),
+    ]
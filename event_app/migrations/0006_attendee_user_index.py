@@ -0,0 +1,22 @@
+# Generated by Django 4.2.3 on 2026-10-18 07:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+        Index the attendees through table by (user_id, event_id), so a user's
+        registrations are read from the index alone. The through table is
+        auto-created, so the index cannot be declared on a model.
+    """
+
+    dependencies = [
+        ('event_app', '0005_event_changes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX event_attendee_user_event_idx ON event_app_event_attendees (user_id, event_id)',
+            'DROP INDEX event_attendee_user_event_idx',
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.3 on 2026-10-18 07:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('event_app', '0006_attendee_user_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAttendee',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedEvent',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('date', models.DateTimeField()),
+                ('type', models.CharField(max_length=100)),
+                ('status', models.CharField(max_length=100)),
+                ('capacity', models.IntegerField()),
+                ('registered_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('attendees', models.ManyToManyField(blank=True, related_name='attended', through='event_app.ArchivedAttendee', to=settings.AUTH_USER_MODEL)),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_events', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='archivedattendee',
+            name='event',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='event_app.archivedevent'),
+        ),
+        migrations.AddField(
+            model_name='archivedattendee',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='archivedevent',
+            index=models.Index(fields=['date', 'id'], name='archived_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedevent',
+            index=models.Index(fields=['creator', 'date', 'id'], name='archived_creator_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedattendee',
+            index=models.Index(fields=['user', 'event'], name='archived_attendee_user_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='archivedattendee',
+            constraint=models.UniqueConstraint(fields=('event', 'user'), name='archived_attendee_unique'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.3 on 2026-10-18 08:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_app', '0007_archived_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Usually the absolute path of the input file.', max_length=1024, unique=True)),
+                ('rows', models.PositiveIntegerField(default=0, help_text='Input rows consumed.')),
+                ('events', models.PositiveIntegerField(default=0)),
+                ('links', models.PositiveIntegerField(default=0, help_text='Attendee links created.')),
+                ('invalid', models.PositiveIntegerField(default=0, help_text='Invalid rows skipped.')),
+                ('complete', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
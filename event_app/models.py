@@ -1,5 +1,337 @@
-from django.db import models
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, models, transaction, IntegrityError
+from django.db.models import Count, F, OuterRef, Prefetch, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from django.dispatch import Signal
+from django.utils import timezone
+
+from event_app.search import FTS_TABLE, DocumentField, match_expression
+
+# Sent by EventQuerySet writes that bypass the model signals (update,
+# bulk_create, bulk_update) with the affected `event_ids`, or None when the
+# set of rows is not known without another query.
+events_changed = Signal()
+
+# Sent with `event_ids` and `using` when registrations change the seat counts of
+# those events. May be sent inside a transaction; receivers should wait for the
+# commit.
+seats_changed = Signal()
+
+
+class RegistrationStatus(models.TextChoices):
+    REGISTERED = 'registered'
+    UNREGISTERED = 'unregistered'
+    ALREADY_REGISTERED = 'already_registered'
+    NOT_REGISTERED = 'not_registered'
+    FULL = 'full'
+    PAST = 'past'
+    NOT_FOUND = 'not_found'
+
+
+class _BatchConflict(Exception):
+    """
+        Raised inside a batch transaction to roll it back when another request
+        changed one of the rows after eligibility was checked.
+    """
+
+
+class EventQuerySet(models.QuerySet):
+    # Every write path stamps `updated_at`, so the change feed sees it: updates
+    # and bulk updates here, save() through auto_now. Registrations and the
+    # attendee counts refreshed on m2m_changed are all UPDATEs.
+    def update(self, **kwargs):
+        kwargs.setdefault('updated_at', timezone.now())
+        rows = super().update(**kwargs)
+        if rows:
+            events_changed.send(sender=Event, event_ids=None)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if objs:
+            events_changed.send(sender=Event, event_ids=[obj.pk for obj in objs])
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        now = timezone.now()
+        for obj in objs:
+            obj.updated_at = now
+        rows = super().bulk_update(objs, [*fields, 'updated_at'], *args, **kwargs)
+        if rows:
+            events_changed.send(sender=Event, event_ids=[obj.pk for obj in objs])
+        return rows
+
+    def with_attendees(self):
+        """
+            Fetch attendee ids for all events in one extra query, so serializing
+            a page does not query the through table per event.
+        """
+        return self.prefetch_related(
+            Prefetch('attendees', queryset=User.objects.only('id'))
+        )
+
+    def search(self, text):
+        """
+            Events matching every word of `text` in their title or description,
+            annotated with their bm25 `rank` (lower is better). Falls back to an
+            unranked icontains scan on databases without FTS5.
+        """
+        expression = match_expression(text)
+        unranked = Value(0.0, output_field=models.FloatField())
+        if expression is None:
+            return self.none().annotate(rank=unranked)
+        if connections[self.db].vendor != 'sqlite':
+            condition = Q()
+            for word in text.split():
+                condition &= Q(title__icontains=word) | Q(description__icontains=word)
+            return self.filter(condition).annotate(rank=unranked)
+        # bm25 scores every match it ranks, which for a common word is most of
+        # the table. Rank only the newest EVENT_SEARCH_MAX_CANDIDATES matches,
+        # which FTS5 finds from its index without scoring them.
+        candidates = EventSearch.objects.using(self.db).filter(
+            document__match=expression,
+        ).order_by('-pk').values('pk')[:settings.EVENT_SEARCH_MAX_CANDIDATES]
+        return self.filter(
+            pk__in=candidates, search__document__match=expression,
+        ).annotate(rank=F('search__rank'))
+
+    def search_truncated(self, text):
+        """
+            Whether `search(text)` left matches out: more than
+            settings.EVENT_SEARCH_MAX_CANDIDATES events match, and only the
+            newest of them are ranked.
+        """
+        expression = match_expression(text)
+        if expression is None or connections[self.db].vendor != 'sqlite':
+            return False
+        return EventSearch.objects.using(self.db).filter(
+            document__match=expression,
+        )[settings.EVENT_SEARCH_MAX_CANDIDATES:].exists()
+
+    def refresh_registered_count(self):
+        """
+            Recompute `registered_count` from the through table for every event
+            in the queryset, in a single UPDATE.
+        """
+        counts = Event.attendees.through.objects.filter(
+            event_id=OuterRef('pk')
+        ).order_by().values('event_id').annotate(count=Count('*')).values('count')
+        return self.update(registered_count=Coalesce(Subquery(counts), Value(0)))
+
+    def register(self, event_id, user):
+        """
+            Claim a seat on an event for `user` and return a RegistrationStatus.
+
+            The seat is taken by a conditional UPDATE that only matches a future
+            event with room left, so concurrent registrations can never oversell:
+            the database serializes the updates and the check constraint on
+            `registered_count` backs it up.
+        """
+        try:
+            with transaction.atomic(using=self.db):
+                claimed = self.filter(
+                    pk=event_id, date__gte=timezone.now(), registered_count__lt=F('capacity')
+                ).update(registered_count=F('registered_count') + 1)
+                if not claimed:
+                    return self._rejection(event_id)
+                Event.attendees.through.objects.using(self.db).create(event_id=event_id, user_id=user.pk)
+        except IntegrityError:
+            # The (event, user) row already exists; the seat claim is rolled back.
+            return RegistrationStatus.ALREADY_REGISTERED
+        seats_changed.send(sender=Event, event_ids=[event_id], using=self.db)
+        return RegistrationStatus.REGISTERED
+
+    def unregister(self, event_id, user):
+        """
+            Release the seat `user` holds on a future event and return a
+            RegistrationStatus.
+        """
+        through = Event.attendees.through
+        with transaction.atomic(using=self.db):
+            released, _ = through.objects.using(self.db).filter(
+                event_id=event_id, user_id=user.pk, event__date__gte=timezone.now()
+            ).delete()
+            if released:
+                self.filter(pk=event_id).update(registered_count=F('registered_count') - 1)
+                seats_changed.send(sender=Event, event_ids=[event_id], using=self.db)
+                return RegistrationStatus.UNREGISTERED
+        rejection = self._rejection(event_id)
+        if rejection == RegistrationStatus.FULL:
+            return RegistrationStatus.NOT_REGISTERED
+        return rejection
+
+    async def aregister(self, event_id, user):
+        """
+            Async variant of `register`.
+
+            The async ORM cannot open a transaction, so the seat claim, the
+            through row and the rejection lookup run as `register` in Django's
+            sync thread, where they commit or roll back together.
+        """
+        return await sync_to_async(self.register)(event_id, user)
+
+    async def aunregister(self, event_id, user):
+        """
+            Async variant of `unregister`, run in Django's sync thread for the
+            same reason as `aregister`.
+        """
+        return await sync_to_async(self.unregister)(event_id, user)
+
+    def register_many(self, event_ids, user):
+        """
+            Register `user` for several events at once and return a dict mapping
+            each event id to a RegistrationStatus.
+
+            Eligibility is decided for the whole batch with two SELECTs, then all
+            seats are claimed with one conditional UPDATE and the through rows are
+            written with one bulk INSERT. If a concurrent request takes a seat in
+            between, the batch is rolled back and falls back to `register()` per
+            event, which is still race-free.
+        """
+        through = Event.attendees.through
+        event_ids = list(dict.fromkeys(event_ids))
+        events = self._batch_state(event_ids)
+        registered = set(through.objects.using(self.db).filter(
+            user_id=user.pk, event_id__in=event_ids
+        ).values_list('event_id', flat=True))
+
+        results = {}
+        eligible = []
+        for event_id in event_ids:
+            event = events.get(event_id)
+            if event is None:
+                results[event_id] = RegistrationStatus.NOT_FOUND
+            elif event['past']:
+                results[event_id] = RegistrationStatus.PAST
+            elif event_id in registered:
+                results[event_id] = RegistrationStatus.ALREADY_REGISTERED
+            elif event['registered_count'] >= event['capacity']:
+                results[event_id] = RegistrationStatus.FULL
+            else:
+                eligible.append(event_id)
+        if not eligible:
+            return results
+
+        try:
+            with transaction.atomic(using=self.db):
+                claimed = self.filter(
+                    pk__in=eligible, date__gte=timezone.now(), registered_count__lt=F('capacity')
+                ).update(registered_count=F('registered_count') + 1)
+                if claimed != len(eligible):
+                    raise _BatchConflict
+                through.objects.using(self.db).bulk_create([
+                    through(event_id=event_id, user_id=user.pk) for event_id in eligible
+                ])
+        except (_BatchConflict, IntegrityError):
+            for event_id in eligible:
+                results[event_id] = self.register(event_id, user)
+            return results
+
+        seats_changed.send(sender=Event, event_ids=eligible, using=self.db)
+        for event_id in eligible:
+            results[event_id] = RegistrationStatus.REGISTERED
+        return results
+
+    def unregister_many(self, event_ids, user):
+        """
+            Release the seats `user` holds on several events and return a dict
+            mapping each event id to a RegistrationStatus.
+        """
+        through = Event.attendees.through
+        event_ids = list(dict.fromkeys(event_ids))
+        events = self._batch_state(event_ids)
+
+        results = {}
+        future = []
+        for event_id in event_ids:
+            event = events.get(event_id)
+            if event is None:
+                results[event_id] = RegistrationStatus.NOT_FOUND
+            elif event['past']:
+                results[event_id] = RegistrationStatus.PAST
+            else:
+                future.append(event_id)
+        if not future:
+            return results
+
+        try:
+            with transaction.atomic(using=self.db):
+                rows = through.objects.using(self.db).filter(user_id=user.pk, event_id__in=future)
+                held = set(rows.values_list('event_id', flat=True))
+                if held:
+                    released, _ = rows.delete()
+                    if released != len(held):
+                        raise _BatchConflict
+                    self.filter(pk__in=held).update(registered_count=F('registered_count') - 1)
+                    seats_changed.send(sender=Event, event_ids=list(held), using=self.db)
+        except _BatchConflict:
+            for event_id in future:
+                results[event_id] = self.unregister(event_id, user)
+            return results
+
+        for event_id in future:
+            results[event_id] = (
+                RegistrationStatus.UNREGISTERED if event_id in held else RegistrationStatus.NOT_REGISTERED
+            )
+        return results
+
+    def _batch_state(self, event_ids):
+        now = timezone.now()
+        return {
+            event['id']: dict(event, past=event['date'] < now)
+            for event in self.filter(pk__in=event_ids).values('id', 'date', 'capacity', 'registered_count')
+        }
+
+    def archive(self):
+        """
+            Move the events of the queryset, with their attendee links, to
+            ArchivedEvent in one transaction and return how many events and
+            links moved. Deleting the events leaves the usual tombstones, so
+            change feed clients drop them, and prunes the expired ones.
+        """
+        through = Event.attendees.through
+        archived_through = ArchivedEvent.attendees.through
+        fields = [field.attname for field in ArchivedEvent._meta.concrete_fields if field.name != 'archived_at']
+        with transaction.atomic(using=self.db):
+            events = list(self.values(*fields))
+            event_ids = [event['id'] for event in events]
+            links = list(through.objects.using(self.db).filter(event_id__in=event_ids).values_list('event_id', 'user_id'))
+            ArchivedEvent.objects.using(self.db).bulk_create([ArchivedEvent(**event) for event in events])
+            archived_through.objects.using(self.db).bulk_create([
+                archived_through(event_id=event_id, user_id=user_id) for event_id, user_id in links
+            ])
+            # Deleted without the per-event signals: the tombstones, their
+            # pruning and the listing invalidation are done once for the batch.
+            through.objects.using(self.db).filter(event_id__in=event_ids).delete()
+            Event.objects.using(self.db).filter(pk__in=event_ids)._raw_delete(self.db)
+            EventTombstone.objects.using(self.db).record(event_ids)
+            EventTombstone.objects.using(self.db).prune()
+            if event_ids:
+                events_changed.send(sender=Event, event_ids=event_ids)
+        return len(event_ids), len(links)
+
+    def _rejection(self, event_id):
+        event = self._seat_state(event_id).first()
+        if event is None and ArchivedEvent.objects.using(self.db).filter(pk=event_id).exists():
+            return RegistrationStatus.PAST
+        return self._rejection_for(event)
+
+    def _seat_state(self, event_id):
+        return self.filter(pk=event_id).values('date', 'capacity', 'registered_count')
+
+    @staticmethod
+    def _rejection_for(event):
+        if event is None:
+            return RegistrationStatus.NOT_FOUND
+        if event['date'] < timezone.now():
+            return RegistrationStatus.PAST
+        if event['registered_count'] >= event['capacity']:
+            return RegistrationStatus.FULL
+        return RegistrationStatus.NOT_REGISTERED
 
 
 class Event(models.Model):
@@ -11,3 +343,155 @@ class Event(models.Model):
     status = models.CharField(max_length=100)
     capacity = models.IntegerField()
     attendees = models.ManyToManyField(User, related_name='attending', blank=True)
+    # Denormalized number of attendees, only ever changed by conditional
+    # UPDATEs (see EventQuerySet.register) so it stays exact under concurrency.
+    registered_count = models.PositiveIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = EventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination order, optionally narrowed by one equality filter.
+            models.Index(fields=['date', 'id'], name='event_date_id_idx'),
+            models.Index(fields=['type', 'date', 'id'], name='event_type_date_idx'),
+            models.Index(fields=['status', 'date', 'id'], name='event_status_date_idx'),
+            models.Index(fields=['creator', 'date', 'id'], name='event_creator_date_idx'),
+            # Change feed order.
+            models.Index(fields=['updated_at', 'id'], name='event_updated_id_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=Q(registered_count__lte=F('capacity')),
+                name='event_registered_count_lte_capacity',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Never write back a registered_count read before a concurrent registration.
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'registered_count'
+            ]
+        elif kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'updated_at'}
+        super().save(*args, **kwargs)
+
+
+class ArchivedEvent(models.Model):
+    """
+        A past event moved out of Event, with its attendees, by the
+        archive_events command (see EventQuerySet.archive). It keeps the id it
+        had as an Event. Nothing changes archived events: past events cannot be
+        registered for.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    creator = models.ForeignKey(User, related_name='archived_events', on_delete=models.CASCADE)
+    title = models.CharField(max_length=255)
+    description = models.TextField()
+    date = models.DateTimeField()
+    type = models.CharField(max_length=100)
+    status = models.CharField(max_length=100)
+    capacity = models.IntegerField()
+    attendees = models.ManyToManyField(User, related_name='attended', blank=True, through='ArchivedAttendee')
+    registered_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date', 'id'], name='archived_date_id_idx'),
+            models.Index(fields=['creator', 'date', 'id'], name='archived_creator_date_idx'),
+        ]
+
+
+class ArchivedAttendee(models.Model):
+    """
+        The attendee links of archived events, shaped like Event's through
+        table (`event_id`, `user_id`) so the same queries work on both.
+    """
+    event = models.ForeignKey(ArchivedEvent, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'user'], name='archived_attendee_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'event'], name='archived_attendee_user_idx'),
+        ]
+
+
+class EventTombstoneQuerySet(models.QuerySet):
+    def record(self, event_ids):
+        """
+            Leave tombstones for the deleted events `event_ids`, with one upsert
+            rather than update_or_create's SELECT, savepoint and INSERT each.
+        """
+        now = timezone.now()
+        return self.bulk_create(
+            [EventTombstone(id=event_id, deleted_at=now) for event_id in event_ids],
+            update_conflicts=True, unique_fields=['id'], update_fields=['deleted_at'],
+        )
+
+    def prune(self):
+        """
+            Drop the tombstones older than settings.EVENT_TOMBSTONE_RETENTION_DAYS.
+        """
+        return self.filter(
+            deleted_at__lt=timezone.now() - timedelta(days=settings.EVENT_TOMBSTONE_RETENTION_DAYS)
+        ).delete()
+
+
+class EventTombstone(models.Model):
+    """
+        Left behind when an event is deleted, so the change feed can tell
+        clients to drop it. Kept for settings.EVENT_TOMBSTONE_RETENTION_DAYS,
+        pruned by archive_events.
+    """
+    id = models.BigIntegerField(primary_key=True, help_text='Id of the deleted event.')
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    objects = EventTombstoneQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_id_idx'),
+        ]
+
+
+class ImportProgress(models.Model):
+    """
+        How far a resumable import (see event_app/importer.py) has got. Saved
+        in the transaction that writes each batch, so it always describes the
+        committed batches exactly.
+    """
+    name = models.CharField(max_length=1024, unique=True, help_text='Usually the absolute path of the input file.')
+    rows = models.PositiveIntegerField(default=0, help_text='Input rows consumed.')
+    events = models.PositiveIntegerField(default=0)
+    links = models.PositiveIntegerField(default=0, help_text='Attendee links created.')
+    invalid = models.PositiveIntegerField(default=0, help_text='Invalid rows skipped.')
+    complete = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class EventSearch(models.Model):
+    """
+        Read-only view of the FTS5 index over Event.title and Event.description,
+        maintained by triggers (see event_app/search.py).
+    """
+    event = models.OneToOneField(
+        Event, primary_key=True, db_column='rowid', related_name='search',
+        on_delete=models.DO_NOTHING, db_constraint=False,
+    )
+    title = models.CharField(max_length=255)
+    description = models.TextField()
+    document = DocumentField(db_column=FTS_TABLE)
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = FTS_TABLE
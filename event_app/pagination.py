@@ -0,0 +1,318 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from datetime import timedelta
+from urllib import parse
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import exceptions, status
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from event_app.models import EventTombstone
+
+
+class KeysetPagination(CursorPagination):
+    """
+        Cursor pagination that seeks on the full ordering tuple.
+
+        DRF's CursorPagination only seeks on the first ordering field and falls
+        back to an OFFSET for rows that share it. Here the cursor carries the
+        value of every ordering field of the boundary row, so each page is a
+        single indexed range scan no matter how deep the client has paged.
+        The ordering must end on a unique field (usually 'id').
+    """
+    ordering = ('date', 'id')
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.prepare(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.get_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+            Async variant of `paginate_queryset` for views using the async ORM.
+        """
+        queryset = self.prepare(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.get_page([row async for row in queryset])
+
+    def prepare(self, queryset, request, view=None):
+        """
+            Read the page size and cursor from `request` and return the sliced
+            queryset for the page (plus one row to detect the next page), or None
+            if pagination is disabled.
+        """
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        self.reverse, self.position = self.cursor if self.cursor is not None else (False, None)
+
+        queryset = self.get_page_queryset(queryset, self.position, self.reverse)
+        return queryset[:self.page_size + 1]
+
+    def get_page_queryset(self, queryset, position, reverse):
+        """
+            Return `queryset` ordered and filtered to the rows following
+            `position` (or preceding it when `reverse` is set).
+        """
+        ordering = self.ordering
+        if reverse:
+            ordering = [self._reverse(order) for order in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is None:
+            return queryset
+
+        fields = [order.lstrip('-') for order in ordering]
+        lookups = ['__lt' if order.startswith('-') else '__gt' for order in ordering]
+        values = [self._to_python(queryset, field, value) for field, value in zip(fields, position)]
+
+        # (a, b) > (x, y) is expanded to `a >= x AND (a > x OR (a = x AND b > y))`,
+        # the leading inclusive bound keeps the scan on the index prefix.
+        condition = Q()
+        equal = Q()
+        for field, lookup, value in zip(fields, lookups, values):
+            condition |= equal & Q(**{field + lookup: value})
+            equal &= Q(**{field: value})
+        leading = fields[0] + lookups[0] + 'e'
+        return queryset.filter(Q(**{leading: values[0]}) & condition)
+
+    def get_page(self, results):
+        """
+            Trim the `page_size + 1` rows fetched for the prepared queryset to a
+            page and work out which neighbouring pages exist.
+        """
+        has_more = len(results) > self.page_size
+        page = results[:self.page_size]
+        if self.reverse:
+            page.reverse()
+            self.has_next = self.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+        self.page = page
+        return page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor((False, self._get_position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Paged past the end: step back from the cursor we were given.
+            return self.encode_cursor((True, self.cursor[1]))
+        return self.encode_cursor((True, self._get_position(self.page[0])))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+            position = tokens['p']
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, position
+
+    def encode_cursor(self, cursor):
+        reverse, position = cursor
+        tokens = {'p': position}
+        if reverse:
+            tokens['r'] = '1'
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position(self, instance):
+        position = []
+        for order in self.ordering:
+            field_name = order.lstrip('-')
+            if isinstance(instance, dict):
+                attr = instance[field_name]
+            else:
+                attr = getattr(instance, field_name)
+            position.append(str(attr))
+        return position
+
+    def _to_python(self, queryset, field_name, value):
+        if field_name in queryset.query.annotations:
+            field = queryset.query.annotations[field_name].output_field
+        else:
+            field = queryset.model._meta.get_field(field_name)
+        try:
+            return field.to_python(value)
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def _reverse(order):
+        return order[1:] if order.startswith('-') else '-' + order
+
+
+class EventPagination(KeysetPagination):
+    """
+        Default pagination for event listings, ordered by (date, id).
+    """
+    ordering = ('date', 'id')
+
+
+class EventSearchPagination(KeysetPagination):
+    """
+        Pagination for event search results, best match first. Requires the
+        `rank` annotation added by EventQuerySet.search. Pages also say
+        whether the search was `truncated` (set by the view), i.e. whether
+        older matches were left out of the ranking.
+    """
+    ordering = ('rank', 'id')
+    truncated = False
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['truncated'] = self.truncated
+        return response
+
+
+class AttendeePagination(KeysetPagination):
+    """
+        Pagination for the attendees of an event over the through table, in
+        registration order.
+    """
+    ordering = ('id',)
+
+
+class CursorExpired(exceptions.APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'This cursor is older than the deleted events on record; sync from /allevents/ again.'
+    default_code = 'cursor_expired'
+
+
+class ChangeFeedPagination(KeysetPagination):
+    """
+        Forward-only pagination over everything changed after a cursor: events
+        in (updated_at, id) order, merged with the tombstones of deleted events.
+
+        A client starts with no cursor (everything) or `since=<timestamp>` and
+        then follows `next`, which is always set so it can be polled. On the
+        last page the cursor trails now by EVENT_CHANGES_OVERLAP_SECONDS, so a
+        change that committed late under an earlier timestamp is still picked
+        up; such recent changes may be sent twice. Cursors also record when
+        they were issued and expire with the tombstones they depend on; a
+        caught-up poll reissues its cursor once a day, so a client that keeps
+        polling never sees it expire.
+    """
+    ordering = ('updated_at', 'id')
+    since_query_param = 'since'
+    reissue_after = timedelta(days=1)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.issued = timezone.now()
+        self.position, issued = self.decode_position(request)
+        if issued < self.issued - timedelta(days=settings.EVENT_TOMBSTONE_RETENTION_DAYS):
+            raise CursorExpired
+
+        tombstones = EventTombstone.objects.using(queryset.db).annotate(updated_at=F('deleted_at'))
+        changes = [
+            (row.updated_at, row.pk, row)
+            for rows in (queryset, tombstones)
+            for row in self.get_page_queryset(rows, self.position, False)[:self.page_size + 1]
+        ]
+        changes.sort(key=lambda change: change[:2])
+
+        self.has_next = len(changes) > self.page_size
+        changes = changes[:self.page_size]
+        self.page = [row for _, _, row in changes if not isinstance(row, EventTombstone)]
+        self.deleted = [row.pk for _, _, row in changes if isinstance(row, EventTombstone)]
+        self.next_url = None
+        if changes:
+            self.position = [str(changes[-1][0]), str(changes[-1][1])]
+        elif self.cursor_query_param in request.query_params:
+            # Nothing new: hand back the same cursor, so the next poll is the
+            # same URL and can be answered by the listing cache, unless it is
+            # old enough to reissue at the same position.
+            if issued > self.issued - self.reissue_after:
+                self.next_url = self.base_url
+            return self.page
+        if not self.has_next:
+            horizon = self.issued - timedelta(seconds=settings.EVENT_CHANGES_OVERLAP_SECONDS)
+            if self.position is None or self._to_python(queryset, 'updated_at', self.position[0]) > horizon:
+                self.position = [str(horizon), '0']
+        return self.page
+
+    def decode_position(self, request):
+        """
+            Return the position to continue from and when it was issued, from
+            the cursor or the `since` timestamp.
+        """
+        since = request.query_params.get(self.since_query_param)
+        if since is not None and self.cursor_query_param not in request.query_params:
+            try:
+                value = parse_datetime(since)
+            except ValueError:
+                value = None
+            if value is None:
+                raise exceptions.ValidationError({self.since_query_param: 'Expected an ISO 8601 timestamp.'})
+            if timezone.is_naive(value):
+                value = timezone.make_aware(value)
+            return [str(value), '0'], value
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, self.issued
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            position = tokens['p']
+            issued = parse_datetime(tokens['t'][0])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if len(position) != len(self.ordering) or issued is None:
+            raise NotFound(self.invalid_cursor_message)
+        return position, issued
+
+    def get_next_link(self):
+        if self.next_url is not None:
+            return self.next_url
+        querystring = parse.urlencode({'p': self.position, 't': self.issued.isoformat()}, doseq=True)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        url = replace_query_param(self.base_url, self.cursor_query_param, encoded)
+        return remove_query_param(url, self.since_query_param)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('has_more', self.has_next),
+            ('results', data),
+            ('deleted', self.deleted),
+        ]))
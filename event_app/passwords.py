@@ -0,0 +1,180 @@
+"""
+Password hashing and verification off the request thread.
+
+PBKDF2 holds a core for tens of milliseconds per call. Hashing therefore runs
+on a dedicated pool of PASSWORD_HASHING_WORKERS threads (hashlib releases the
+GIL while it works), so a burst of logins uses at most that many cores and
+leaves the rest to event traffic, under WSGI and ASGI alike. At most
+PASSWORD_HASHING_QUEUE more calls wait for a worker; past that, callers get
+HashingBusy (a 503) straight away instead of piling up.
+
+Database access stays on the calling thread: only the hashing is handed to the
+pool.
+
+A login repeating credentials verified in the last
+AUTH_VERIFIED_CREDENTIAL_TIMEOUT seconds skips hashing: the cache holds a keyed
+digest of the username and password, tied to the user's current password hash
+so that changing the password invalidates it.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+VERIFIED_KEY = 'auth:verified:%s'
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Too many logins at once, try again shortly.')
+    default_code = 'hashing_busy'
+    # Sent as Retry-After by DRF's exception handler.
+    wait = 1
+
+
+class HashingPool:
+    """
+        A thread pool that refuses work instead of queueing without bound.
+    """
+    def __init__(self, workers, queue):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+        self.slots = threading.BoundedSemaphore(workers + queue)
+
+    def submit(self, func, *args):
+        if not self.slots.acquire(blocking=False):
+            raise HashingBusy
+        try:
+            future = self.executor.submit(func, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda future: self.slots.release())
+        return future
+
+    def run(self, func, *args):
+        return self.submit(func, *args).result()
+
+    async def arun(self, func, *args):
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+
+_pool = None
+_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = HashingPool(settings.PASSWORD_HASHING_WORKERS, settings.PASSWORD_HASHING_QUEUE)
+    return _pool
+
+
+def reset():
+    """
+        Drop the pool, so the next call to `get_pool` builds it from the settings.
+    """
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def hash_password(password):
+    return get_pool().run(make_password, password)
+
+
+async def ahash_password(password):
+    return await get_pool().arun(make_password, password)
+
+
+def verified_key(username, password):
+    return VERIFIED_KEY % salted_hmac('event_app.passwords.verified', '%s\0%s' % (username, password),
+                                      algorithm='sha256').hexdigest()
+
+
+def verified_value(user):
+    return user.pk, salted_hmac('event_app.passwords.hash', user.password, algorithm='sha256').hexdigest()
+
+
+def lookup(username):
+    return User._default_manager.filter(**{User.USERNAME_FIELD: username})
+
+
+def check(user, verified, correct):
+    """
+        Return the user if the password was correct and the user may log in,
+        and whether the stored hash should be upgraded to the current hasher.
+    """
+    if user is None or not correct:
+        return None, False
+    if not user.is_active:
+        return None, False
+    upgrade = verified is None and identify_hasher(user.password).must_update(user.password)
+    return user, upgrade
+
+
+def authenticate(username, password):
+    """
+        Return the active user with these credentials, or None, as
+        django.contrib.auth.authenticate does with ModelBackend, but hashing on
+        the pool and skipping it for recently verified credentials.
+    """
+    key = verified_key(username, password)
+    user = lookup(username).first()
+    verified = cache.get(key) if user is not None else None
+    if verified is not None and verified == verified_value(user):
+        correct = True
+    elif user is None:
+        # Hash anyway, so unknown usernames take as long as wrong passwords.
+        get_pool().run(make_password, password)
+        correct = False
+    else:
+        verified = None
+        correct = get_pool().run(check_password, password, user.password)
+
+    user, upgrade = check(user, verified, correct)
+    if user is not None:
+        if upgrade:
+            user.password = hash_password(password)
+            user.save(update_fields=['password'])
+        cache.set(key, verified_value(user), timeout=settings.AUTH_VERIFIED_CREDENTIAL_TIMEOUT)
+    return user
+
+
+async def aauthenticate(username, password):
+    """
+        Async variant of `authenticate`.
+    """
+    key = verified_key(username, password)
+    user = await lookup(username).afirst()
+    verified = await cache.aget(key) if user is not None else None
+    if verified is not None and verified == verified_value(user):
+        correct = True
+    elif user is None:
+        await get_pool().arun(make_password, password)
+        correct = False
+    else:
+        verified = None
+        correct = await get_pool().arun(check_password, password, user.password)
+
+    user, upgrade = check(user, verified, correct)
+    if user is not None:
+        if upgrade:
+            user.password = await ahash_password(password)
+            await user.asave(update_fields=['password'])
+        await cache.aset(key, verified_value(user), timeout=settings.AUTH_VERIFIED_CREDENTIAL_TIMEOUT)
+    return user
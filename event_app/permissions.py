@@ -0,0 +1,10 @@
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+
+class IsLocalRequest(BasePermission):
+    """
+        Allows access only to clients whose address is in METRICS_ALLOWED_IPS.
+    """
+    def has_permission(self, request, view):
+        return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+REPLICA = 'replica'
+
+_replica_reads = ContextVar('event_app_replica_reads', default=False)
+
+
+@contextmanager
+def replica_reads():
+    """
+        Route the reads made inside the block to the replica. Used by the
+        read-only list views; everything else reads from the primary, so a
+        client always sees its own writes.
+    """
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """
+        Send reads to the replica inside `replica_reads()`, unless the replica
+        is not configured or the primary has a transaction open (the replica
+        could not see its uncommitted writes). Writes and migrations go to the
+        primary.
+    """
+    def db_for_read(self, model, **hints):
+        if (_replica_reads.get() and REPLICA in connections.databases
+                and not connections['default'].in_atomic_block):
+            return REPLICA
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA
+
+
+class ReplicaReadMixin:
+    """
+        View mixin that handles GET requests with `replica_reads()`.
+        Authentication and permission checks still read from the primary.
+    """
+    def get(self, request, *args, **kwargs):
+        with replica_reads():
+            return super().get(request, *args, **kwargs)
@@ -0,0 +1,175 @@
+"""
+The OpenAPI schema as a precomputed artifact.
+
+drf_yasg introspects every view and serializer each time it builds the schema.
+The schema only changes with the code, so it is built once into
+SCHEMA_ARTIFACT_PATH (by `manage.py generate_schema`, or on first use) and
+served from memory afterwards. The artifact records a fingerprint of the code it
+was built from and is rebuilt when that no longer matches.
+
+This module loads drf_yasg, so only event_app.docs imports it, when the docs
+are first used.
+"""
+import hashlib
+import json
+import threading
+from importlib import metadata
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from drf_yasg import openapi
+from drf_yasg.app_settings import swagger_settings
+from drf_yasg.codecs import OpenAPICodecJson
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from event_app import docs
+
+FINGERPRINT_KEY = 'x-code-fingerprint'
+SOURCE_PACKAGES = ('event_app', 'event_manager')
+DEPENDENCIES = ('Django', 'djangorestframework', 'djangorestframework-simplejwt', 'drf-yasg')
+
+api_info = openapi.Info(
+    title="Event API",
+    default_version='v1',
+    description="Event API for tiko energy",
+    terms_of_service="https://example.com/",
+    contact=openapi.Contact(email="sshkrv@gmail.com"),
+    license=openapi.License(name="Sabir's license"),
+)
+
+
+class Schema:
+    def __init__(self, content):
+        self.content = content
+        self.etag = quote_etag(hashlib.sha256(content).hexdigest()[:32])
+
+
+_schema = None
+_lock = threading.Lock()
+
+
+def fingerprint():
+    """
+        Hash the project's source (tests and migrations aside) and the versions
+        of the libraries that shape the schema.
+    """
+    digest = hashlib.sha256()
+    for package in SOURCE_PACKAGES:
+        for path in sorted((Path(settings.BASE_DIR) / package).rglob('*.py')):
+            if path.name == 'tests.py' or 'migrations' in path.parts:
+                continue
+            digest.update(str(path.relative_to(settings.BASE_DIR)).encode())
+            digest.update(path.read_bytes())
+    for name in DEPENDENCIES:
+        digest.update(('%s==%s' % (name, metadata.version(name))).encode())
+    return digest.hexdigest()
+
+
+def generate(code_fingerprint=None):
+    """
+        Build the schema with drf_yasg and return it encoded as JSON.
+    """
+    docs.install()
+    # Views introspected for the schema read `request.user`, so give them an
+    # anonymous request. An empty url leaves host and schemes to the client.
+    request = APIView().initialize_request(APIRequestFactory().get('/swagger.json'))
+    generator = swagger_settings.DEFAULT_GENERATOR_CLASS(swagger_settings.DEFAULT_INFO, url='')
+    swagger = generator.get_schema(request=request, public=True)
+    swagger[FINGERPRINT_KEY] = code_fingerprint or fingerprint()
+    return OpenAPICodecJson(validators=[]).encode(swagger)
+
+
+def read_artifact(path=None):
+    """
+        Return the artifact's content, or None if it is missing.
+    """
+    path = Path(path or settings.SCHEMA_ARTIFACT_PATH)
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def is_current(content, code_fingerprint):
+    try:
+        return json.loads(content).get(FINGERPRINT_KEY) == code_fingerprint
+    except ValueError:
+        return False
+
+
+def write_artifact(content, path=None):
+    path = Path(path or settings.SCHEMA_ARTIFACT_PATH)
+    temporary = path.with_name(path.name + '.tmp')
+    temporary.write_bytes(content)
+    temporary.replace(path)
+
+
+def get_schema():
+    """
+        Return the schema for the running code, reading the artifact or
+        rebuilding it the first time this process needs it.
+    """
+    global _schema
+    if _schema is None:
+        with _lock:
+            if _schema is None:
+                code_fingerprint = fingerprint()
+                content = read_artifact()
+                if content is None or not is_current(content, code_fingerprint):
+                    content = generate(code_fingerprint)
+                    try:
+                        write_artifact(content)
+                    except OSError:
+                        pass  # A read-only deployment still serves the schema from memory.
+                _schema = Schema(content)
+    return _schema
+
+
+def reset():
+    """
+        Forget the in-memory schema, so the next request reloads the artifact.
+    """
+    global _schema
+    _schema = None
+
+
+def cached_schema_view(schema_view):
+    """
+        Subclass a drf_yasg schema view (from get_schema_view) to serve the JSON
+        schema from `get_schema()` with an ETag. The UI pages and YAML output
+        are left to drf_yasg; the UI pages load the JSON schema from this view.
+    """
+    class CachedSchemaView(schema_view):
+        def get(self, request, version='', format=None):
+            renderer = request.accepted_renderer
+            if getattr(renderer, 'codec_class', None) is not OpenAPICodecJson:
+                return super().get(request, version, format)
+
+            schema = get_schema()
+            response = get_conditional_response(request, etag=schema.etag)
+            if response is None:
+                response = HttpResponse(schema.content, content_type='%s; charset=%s' % (
+                    renderer.media_type, renderer.charset,
+                ))
+            response['ETag'] = schema.etag
+            patch_cache_control(response, no_cache=True)
+            return response
+
+    return CachedSchemaView
+
+
+def build_schema_view():
+    """
+        Build the drf_yasg schema view, serving the JSON schema from `get_schema()`.
+    """
+    return cached_schema_view(get_schema_view(
+        api_info,
+        public=True,
+        permission_classes=(permissions.AllowAny,)
+    ))
@@ -0,0 +1,138 @@
+"""
+Full-text search over event titles and descriptions with SQLite FTS5.
+
+The index is an external-content FTS5 table over event_app_event, kept in sync
+by triggers (so bulk_create, update() and raw SQL writes are covered too) and
+exposed to the ORM as the unmanaged EventSearch model.
+
+SQLite drops the triggers whenever a migration remakes event_app_event (most
+AddField/AlterField operations do), so such migrations reinstall the index with
+`reinstall_index`. A migration that forgets to is caught by the
+`check_triggers` system check, which `migrate` and `check --database` run.
+"""
+import re
+
+from django.core import checks
+from django.db import connections, models
+
+FTS_TABLE = 'event_app_event_fts'
+
+# bm25 weights of the title and description columns: a title hit counts more.
+RANK = 'bm25(10.0, 1.0)'
+
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE {fts} USING fts5(
+        title, description,
+        content='event_app_event', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER {fts}_ai AFTER INSERT ON event_app_event BEGIN
+        INSERT INTO {fts}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER {fts}_ad AFTER DELETE ON event_app_event BEGIN
+        INSERT INTO {fts}({fts}, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER {fts}_au AFTER UPDATE OF title, description ON event_app_event BEGIN
+        INSERT INTO {fts}({fts}, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {fts}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    "INSERT INTO {fts}({fts}, rank) VALUES ('rank', '%s')" % RANK,
+    "INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+]
+
+TRIGGERS = ['{fts}_ai', '{fts}_ad', '{fts}_au']
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS {fts}_au',
+    'DROP TRIGGER IF EXISTS {fts}_ad',
+    'DROP TRIGGER IF EXISTS {fts}_ai',
+    'DROP TABLE IF EXISTS {fts}',
+]
+
+
+def create_index(schema_editor):
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql.format(fts=FTS_TABLE))
+
+
+def drop_index(schema_editor):
+    for sql in DROP_SQL:
+        schema_editor.execute(sql.format(fts=FTS_TABLE))
+
+
+def reinstall_index(schema_editor):
+    drop_index(schema_editor)
+    create_index(schema_editor)
+
+
+def missing_triggers(connection):
+    """
+        Return the names of the index triggers missing from the database.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'event_app_event'")
+        installed = {name for name, in cursor.fetchall()}
+    return [name for name in (trigger.format(fts=FTS_TABLE) for trigger in TRIGGERS) if name not in installed]
+
+
+def check_triggers(databases=None, **kwargs):
+    """
+        Report databases whose search index would silently stop following
+        event changes. Only looks at SQLite databases that have the index:
+        `migrate` runs this before migrating, so a database the index has not
+        been created in yet must be let through.
+    """
+    errors = []
+    for alias in databases or []:
+        connection = connections[alias]
+        if connection.vendor != 'sqlite' or FTS_TABLE not in connection.introspection.table_names():
+            continue
+        missing = missing_triggers(connection)
+        if missing:
+            errors.append(checks.Error(
+                'The search index triggers %s are missing from the %r database.' % (', '.join(missing), alias),
+                hint='A migration remade event_app_event; reinstall the index with '
+                     'event_app.search.reinstall_index in a RunPython operation.',
+                id='event_app.E001',
+            ))
+    return errors
+
+
+def match_expression(text):
+    """
+        Turn free text into an FTS5 query matching events that contain every
+        word, the last one as a prefix. Words are quoted, so FTS5 operators and
+        punctuation in user input are searched for rather than interpreted.
+        Returns None when there is nothing to search for.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    terms = ['"%s"' % word for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+class DocumentField(models.TextField):
+    """
+        The hidden column named after an FTS5 table, which stands for the whole
+        row in a MATCH.
+    """
+
+
+@DocumentField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return '%s MATCH %s' % (lhs, rhs), lhs_params + rhs_params
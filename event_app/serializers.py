@@ -1,12 +1,199 @@
+from collections import OrderedDict
+
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models
+from django.utils import timezone
 from rest_framework import serializers
 from .models import Event
 
 
+def format_datetime(value, tz):
+    """
+        Format an aware datetime like DRF's DateTimeField, without looking up
+        the current timezone per value.
+    """
+    value = value.astimezone(tz).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def registered_event_ids(user, event_ids, model=Event):
+    """
+        Return the ids among `event_ids` of the events (of `model`, Event or
+        ArchivedEvent) `user` is registered for, with one query (none for
+        anonymous users).
+    """
+    if user is None or not user.is_authenticated or not event_ids:
+        return set()
+    return set(model.attendees.through.objects.filter(
+        user_id=user.pk, event_id__in=list(event_ids),
+    ).values_list('event_id', flat=True))
+
+
+async def aregistered_event_ids(user, event_ids, model=Event):
+    """
+        Async variant of `registered_event_ids`.
+    """
+    if user is None or not user.is_authenticated or not event_ids:
+        return set()
+    return {event_id async for event_id in model.attendees.through.objects.filter(
+        user_id=user.pk, event_id__in=list(event_ids),
+    ).values_list('event_id', flat=True)}
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+        A PrimaryKeyRelatedField that resolves primary keys from the instances a
+        parent list serializer loaded for the whole batch (see
+        EventListSerializer.prefetch_related_instances), instead of running one
+        query per value. Falls back to the normal lookup outside of a batch.
+    """
+    def to_internal_value(self, data):
+        prefetched = self.context.get('prefetched', {}).get(self.get_queryset().model)
+        if prefetched is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in prefetched:
+            self.fail('does_not_exist', pk_value=data)
+        return prefetched[pk]
+
+
+class EventListSerializer(serializers.ListSerializer):
+    """
+        Creates and partially updates events in bulk.
+
+        Related users for every row are loaded with a single query before the
+        rows are validated, and the writes go through bulk_create/bulk_update in
+        batches of settings.EVENT_BULK_BATCH_SIZE. Callers are expected to wrap
+        save() in a transaction. For updates, `instance` is a list of events in
+        the same order as the submitted rows.
+    """
+    related_fields = ('creator', 'attendees')
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('max_length', settings.EVENT_BULK_MAX_ITEMS)
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list) or not data or (self.max_length is not None and len(data) > self.max_length):
+            # Let the default implementation report the shape error.
+            return super().to_internal_value(data)
+
+        self.prefetch_related_instances(data)
+        ret = []
+        errors = []
+        try:
+            for index, item in enumerate(data):
+                self.child.instance = self.instance[index] if self.instance is not None else None
+                try:
+                    validated = self.child.run_validation(item)
+                except serializers.ValidationError as exc:
+                    errors.append(exc.detail)
+                else:
+                    ret.append(validated)
+                    errors.append({})
+        finally:
+            self.child.instance = None
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return ret
+
+    def prefetch_related_instances(self, data):
+        user_pk = User._meta.pk
+        pks = set()
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            for field_name in self.related_fields:
+                values = item.get(field_name)
+                for value in values if isinstance(values, list) else [values]:
+                    try:
+                        pks.add(user_pk.to_python(value))
+                    except DjangoValidationError:
+                        pass
+        pks.discard(None)
+        self.context.setdefault('prefetched', {})[User] = User.objects.in_bulk(pks)
+
+    def to_representation(self, data):
+        # Work out `is_registered` for the whole page with one query.
+        events = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        request = self.context.get('request')
+        self.context['registered_event_ids'] = registered_event_ids(
+            request and request.user, [event.pk for event in events],
+        )
+        return super().to_representation(events)
+
+    def validate(self, attrs):
+        if self.instance is not None and any('attendees' in row for row in attrs):
+            raise serializers.ValidationError('Attendees cannot be changed in a bulk update.')
+        return attrs
+
+    def create(self, validated_data):
+        events, _ = self.insert(validated_data)
+        return self.reload(events)
+
+    @staticmethod
+    def insert(validated_data, batch_size=None):
+        """
+            Bulk insert validated rows and their attendee links. Returns the
+            events and the number of links.
+        """
+        batch_size = batch_size or settings.EVENT_BULK_BATCH_SIZE
+        events = []
+        attendees = []
+        for attrs in validated_data:
+            attrs = dict(attrs)
+            users = attrs.pop('attendees', [])
+            events.append(Event(registered_count=len(users), **attrs))
+            attendees.append(users)
+
+        Event.objects.bulk_create(events, batch_size=batch_size)
+        links = Event.attendees.through.objects.bulk_create([
+            Event.attendees.through(event_id=event.pk, user_id=user.pk)
+            for event, users in zip(events, attendees) for user in users
+        ], batch_size=batch_size)
+        return events, len(links)
+
+    def update(self, instance, validated_data):
+        fields = set()
+        for event, attrs in zip(instance, validated_data):
+            for attr, value in attrs.items():
+                setattr(event, attr, value)
+            fields.update(attrs)
+
+        if fields:
+            Event.objects.bulk_update(instance, sorted(fields), batch_size=settings.EVENT_BULK_BATCH_SIZE)
+        return self.reload(instance)
+
+    @staticmethod
+    def reload(events):
+        # Re-read to pick up the values set by the database.
+        fresh = Event.objects.filter(pk__in=[event.pk for event in events]).in_bulk()
+        return [fresh[event.pk] for event in events]
+
+
 class EventSerializer(serializers.ModelSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+
+    attendee_count = serializers.IntegerField(source='registered_count', read_only=True,
+                                              help_text='Number of users attending the event.')
+    is_registered = serializers.SerializerMethodField(
+        help_text='Whether the current user is registered for the event.'
+    )
+
     class Meta:
         model = Event
-        fields = ['id', 'creator', 'title', 'description', 'date', 'type', 'status', 'capacity', 'attendees']
+        fields = ['id', 'creator', 'title', 'description', 'date', 'type', 'status', 'capacity', 'attendees',
+                  'attendee_count', 'is_registered', 'created_at', 'updated_at']
         extra_kwargs = {
             'id': {'help_text': 'Unique identifier for the event.'},
             'creator': {'help_text': 'User who created the event.'},
@@ -16,8 +203,129 @@ class EventSerializer(serializers.ModelSerializer):
             'type': {'help_text': 'Type of the event.'},
             'status': {'help_text': 'Current status of the event.'},
             'capacity': {'help_text': 'Number of people who can attend the event.'},
-            'attendees': {'help_text': 'List of users attending the event.'},
+            'attendees': {'help_text': 'Users attending the event, when creating it. Read them from '
+                                       '/events/<id>/attendees/.', 'write_only': True},
+            'created_at': {'help_text': 'When the event was created.'},
+            'updated_at': {'help_text': 'When the event or its attendees last changed.'},
         }
+        list_serializer_class = EventListSerializer
+
+    def get_is_registered(self, event):
+        registered = self.context.get('registered_event_ids')
+        if registered is None:
+            request = self.context.get('request')
+            registered = registered_event_ids(request and request.user, [event.pk])
+        return event.pk in registered
+
+    def validate(self, attrs):
+        attendees = attrs.get('attendees')
+        if attendees is not None:
+            # A repeated user is one attendee, as with the related manager's set().
+            attendees = attrs['attendees'] = list({user.pk: user for user in attendees}.values())
+        capacity = attrs.get('capacity', self.instance.capacity if self.instance is not None else None)
+        if attendees is not None and capacity is not None and len(attendees) > capacity:
+            raise serializers.ValidationError({'attendees': 'More attendees than the event has capacity for.'})
+        return attrs
+
+    def validate_capacity(self, value):
+        if self.instance is not None and value < self.instance.registered_count:
+            raise serializers.ValidationError('Capacity cannot be lower than the number of registered attendees.')
+        return value
+
+
+class EventValuesSerializer:
+    """
+        Read-only fast path for event listings. Builds EventSerializer-shaped
+        dicts straight from `values()` rows instead of running DRF's field
+        machinery per row, and lets clients pick the fields (and so the
+        columns) they need with `?fields=`. The id is always included.
+    """
+    # Output fields in EventSerializer order, mapped to the columns they are read from.
+    columns = OrderedDict([
+        ('id', 'id'), ('creator', 'creator'), ('title', 'title'), ('description', 'description'),
+        ('date', 'date'), ('type', 'type'), ('status', 'status'), ('capacity', 'capacity'),
+        ('attendee_count', 'registered_count'), ('is_registered', None),
+        ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+    ])
+    datetime_fields = ('date', 'created_at', 'updated_at')
+    fields_query_param = 'fields'
+
+    def __init__(self, fields=None):
+        self.fields = [field for field in self.columns if fields is None or field == 'id' or field in fields]
+
+    @classmethod
+    def from_request(cls, request):
+        """
+            Build the serializer for the fields named in the request's `fields`
+            parameter, all fields when it is absent.
+        """
+        value = request.query_params.get(cls.fields_query_param)
+        if not value:
+            return cls()
+        fields = {field.strip() for field in value.split(',') if field.strip()}
+        unknown = fields.difference(cls.columns)
+        if unknown:
+            raise serializers.ValidationError({cls.fields_query_param: ['Unknown fields: %s. Choose from %s.' % (
+                ', '.join(sorted(unknown)), ', '.join(cls.columns),
+            )]})
+        return cls(fields)
+
+    def get_columns(self, *extra):
+        """
+            Return the columns to SELECT: those of the fields, plus `extra`
+            (e.g. the pagination ordering).
+        """
+        columns = [self.columns[field] for field in self.fields if self.columns[field] is not None]
+        return list(dict.fromkeys(columns + [column for column in extra if column not in columns]))
+
+    def to_representation(self, rows, registered=frozenset()):
+        tz = timezone.get_current_timezone()
+        # (field, column, how to convert the value), worked out once per page.
+        plan = [
+            (field, self.columns[field], 'registered' if field == 'is_registered' else
+             'datetime' if field in self.datetime_fields else None)
+            for field in self.fields
+        ]
+        events = []
+        for row in rows:
+            event = {}
+            for field, column, conversion in plan:
+                if conversion is None:
+                    event[field] = row[column]
+                elif conversion == 'datetime':
+                    event[field] = format_datetime(row[column], tz)
+                else:
+                    event[field] = row['id'] in registered
+            events.append(event)
+        return events
+
+    def serialize(self, rows, user, model=Event):
+        registered = set()
+        if 'is_registered' in self.fields:
+            registered = registered_event_ids(user, [row['id'] for row in rows], model)
+        return self.to_representation(rows, registered)
+
+    async def aserialize(self, rows, user, model=Event):
+        registered = set()
+        if 'is_registered' in self.fields:
+            registered = await aregistered_event_ids(user, [row['id'] for row in rows], model)
+        return self.to_representation(rows, registered)
+
+
+class BulkRegistrationSerializer(serializers.Serializer):
+    event_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=100,
+        help_text='IDs of the events to register for or unregister from.'
+    )
+
+
+class AttendeeSerializer(serializers.Serializer):
+    """
+        An attendee of an event, read from a row of the attendees through table.
+    """
+    id = serializers.IntegerField(source='user_id', read_only=True, help_text='Id of the attending user.')
 
 
 class UserRegisterSerializer(serializers.ModelSerializer):
@@ -0,0 +1,103 @@
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from event_app import cache, live
+from event_app.authentication import forget_user
+from event_app.metrics import install_query_recorder
+from event_app.models import Event, EventTombstone, events_changed, seats_changed
+
+
+@receiver(m2m_changed, sender=Event.attendees.through)
+def sync_registered_count(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """
+        Keep Event.registered_count in step with attendees added or removed
+        through the related managers (admin, shell, tests). The registration
+        views write the through table directly and maintain the count themselves.
+    """
+    if reverse:
+        # `instance` is a User; pk_set holds event ids, or None on clear().
+        if action == 'pre_clear':
+            instance._cleared_event_ids = list(instance.attending.values_list('pk', flat=True))
+            return
+        if action == 'post_clear':
+            event_ids = instance.__dict__.pop('_cleared_event_ids', [])
+        elif action in ('post_add', 'post_remove'):
+            event_ids = pk_set
+        else:
+            return
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        event_ids = [instance.pk]
+    else:
+        return
+
+    if event_ids:
+        Event.objects.filter(pk__in=event_ids).refresh_registered_count()
+        seats_changed.send(sender=Event, event_ids=list(event_ids), using=using)
+
+
+@receiver(pre_delete, sender=User)
+def remember_attending(sender, instance, **kwargs):
+    instance._attending_event_ids = list(instance.attending.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=User)
+def release_seats(sender, instance, using, **kwargs):
+    # Deleting a user cascades to the through table without m2m_changed.
+    event_ids = instance.__dict__.pop('_attending_event_ids', [])
+    if event_ids:
+        Event.objects.filter(pk__in=event_ids).refresh_registered_count()
+        seats_changed.send(sender=Event, event_ids=event_ids, using=using)
+
+
+@receiver(seats_changed, sender=Event)
+def publish_seat_changes(sender, event_ids, using, **kwargs):
+    publish = partial(live.get_broker().publish, event_ids)
+    # Checked here rather than left to on_commit(), which opens a connection
+    # and so cannot be called from the async registration paths.
+    if connections[using].in_atomic_block:
+        transaction.on_commit(publish, using=using)
+    else:
+        publish()
+
+
+@receiver(post_delete, sender=Event)
+def record_tombstone(sender, instance, using, **kwargs):
+    """
+        Leave a tombstone for the change feed. EventQuerySet.archive, which
+        deletes events by the thousand, records them per batch instead.
+    """
+    EventTombstone.objects.using(using).record([instance.pk])
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(m2m_changed, sender=Event.attendees.through)
+@receiver(events_changed, sender=Event)
+def invalidate_event_listings(sender, **kwargs):
+    # m2m_changed fires before and after each change; only react once.
+    if kwargs.get('action', 'post_').startswith('post_'):
+        cache.invalidate()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Covers password changes and deactivation, which both save the user.
+    forget_user(instance.pk)
+
+
+connection_created.connect(install_query_recorder)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            for name, value in settings.SQLITE_PRAGMAS.items():
+                cursor.execute('PRAGMA %s = %s' % (name, value))
@@ -0,0 +1,92 @@
+"""
+Cold-start profile of a worker: what importing each module costs.
+
+Meant to run in a fresh interpreter, as the startup_profile command does:
+
+    python -m event_app.startup event_manager.wsgi
+
+It imports the given module (the one a WSGI or ASGI server loads, which sets up
+Django and builds the handler with its middleware) and the URLconf, as a worker
+does before its first request. Every module import is timed, and the resident
+memory it adds measured; the results are printed as JSON. `seconds` and `rss`
+include the modules an import pulls in, `self_seconds` and `self_rss` do not.
+The measurement itself adds a little to every import, so compare runs with
+each other rather than with an unprofiled start.
+"""
+import importlib
+import importlib._bootstrap
+import json
+import os
+import sys
+import time
+
+STATM = '/proc/self/statm'
+
+
+class ImportProfiler:
+    """
+        Wraps importlib's module loading, which every import goes through, to
+        record what each module costs to execute.
+    """
+    def __init__(self):
+        self.modules = []
+        self.stack = []
+        self.statm = os.open(STATM, os.O_RDONLY) if os.path.exists(STATM) else None
+        self.page_size = os.sysconf('SC_PAGE_SIZE') if self.statm is not None else None
+
+    def rss(self):
+        if self.statm is not None:
+            return int(os.pread(self.statm, 64, 0).split()[1]) * self.page_size
+        import resource
+
+        # Peak rather than current memory where /proc is missing; KiB on Linux, bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+    def install(self):
+        load_unlocked = importlib._bootstrap._load_unlocked
+
+        def load(spec):
+            entry = {'module': spec.name, 'children_seconds': 0.0, 'children_rss': 0}
+            self.stack.append(entry)
+            memory = self.rss()
+            start = time.perf_counter()
+            try:
+                return load_unlocked(spec)
+            finally:
+                entry['seconds'] = time.perf_counter() - start
+                entry['rss'] = self.rss() - memory
+                self.stack.pop()
+                entry['self_seconds'] = entry['seconds'] - entry.pop('children_seconds')
+                entry['self_rss'] = entry['rss'] - entry.pop('children_rss')
+                if self.stack:
+                    self.stack[-1]['children_seconds'] += entry['seconds']
+                    self.stack[-1]['children_rss'] += entry['rss']
+                self.modules.append(entry)
+
+        importlib._bootstrap._load_unlocked = load
+
+
+def profile(module):
+    """
+        Start a worker by importing `module` and return what it took.
+    """
+    profiler = ImportProfiler()
+    memory = profiler.rss()
+    profiler.install()
+    start = time.perf_counter()
+    importlib.import_module(module)
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
+    return {
+        'module': module,
+        'seconds': time.perf_counter() - start,
+        'rss': profiler.rss() - memory,
+        'rss_total': profiler.rss(),
+        'modules': profiler.modules,
+    }
+
+
+if __name__ == '__main__':
+    json.dump(profile(sys.argv[1]), sys.stdout)
@@ -2,9 +2,53 @@ from django.contrib.auth.models import User
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+import asyncio
+import csv
+import io
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import Count
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from django.utils.http import http_date
 from datetime import timedelta
-from .models import Event
+from . import authentication as event_auth
+from . import cache as event_cache
+from . import live as event_live
+from . import metrics as event_metrics
+from . import passwords as event_passwords
+from . import routers as event_routers
+from . import schema as event_schema
+from . import search as event_search
+from . import throttling as event_throttling
+from .importer import Checkpoint
+from .models import ArchivedEvent, Event, EventTombstone, ImportProgress, RegistrationStatus
+from .pagination import EventPagination
+from .serializers import EventListSerializer, EventSerializer
+
+# The throttles are tested by TestThrottling. Elsewhere they are lifted: their
+# buckets outlive each test in the locmem cache, so they would make the
+# outcome depend on which tests ran before.
+NO_THROTTLING = override_settings(THROTTLE_RATES={})
+
+
+def setUpModule():
+    NO_THROTTLING.enable()
+
+
+def tearDownModule():
+    NO_THROTTLING.disable()
 
 
 class TestEvent(APITestCase):
@@ -60,7 +104,7 @@ class TestEvent(APITestCase):
         response = self.client.get(url, format='json')
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_get_event_detail(self):
         """
@@ -110,63 +154,2350 @@ class TestEvent(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 
-class TestUser(APITestCase):
+class TestEventRegistration(APITestCase):
     """
-        This class tests the User functionality.
-        It includes tests for user registration and login.
+        This class tests seat accounting for registrations.
+        It includes tests for the registered_count column under registration,
+        unregistration, repeated requests and changes made through the related manager.
     """
-    def test_user_registration(self):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.event = Event.objects.create(
+            creator=self.user,
+            title='Test Event',
+            description='Test Description',
+            date=timezone.now() + timedelta(days=1),
+            type='Test Type',
+            status='Test Status',
+            capacity=2
+        )
+        self.url = reverse('event-register')
+
+    def test_register_claims_a_seat(self):
         """
-            Test that a user is registered successfully.
+            Test that registering twice claims a single seat.
         """
-        data = {'username': 'testuser', 'password': 'testpass'}
-        url = reverse('register')
+        first = self.client.post(self.url, {'event_id': self.event.id}, format='json')
+        second = self.client.post(self.url, {'event_id': self.event.id}, format='json')
+        self.event.refresh_from_db()
 
-        response = self.client.post(url, data, format='json')
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data['message'], 'Already registered')
+        self.assertEqual(self.event.registered_count, 1)
+        self.assertEqual(self.event.attendees.count(), 1)
 
-        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(User.objects.count(), 1)
-        self.assertEqual(User.objects.get(username='testuser').username, 'testuser')
+    def test_unregister_releases_the_seat(self):
+        """
+            Test that unregistering releases the seat only once.
+        """
+        self.client.post(self.url, {'event_id': self.event.id}, format='json')
+        url = self.url + '?event_id=' + str(self.event.id)
+        self.client.delete(url, format='json')
+        response = self.client.delete(url, format='json')
+        self.event.refresh_from_db()
 
-    def test_user_registration_with_already_taken_username(self):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.event.registered_count, 0)
+
+    def test_register_past_and_missing_events(self):
         """
-            Test that a user cannot register with a username that is already taken.
+            Test that past events are rejected and unknown events are not found.
         """
-        User.objects.create_user(username='testuser', password='testpass')
+        Event.objects.filter(pk=self.event.pk).update(date=timezone.now() - timedelta(days=1))
 
-        data = {'username': 'testuser', 'password': 'testpass2'}
-        url = reverse('register')
+        past = self.client.post(self.url, {'event_id': self.event.id}, format='json')
+        missing = self.client.post(self.url, {'event_id': self.event.id + 1}, format='json')
+        invalid = self.client.post(self.url, {'event_id': 'abc'}, format='json')
 
-        response = self.client.post(url, data, format='json')
+        self.assertEqual(past.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Event.objects.get(pk=self.event.pk).registered_count, 0)
+
+    def test_related_manager_keeps_count(self):
+        """
+            Test that adding, removing and clearing attendees through the ORM keeps the count.
+        """
+        other = User.objects.create_user(username='testuser2', password='testpass2')
+        self.event.attendees.add(self.user, other)
+        self.assertEqual(Event.objects.get(pk=self.event.pk).registered_count, 2)
+        other.attending.remove(self.event)
+        self.assertEqual(Event.objects.get(pk=self.event.pk).registered_count, 1)
+        self.user.attending.clear()
+        self.assertEqual(Event.objects.get(pk=self.event.pk).registered_count, 0)
+
+    def test_capacity_cannot_drop_below_registrations(self):
+        """
+            Test that an event's capacity cannot be lowered below its registered count.
+        """
+        self.event.attendees.add(self.user, User.objects.create_user(username='testuser2', password='testpass2'))
+        url = reverse('event-detail', kwargs={'pk': self.event.pk})
+        response = self.client.patch(url, {'capacity': 1}, format='json')
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
-    def test_user_login(self):
+
+class TestBulkRegistration(APITestCase):
+    """
+        This class tests registering for and unregistering from many events in one request.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('event-register-bulk')
+
+    def create_events(self, count, days=1, capacity=10):
+        return Event.objects.bulk_create([
+            Event(
+                creator=self.user,
+                title='Event %d' % i,
+                description='Description',
+                date=timezone.now() + timedelta(days=days),
+                type='Type',
+                status='Status',
+                capacity=capacity
+            )
+            for i in range(count)
+        ])
+
+    def test_register_many(self):
         """
-            Test that a user can log in successfully.
+            Test that each event in the batch gets its own result.
         """
-        User.objects.create_user(username='testuser', password='testpass')
+        upcoming, already, full = self.create_events(3)
+        past, = self.create_events(1, days=-1)
+        already.attendees.add(self.user)
+        Event.objects.filter(pk=full.pk).update(capacity=0)
+        event_ids = [upcoming.id, already.id, full.id, past.id, past.id + 100]
 
-        data = {'username': 'testuser', 'password': 'testpass'}
-        url = reverse('login')
+        response = self.client.post(self.url, {'event_ids': event_ids}, format='json')
 
-        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], {
+            upcoming.id: RegistrationStatus.REGISTERED,
+            already.id: RegistrationStatus.ALREADY_REGISTERED,
+            full.id: RegistrationStatus.FULL,
+            past.id: RegistrationStatus.PAST,
+            past.id + 100: RegistrationStatus.NOT_FOUND,
+        })
+        self.assertEqual(Event.objects.get(pk=upcoming.pk).registered_count, 1)
+        self.assertEqual(Event.objects.get(pk=already.pk).registered_count, 1)
+
+    def test_unregister_many(self):
+        """
+            Test that unregistering releases only the seats the user holds.
+        """
+        held, not_held = self.create_events(2)
+        held.attendees.add(self.user)
+        url = '%s?event_ids=%d,%d' % (self.url, held.id, not_held.id)
+
+        response = self.client.delete(url, format='json')
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertTrue('access' in response.data)
-        self.assertTrue('refresh' in response.data)
+        self.assertEqual(response.data['results'], {
+            held.id: RegistrationStatus.UNREGISTERED,
+            not_held.id: RegistrationStatus.NOT_REGISTERED,
+        })
+        self.assertEqual(Event.objects.get(pk=held.pk).registered_count, 0)
 
-    def test_user_login_with_wrong_credentials(self):
+    def test_query_count_is_constant(self):
         """
-            Test that a user cannot log in with wrong credentials.
+            Test that a batch of 30 events costs the same number of queries as a batch of 3.
         """
-        User.objects.create_user(username='testuser', password='testpass')
+        counts = []
+        for size in (3, 30):
+            event_ids = [event.id for event in self.create_events(size)]
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(self.url, {'event_ids': event_ids}, format='json')
+            self.assertEqual(set(response.data['results'].values()), {RegistrationStatus.REGISTERED})
+            counts.append(len(context.captured_queries))
 
-        data = {'username': 'testuser', 'password': 'wrongpass'}
-        url = reverse('login')
+            with CaptureQueriesContext(connection) as context:
+                self.client.delete('%s?event_ids=%s' % (self.url, ','.join(map(str, event_ids))), format='json')
+            counts.append(len(context.captured_queries))
 
-        response = self.client.post(url, data, format='json')
+        self.assertEqual(counts[0], counts[2])
+        self.assertEqual(counts[1], counts[3])
+
+    def test_invalid_payload(self):
+        """
+            Test that an empty or malformed list of event ids is rejected.
+        """
+        empty = self.client.post(self.url, {'event_ids': []}, format='json')
+        malformed = self.client.delete(self.url + '?event_ids=1,abc', format='json')
+
+        self.assertEqual(empty.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(malformed.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestConcurrentRegistration(TransactionTestCase):
+    """
+        This class stresses registration from many threads at once and checks
+        that an event is never oversold.
+    """
+    def test_capacity_is_never_exceeded(self):
+        creator = User.objects.create(username='creator')
+        users = User.objects.bulk_create([User(username='user%d' % i) for i in range(40)])
+        event = Event.objects.create(
+            creator=creator,
+            title='Flash Sale',
+            description='Description',
+            date=timezone.now() + timedelta(days=1),
+            type='Type',
+            status='Status',
+            capacity=15
+        )
+        results = []
+        barrier = threading.Barrier(8)
+
+        def register(chunk):
+            barrier.wait()
+            try:
+                for user in chunk:
+                    results.append(Event.objects.register(event.pk, user))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=register, args=(users[i::8],)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        event.refresh_from_db()
+
+        self.assertEqual(len(results), len(users))
+        self.assertEqual(results.count(RegistrationStatus.REGISTERED), event.capacity)
+        self.assertEqual(results.count(RegistrationStatus.FULL), len(users) - event.capacity)
+        self.assertEqual(event.registered_count, event.capacity)
+        self.assertEqual(event.attendees.count(), event.capacity)
+
+
+class TestBulkEvents(APITestCase):
+    """
+        This class tests creating and updating many events in one request.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('event-list')
+
+    def event_data(self, count, **extra):
+        start_date = timezone.now() + timedelta(days=1)
+        return [
+            dict({
+                'creator': self.user.id,
+                'title': 'Event %d' % i,
+                'description': 'Description',
+                'date': start_date + timedelta(hours=i),
+                'type': 'Type',
+                'status': 'Status',
+                'capacity': 10
+            }, **extra)
+            for i in range(count)
+        ]
+
+    def test_bulk_create(self):
+        """
+            Test that a list of events is created, including their attendees.
+        """
+        other = User.objects.create_user(username='testuser2', password='testpass2')
+        response = self.client.post(self.url, self.event_data(3, attendees=[other.id]), format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(Event.objects.count(), 3)
+        for event in Event.objects.all():
+            self.assertEqual(list(event.attendees.all()), [other])
+            self.assertEqual(event.registered_count, 1)
+
+    def test_bulk_create_query_count_is_constant(self):
+        """
+            Test that validating and creating 30 events costs as many queries as 3.
+        """
+        counts = []
+        for size in (3, 30):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(self.url, self.event_data(size), format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            counts.append(len(context.captured_queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+    def test_bulk_create_is_atomic(self):
+        """
+            Test that one invalid row rejects the whole batch with per-row errors.
+        """
+        data = self.event_data(3)
+        data[1]['creator'] = self.user.id + 100
+        data[2]['capacity'] = 'many'
+
+        response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('creator', response.data[1])
+        self.assertIn('capacity', response.data[2])
+        self.assertEqual(Event.objects.count(), 0)
+
+    def test_bulk_partial_update(self):
+        """
+            Test that several of the user's events are updated in one request.
+        """
+        self.client.post(self.url, self.event_data(3), format='json')
+        events = list(Event.objects.order_by('id'))
+        data = [{'id': event.id, 'status': 'Cancelled'} for event in events[:2]]
+
+        response = self.client.patch(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([event['status'] for event in response.data], ['Cancelled', 'Cancelled'])
+        self.assertEqual(list(Event.objects.order_by('id').values_list('status', flat=True)),
+                         ['Cancelled', 'Cancelled', 'Status'])
+
+    def test_bulk_partial_update_rejects_unknown_events(self):
+        """
+            Test that events of other users cannot be updated in bulk.
+        """
+        other = User.objects.create_user(username='testuser2', password='testpass2')
+        event = Event.objects.create(
+            creator=other, title='Other', description='', date=timezone.now() + timedelta(days=1),
+            type='Type', status='Status', capacity=10
+        )
+
+        response = self.client.patch(self.url, [{'id': event.id, 'status': 'Cancelled'}], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Event.objects.get(pk=event.pk).status, 'Status')
+
+    def test_bulk_partial_update_checks_capacity(self):
+        """
+            Test that capacity validation runs against each row's own event.
+        """
+        self.client.post(self.url, self.event_data(2), format='json')
+        first, second = Event.objects.order_by('id')
+        first.attendees.add(self.user)
+        data = [{'id': first.id, 'capacity': 0}, {'id': second.id, 'capacity': 0}]
+
+        response = self.client.patch(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('capacity', response.data[0])
+        self.assertEqual(response.data[1], {})
 
+    def test_bulk_create_with_repeated_attendee(self):
+        """
+            Test that a user listed twice as an attendee is registered once, as
+            when creating a single event.
+        """
+        other = User.objects.create_user(username='testuser2', password='testpass2')
+        data = self.event_data(1, attendees=[other.id, other.id])
+
+        single = self.client.post(self.url, data[0], format='json')
+        response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(single.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        for event in Event.objects.all():
+            self.assertEqual(list(event.attendees.all()), [other])
+            self.assertEqual(event.registered_count, 1)
+
+    def test_bulk_partial_update_racing_a_registration(self):
+        """
+            Test that a capacity that a concurrent registration pushed below the
+            attendee count is reported as a 400 on its row.
+        """
+        self.client.post(self.url, self.event_data(2), format='json')
+        first, second = Event.objects.order_by('id')
+        is_valid = EventListSerializer.is_valid
+
+        def register_after_validation(serializer, *args, **kwargs):
+            valid = is_valid(serializer, *args, **kwargs)
+            Event.objects.register(first.pk, User.objects.create_user(username='racer'))
+            return valid
+
+        data = [{'id': first.id, 'capacity': 0}, {'id': second.id, 'status': 'Cancelled'}]
+        with mock.patch.object(EventListSerializer, 'is_valid', register_after_validation):
+            response = self.client.patch(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('capacity', response.data[0])
+        self.assertEqual(response.data[1], {})
+        self.assertEqual(Event.objects.get(pk=second.pk).status, 'Status')
+
+
+    def test_bulk_partial_update_racing_a_deletion(self):
+        """
+            Test that an event deleted after validation is reported as not
+            found on its row, and nothing is updated.
+        """
+        self.client.post(self.url, self.event_data(2), format='json')
+        first, second = Event.objects.order_by('id')
+        is_valid = EventListSerializer.is_valid
+
+        def delete_after_validation(serializer, *args, **kwargs):
+            valid = is_valid(serializer, *args, **kwargs)
+            Event.objects.filter(pk=first.pk).delete()
+            return valid
+
+        data = [{'id': first.id, 'status': 'Cancelled'}, {'id': second.id, 'status': 'Cancelled'}]
+        with mock.patch.object(EventListSerializer, 'is_valid', delete_after_validation):
+            response = self.client.patch(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, [{'id': ['Event not found.']}, {}])
+        self.assertEqual(Event.objects.get(pk=second.pk).status, 'Status')
+
+    def test_bulk_partial_update_rejects_repeated_ids(self):
+        """
+            Test that an event listed twice in a bulk update is rejected on its
+            repeated row.
+        """
+        self.client.post(self.url, self.event_data(2), format='json')
+        first, second = Event.objects.order_by('id')
+        data = [{'id': first.id, 'capacity': 5}, {'id': second.id}, {'id': first.id, 'capacity': 7}]
+
+        response = self.client.patch(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, [{}, {}, {'id': ['Event listed more than once.']}])
+        self.assertEqual(Event.objects.get(pk=first.pk).capacity, 10)
+
+class TestEventFilters(APITestCase):
+    """
+        This class tests filtering the event listings by date, type and status,
+        and that the filtered, paginated queries are served by indexes.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.now = timezone.now()
+        specs = [(-2, 'Concert', 'Open'), (1, 'Concert', 'Open'), (3, 'Talk', 'Open'), (5, 'Talk', 'Cancelled')]
+        self.events = Event.objects.bulk_create([
+            Event(
+                creator=self.user,
+                title='Event %d' % i,
+                description='Description',
+                date=self.now + timedelta(days=days),
+                type=event_type,
+                status=event_status,
+                capacity=10
+            )
+            for i, (days, event_type, event_status) in enumerate(specs)
+        ])
+
+    def titles(self, query, url_name='all-event-list'):
+        response = self.client.get(reverse(url_name) + query, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [event['title'] for event in response.data['results']]
+
+    def test_filters(self):
+        """
+            Test each filter on both list views.
+        """
+        for url_name in ('all-event-list', 'event-list'):
+            self.assertEqual(self.titles('?type=Talk', url_name), ['Event 2', 'Event 3'])
+            self.assertEqual(self.titles('?status=Cancelled', url_name), ['Event 3'])
+            self.assertEqual(self.titles('?upcoming=true', url_name), ['Event 1', 'Event 2', 'Event 3'])
+            self.assertEqual(self.titles('?upcoming=false', url_name), ['Event 0'])
+            self.assertEqual(self.titles('?type=Concert&upcoming=1', url_name), ['Event 1'])
+
+    def test_date_range(self):
+        """
+            Test that date bounds are inclusive and accept dates as well as datetimes.
+        """
+        date_from = (self.now + timedelta(days=1)).date().isoformat()
+        date_to = (self.now + timedelta(days=3)).date().isoformat()
+        self.assertEqual(self.titles('?date_from=%s&date_to=%s' % (date_from, date_to)), ['Event 1', 'Event 2'])
+
+        response = self.client.get(reverse('all-event-list') + '?date_from=tomorrow', format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return ' '.join(str(row[-1]) for row in cursor.fetchall())
+
+    def test_queries_use_indexes(self):
+        """
+            Test with EXPLAIN QUERY PLAN that filtered pages are read from the
+            composite indexes in (date, id) order, without a sort step.
+        """
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN output is SQLite specific')
+
+        paginator = EventPagination()
+        position = [str(self.now), '2']
+        cases = [
+            (Event.objects.all(), 'event_date_id_idx'),
+            (Event.objects.filter(type='Talk'), 'event_type_date_idx'),
+            (Event.objects.filter(status='Open', date__gte=self.now), 'event_status_date_idx'),
+            (Event.objects.filter(creator=self.user), 'event_creator_date_idx'),
+        ]
+        for queryset, index in cases:
+            for page, reverse in ((None, False), (position, False), (position, True)):
+                plan = self.query_plan(paginator.get_page_queryset(queryset, page, reverse)[:100])
+                self.assertIn(index, plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+
+class TestEventListCache(APITestCase):
+    """
+        This class tests the versioned cache of the event listings.
+        It includes tests for cache hits, conditional GETs and invalidation when
+        events or their attendees change.
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.event = Event.objects.create(
+            creator=self.user,
+            title='Test Event',
+            description='Test Description',
+            date=timezone.now() + timedelta(days=1),
+            type='Test Type',
+            status='Test Status',
+            capacity=10
+        )
+        self.url = reverse('all-event-list')
+
+    def test_second_request_is_served_from_cache(self):
+        """
+            Test that a repeated listing runs no queries and is counted as a hit.
+        """
+        first = self.client.get(self.url, format='json')
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, format='json')
+
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertEqual(event_cache.stats(), {'hit': 1, 'miss': 1, 'not_modified': 0})
+
+    def test_conditional_get(self):
+        """
+            Test that an unchanged listing revalidates with 304 and no queries.
+        """
+        first = self.client.get(self.url, format='json')
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, format='json', HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], first['ETag'])
+
+    def test_if_modified_since_is_not_trusted(self):
+        """
+            Test that a listing changed within the second of the previous fetch
+            is not answered with 304 for If-Modified-Since.
+        """
+        first = self.client.get(self.url, format='json')
+        self.assertNotIn('Last-Modified', first)
+        self.event.title = 'Renamed'
+        self.event.save()
+
+        response = self.client.get(self.url, format='json', HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['title'], 'Renamed')
+
+    def test_upcoming_listing_follows_the_clock(self):
+        """
+            Test that an event leaves a cached `upcoming` listing once it has
+            started, with no write to invalidate the cache.
+        """
+        now = timezone.now()
+        self.event.date = now + timedelta(seconds=30)
+        self.event.save()
+        first = self.client.get(self.url, {'upcoming': 'true'}, format='json')
+        self.assertEqual(len(first.data['results']), 1)
+
+        later = now + timedelta(seconds=settings.EVENT_LIST_CACHE_WINDOW + 30)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            response = self.client.get(self.url, {'upcoming': 'true'}, format='json',
+                                       HTTP_IF_NONE_MATCH=first['ETag'])
+            unfiltered = self.client.get(self.url, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(len(unfiltered.data['results']), 1)
+
+    def test_changes_invalidate(self):
+        """
+            Test that saving an event, registering and changing attendees each
+            produce a fresh listing.
+        """
+        def etag():
+            return self.client.get(self.url, format='json')['ETag']
+
+        seen = [etag()]
+        self.event.title = 'Renamed'
+        self.event.save()
+        seen.append(etag())
+        Event.objects.register(self.event.pk, self.user)
+        seen.append(etag())
+        self.event.attendees.clear()
+        seen.append(etag())
+        Event.objects.filter(pk=self.event.pk).delete()
+        seen.append(etag())
+
+        self.assertEqual(len(set(seen)), len(seen))
+        self.assertEqual(self.client.get(self.url, format='json').data['results'], [])
+
+    def test_own_events_are_cached_per_user(self):
+        """
+            Test that one user's cached list of own events is not served to another.
+        """
+        other = User.objects.create_user(username='testuser2', password='testpass2')
+        self.client.force_authenticate(user=self.user)
+        mine = self.client.get(reverse('event-list'), format='json')
+        self.client.force_authenticate(user=other)
+        theirs = self.client.get(reverse('event-list'), format='json')
+
+        self.assertEqual(len(mine.data['results']), 1)
+        self.assertEqual(len(theirs.data['results']), 0)
+
+    def test_stats_require_admin(self):
+        """
+            Test that cache counters are only exposed to staff.
+        """
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.get(reverse('cache-stats')).status_code, status.HTTP_403_FORBIDDEN)
+        self.user.is_staff = True
+        self.assertEqual(self.client.get(reverse('cache-stats')).data, event_cache.stats())
+
+
+class TestAsyncViews(TransactionTestCase):
+    """
+        This class tests the async-native event endpoints against their DRF counterparts.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.other = User.objects.create_user(username='testuser2', password='testpass2')
+        self.event = Event.objects.create(
+            creator=self.user,
+            title='Test Event',
+            description='Test Description',
+            date=timezone.now() + timedelta(days=1),
+            type='Test Type',
+            status='Test Status',
+            capacity=1
+        )
+        self.event.attendees.add(self.other)
+        Event.objects.create(
+            creator=self.other, title='Other Event', description='', date=timezone.now() + timedelta(days=2),
+            type='Test Type', status='Test Status', capacity=5
+        )
+        self.token = 'Bearer %s' % RefreshToken.for_user(self.user).access_token
+        self.auth = {'HTTP_AUTHORIZATION': self.token}
+
+    def async_request(self, method, url, token=True, **kwargs):
+        async def request():
+            headers = {'Authorization': self.token if token is True else token} if token else {}
+            return await getattr(self.async_client, method)(url, headers=headers, **kwargs)
+        return async_to_sync(request)()
+
+    def test_payloads_match_sync_views(self):
+        """
+            Test that the async list and detail views return the same events as the DRF views.
+        """
+        for sync_name, async_name in (('all-event-list', 'async-all-event-list'), ('event-list', 'async-event-list')):
+            expected = self.client.get(reverse(sync_name) + '?type=Test+Type', **self.auth).json()
+            response = self.async_request('get', reverse(async_name) + '?type=Test+Type')
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json()['results'], expected['results'])
+
+        expected = self.client.get(reverse('event-detail', kwargs={'pk': self.event.pk}), **self.auth).json()
+        response = self.async_request('get', reverse('async-event-detail', kwargs={'pk': self.event.pk}))
+        self.assertEqual(response.json(), expected)
+
+    def test_pagination(self):
+        """
+            Test that the async list follows the same cursors as the DRF list.
+        """
+        first = self.async_request('get', reverse('async-all-event-list') + '?page_size=1').json()
+        second = self.async_request('get', first['next']).json()
+
+        self.assertEqual([event['title'] for event in first['results'] + second['results']],
+                         ['Test Event', 'Other Event'])
+        self.assertIsNone(second['next'])
+
+    def test_authentication(self):
+        """
+            Test that own-event views require a valid token while the list of all events does not.
+        """
+        anonymous = self.async_request('get', reverse('async-event-list'), token=None)
+        invalid = self.async_request('get', reverse('async-event-list'), token='Bearer x')
+        public = self.async_request('get', reverse('async-all-event-list'), token=None)
+
+        self.assertEqual(anonymous.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(invalid.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(public.status_code, status.HTTP_200_OK)
+
+    def test_register_and_unregister(self):
+        """
+            Test seat accounting through the async registration view.
+        """
+        url = reverse('async-event-register')
+        other_event = Event.objects.get(title='Other Event')
+
+        full = self.async_request('post', url, data={'event_id': self.event.id}, content_type='application/json')
+        first = self.async_request('post', url, data={'event_id': other_event.id}, content_type='application/json')
+        again = self.async_request('post', url, data={'event_id': other_event.id}, content_type='application/json')
+        self.assertEqual(full.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(first.json(), {'message': 'Registered successfully'})
+        self.assertEqual(again.json(), {'message': 'Already registered'})
+        self.assertEqual(Event.objects.get(pk=other_event.pk).registered_count, 1)
+
+        response = self.async_request('delete', url + '?event_id=%d' % other_event.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Event.objects.get(pk=other_event.pk).registered_count, 0)
+        self.assertFalse(other_event.attendees.exists())
+
+    def test_registration_is_atomic(self):
+        """
+            Test that a registration failing after its seat claim leaves the seat
+            count and the attendee links in step.
+        """
+        other_event = Event.objects.get(title='Other Event')
+        # The through row is the only object a registration creates.
+        with mock.patch('django.db.models.query.QuerySet.create', side_effect=RuntimeError), \
+                self.assertRaises(RuntimeError):
+            async_to_sync(Event.objects.aregister)(other_event.pk, self.user)
+
+        self.assertEqual(Event.objects.get(pk=other_event.pk).registered_count, 0)
+        self.assertFalse(other_event.attendees.exists())
+
+
+class TestLiveSeats(TransactionTestCase):
+    """
+        This class tests the live seat updates streamed over ASGI, using the
+        project's ASGI application on the test's event loop as a single worker.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        event_live.reset()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.events = [
+            Event.objects.create(
+                creator=self.user,
+                title='Event %d' % i,
+                description='Test Description',
+                date=timezone.now() + timedelta(days=1),
+                type='Test Type',
+                status='Test Status',
+                capacity=1000
+            )
+            for i in range(2)
+        ]
+        self.attendees = [User.objects.create(username='attendee%d' % i) for i in range(3)]
+
+    def tearDown(self):
+        event_live.reset()
+
+    async def open_stream(self, query_string=''):
+        """
+            Start a GET of /live/seats/ and return the application task and the
+            queue of ASGI messages it sends.
+        """
+        from event_manager.asgi import application
+
+        messages = asyncio.Queue()
+        requested = []
+
+        async def receive():
+            if not requested:
+                requested.append(True)
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await asyncio.Event().wait()
+
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': reverse('live-seats'), 'raw_path': reverse('live-seats').encode(),
+            'query_string': query_string.encode(), 'root_path': '', 'headers': [(b'host', b'testserver')],
+            'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+        }
+        return asyncio.create_task(application(scope, receive, messages.put)), messages
+
+    async def next_message(self, messages):
+        while True:
+            message = await asyncio.wait_for(messages.get(), timeout=5)
+            if message['type'] == 'http.response.body' and message['body'].startswith(b'event: seats'):
+                return json.loads(message['body'].decode().split('data: ', 1)[1])
+
+    async def close(self, tasks):
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def test_many_subscribers_on_one_worker(self):
+        """
+            Test that one worker streams a coalesced update to hundreds of
+            subscribers when registrations change an event's seats.
+        """
+        broker = event_live.get_broker()
+        streams = [await self.open_stream() for _ in range(200)]
+        try:
+            while len(broker.subscriptions) < len(streams):
+                await asyncio.sleep(0.01)
+            for start in [await messages.get() for _, messages in streams]:
+                self.assertEqual(start['status'], 200)
+                self.assertIn((b'Content-Type', b'text/event-stream'), start['headers'])
+
+            for attendee in self.attendees:
+                await Event.objects.aregister(self.events[0].pk, attendee)
+
+            received = await asyncio.gather(*(self.next_message(messages) for _, messages in streams))
+            expected = [{'id': self.events[0].pk, 'capacity': 1000, 'attendee_count': 3, 'seats_left': 997}]
+            self.assertEqual(received, [expected] * len(streams))
+            # The three registrations were coalesced into that one message.
+            await asyncio.sleep(settings.LIVE_COALESCE_SECONDS * 2)
+            self.assertTrue(all(messages.empty() for _, messages in streams))
+        finally:
+            await self.close([task for task, _ in streams])
+
+        self.assertEqual(broker.subscriptions, set())
+
+    async def test_stream_for_some_events(self):
+        """
+            Test that a stream for chosen events starts with their current counts
+            and only carries updates for them.
+        """
+        task, messages = await self.open_stream('events=%d' % self.events[1].pk)
+        try:
+            first = await self.next_message(messages)
+            self.assertEqual(first[0]['attendee_count'], 0)
+
+            await Event.objects.aregister(self.events[0].pk, self.attendees[0])
+            await asyncio.sleep(settings.LIVE_COALESCE_SECONDS * 2)
+            await Event.objects.aregister(self.events[1].pk, self.attendees[0])
+            update = await self.next_message(messages)
+            self.assertEqual([(row['id'], row['attendee_count']) for row in update], [(self.events[1].pk, 1)])
+        finally:
+            await self.close([task])
+
+    def test_registration_views_publish_after_commit(self):
+        """
+            Test that registering and unregistering through the API publish the
+            event's id to the broker once the change is committed.
+        """
+        auth = {'HTTP_AUTHORIZATION': 'Bearer %s' % RefreshToken.for_user(self.attendees[0]).access_token}
+        event_id = self.events[0].pk
+        with mock.patch.object(event_live, 'get_broker') as get_broker:
+            publish = get_broker.return_value.publish
+            with transaction.atomic():
+                Event.objects.register(event_id, self.attendees[1])
+                publish.assert_not_called()
+            publish.assert_called_once_with([event_id])
+
+            self.client.post(reverse('event-register'), {'event_id': event_id}, **auth)
+            self.client.delete(reverse('event-register') + '?event_id=%d' % event_id, **auth)
+
+        self.assertEqual(publish.call_args_list, [mock.call([event_id])] * 3)
+
+    async def test_needs_asgi(self):
+        """
+            Test that the stream is refused outside ASGI and that invalid event
+            ids are rejected.
+        """
+        response = await sync_to_async(self.client.get)(reverse('live-seats'))
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+        response = await self.async_client.get(reverse('live-seats'), {'events': 'one'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class TestEventPagination(APITestCase):
+    """
+        This class tests keyset pagination of the event listings.
+        It includes tests for walking pages forwards and backwards, ordering by
+        (date, id), the page size parameter and rejecting malformed cursors.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        start_date = timezone.now() + timedelta(days=1)
+        # Pairs of events share a date so the id tie-breaker is exercised.
+        Event.objects.bulk_create([
+            Event(
+                creator=self.user,
+                title='Event %d' % i,
+                description='Description',
+                date=start_date + timedelta(hours=i // 2),
+                type='Type',
+                status='Status',
+                capacity=10
+            )
+            for i in range(25)
+        ])
+        self.expected = list(Event.objects.order_by('date', 'id').values_list('id', flat=True))
+
+    def test_walk_all_pages_forward(self):
+        """
+            Test that following the next links returns every event exactly once, in order.
+        """
+        url = reverse('all-event-list') + '?page_size=10'
+        seen = []
+        pages = 0
+        while url:
+            response = self.client.get(url, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(event['id'] for event in response.data['results'])
+            url = response.data['next']
+            pages += 1
+
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(pages, 3)
+
+    def test_walk_back_with_previous(self):
+        """
+            Test that the previous link returns the page before the current one.
+        """
+        url = reverse('all-event-list') + '?page_size=10'
+        first = self.client.get(url, format='json')
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'], format='json')
+        back = self.client.get(second.data['previous'], format='json')
+
+        self.assertEqual([event['id'] for event in second.data['results']], self.expected[10:20])
+        self.assertEqual([event['id'] for event in back.data['results']], self.expected[:10])
+        self.assertIsNone(back.data['previous'])
+
+    def test_own_events_are_paginated(self):
+        """
+            Test that the list of the user's own events is paginated by default.
+        """
+        response = self.client.get(reverse('event-list') + '?page_size=5', format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([event['id'] for event in response.data['results']], self.expected[:5])
+        self.assertIsNotNone(response.data['next'])
+
+    def test_invalid_cursor(self):
+        """
+            Test that a malformed cursor is rejected.
+        """
+        response = self.client.get(reverse('all-event-list') + '?cursor=bm9wZQ==', format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestEventListQueries(APITestCase):
+    """
+        This class tests that listing events costs a fixed number of queries,
+        however many events and attendees are on the page.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.attendees = [User(username='attendee%d' % i) for i in range(3)]
+        User.objects.bulk_create(self.attendees)
+        self.attendees = list(User.objects.filter(username__startswith='attendee'))
+
+    def create_events(self, count):
+        start_date = timezone.now() + timedelta(days=1)
+        events = Event.objects.bulk_create([
+            Event(
+                creator=self.user,
+                title='Event %d' % i,
+                description='Description',
+                date=start_date + timedelta(hours=i),
+                type='Type',
+                status='Status',
+                capacity=10
+            )
+            for i in range(count)
+        ])
+        Event.attendees.through.objects.bulk_create([
+            Event.attendees.through(event_id=event.id, user_id=attendee.id)
+            for event in events for attendee in self.attendees
+        ])
+        Event.objects.refresh_registered_count()
+
+    def count_queries(self, url_name):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse(url_name), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries), response
+
+    def test_query_count_is_constant(self):
+        """
+            Test that both list views use the same number of queries for 5 and 50 events.
+        """
+        for url_name in ('all-event-list', 'event-list'):
+            Event.objects.all().delete()
+            self.create_events(5)
+            small, _ = self.count_queries(url_name)
+            self.create_events(45)
+            large, response = self.count_queries(url_name)
+
+            self.assertEqual(small, large)
+            self.assertEqual(len(response.data['results']), 50)
+
+    def test_count_instead_of_attendees(self):
+        """
+            Test that events carry their attendee count and whether the current
+            user is registered, but not the attendee ids.
+        """
+        self.create_events(2)
+        Event.objects.register(Event.objects.order_by('date').first().pk, self.user)
+        _, response = self.count_queries('all-event-list')
+
+        first, second = response.data['results']
+        self.assertNotIn('attendees', first)
+        self.assertEqual(first['attendee_count'], len(self.attendees) + 1)
+        self.assertEqual(second['attendee_count'], len(self.attendees))
+        self.assertEqual([first['is_registered'], second['is_registered']], [True, False])
+
+    def test_registration_flags_cost_one_query(self):
+        """
+            Test that `is_registered` is worked out with one query per page, and
+            is recomputed per user when the page comes from the cache.
+        """
+        self.create_events(20)
+        cache.clear()
+        authenticated, response = self.count_queries('all-event-list')
+        self.assertFalse(any(event['is_registered'] for event in response.data['results']))
+        self.client.force_authenticate(user=None)
+        anonymous, _ = self.count_queries('all-event-list')
+        cache.clear()
+        uncached, _ = self.count_queries('all-event-list')
+
+        # Authentication is forced, so the only difference is the flags query.
+        self.assertEqual(authenticated, uncached + 1)
+        self.assertEqual(anonymous, 0)
+
+        self.client.force_authenticate(user=self.attendees[0])
+        _, response = self.count_queries('all-event-list')
+        self.assertTrue(all(event['is_registered'] for event in response.data['results']))
+
+    def test_fast_path_matches_event_serializer(self):
+        """
+            Test that the list views return the same events as EventSerializer.
+        """
+        self.create_events(3)
+        Event.objects.register(Event.objects.order_by('date').first().pk, self.user)
+        request = mock.Mock(user=self.user)
+        expected = json.loads(json.dumps(
+            EventSerializer(Event.objects.order_by('date', 'id'), many=True, context={'request': request}).data,
+        ))
+
+        token = str(RefreshToken.for_user(self.user).access_token)
+        for url_name in ('all-event-list', 'event-list', 'async-all-event-list', 'async-event-list'):
+            response = self.client.get(reverse(url_name), HTTP_AUTHORIZATION='Bearer %s' % token)
+            self.assertEqual(response.json()['results'], expected, url_name)
+
+    def test_sparse_fieldset(self):
+        """
+            Test that `fields` restricts both the returned fields and the selected columns.
+        """
+        self.create_events(2)
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('all-event-list'), {'fields': 'title,date'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([list(event) for event in response.data['results']], [['id', 'title', 'date']] * 2)
+        select, = [query['sql'] for query in context.captured_queries if '"event_app_event"."title"' in query['sql']]
+        self.assertNotIn('"description"', select)
+        self.assertNotIn('event_app_event_attendees', ' '.join(query['sql'] for query in context.captured_queries))
+
+        response = self.client.get(reverse('async-all-event-list'), {'fields': 'attendee_count'})
+        self.assertEqual([list(event) for event in response.json()['results']], [['id', 'attendee_count']] * 2)
+
+    def test_unknown_field(self):
+        """
+            Test that asking for a field events do not have is rejected.
+        """
+        for url_name in ('all-event-list', 'async-all-event-list'):
+            response = self.client.get(reverse(url_name), {'fields': 'title,password'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('password', response.json()['fields'][0])
+
+
+class TestMyRegistrations(APITestCase):
+    """
+        This class tests the listing of the events the current user is registered for.
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.other_user = User.objects.create_user(username='otheruser', password='testpass')
+        self.url = reverse('my-registrations')
+        self.client.force_authenticate(user=self.user)
+
+    def create_events(self, count, days=1, attendees=()):
+        start_date = timezone.now() + timedelta(days=days)
+        events = Event.objects.bulk_create([
+            Event(
+                creator=self.other_user,
+                title='Event %d' % i,
+                description='Description',
+                date=start_date + timedelta(hours=i),
+                type='Type',
+                status='Status',
+                capacity=10
+            )
+            for i in range(count)
+        ])
+        Event.attendees.through.objects.bulk_create([
+            Event.attendees.through(event_id=event.id, user_id=user.id)
+            for event in events for user in attendees
+        ])
+        return events
+
+    def ids(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [event['id'] for event in response.data['results']]
+
+    def test_lists_only_own_registrations(self):
+        """
+            Test that the user sees the events they attend, by date, and that
+            upcoming/past filter them.
+        """
+        upcoming = self.create_events(2, attendees=[self.user])
+        past = self.create_events(1, days=-1, attendees=[self.user, self.other_user])
+        self.create_events(2, attendees=[self.other_user])
+
+        self.assertEqual(self.ids(), [event.pk for event in past + upcoming])
+        self.assertEqual(self.ids(upcoming='true'), [event.pk for event in upcoming])
+        self.assertEqual(self.ids(upcoming='false'), [event.pk for event in past])
+
+        response = self.client.get(self.url)
+        self.assertTrue(all(event['is_registered'] for event in response.data['results']))
+
+    def test_query_count_is_constant(self):
+        """
+            Test that a page costs the same number of queries for 5 and 50 registrations.
+        """
+        def count():
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                self.client.get(self.url)
+            return len(context.captured_queries)
+
+        self.create_events(5, attendees=[self.user])
+        small = count()
+        self.create_events(45, attendees=[self.user])
+        self.assertEqual(count(), small)
+
+    def test_cached_per_user(self):
+        """
+            Test that each user gets their own registrations from the cache.
+        """
+        mine = self.create_events(1, attendees=[self.user])
+        theirs = self.create_events(1, attendees=[self.other_user])
+        self.assertEqual(self.ids(), [mine[0].pk])
+        self.client.force_authenticate(user=self.other_user)
+        self.assertEqual(self.ids(), [theirs[0].pk])
+
+    def test_requires_authentication(self):
+        """
+            Test that anonymous users are refused.
+        """
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TestEventAttendees(APITestCase):
+    """
+        This class tests the paginated attendee list of an event.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.event = Event.objects.create(
+            creator=self.user,
+            title='Test Event',
+            description='Test Description',
+            date=timezone.now() + timedelta(days=1),
+            type='Test Type',
+            status='Test Status',
+            capacity=10
+        )
+        self.attendees = [User.objects.create(username='attendee%d' % i) for i in range(5)]
+        for attendee in reversed(self.attendees):
+            Event.objects.register(self.event.pk, attendee)
+        self.url = reverse('event-attendees', kwargs={'pk': self.event.pk})
+
+    def test_pages_in_registration_order(self):
+        """
+            Test that following `next` lists every attendee once, in the order
+            they registered, with a fixed number of queries per page.
+        """
+        ids = []
+        url = self.url + '?page_size=2'
+        while url:
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(attendee['id'] for attendee in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(ids, [attendee.pk for attendee in reversed(self.attendees)])
+
+    def test_missing_event(self):
+        """
+            Test that the attendees of an event that does not exist are a 404.
+        """
+        response = self.client.get(reverse('event-attendees', kwargs={'pk': self.event.pk + 1}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestEventSearch(APITestCase):
+    """
+        This class tests full-text search over event titles and descriptions.
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.url = reverse('event-search')
+
+    def create_event(self, title, description='Description'):
+        return Event.objects.create(
+            creator=self.user,
+            title=title,
+            description=description,
+            date=timezone.now() + timedelta(days=1),
+            type='Type',
+            status='Status',
+            capacity=10
+        )
+
+    def search(self, q, **params):
+        response = self.client.get(self.url, dict(params, q=q), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [event['title'] for event in response.data['results']]
+
+    def test_ranking(self):
+        """
+            Test that a title match ranks above a description match, and that
+            every word has to match.
+        """
+        self.create_event('Garden party', 'Bring a jazz record')
+        self.create_event('Jazz night', 'Live music')
+        self.create_event('Board games', 'Nothing to see here')
+
+        self.assertEqual(self.search('jazz'), ['Jazz night', 'Garden party'])
+        self.assertEqual(self.search('jazz live'), ['Jazz night'])
+        self.assertEqual(self.search('JAZ'), ['Jazz night', 'Garden party'])
+
+    def test_index_follows_changes(self):
+        """
+            Test that saves, queryset updates, bulk creates and deletes are searchable at once.
+        """
+        event = self.create_event('Opera')
+        event.title = 'Ballet'
+        event.save()
+        self.assertEqual(self.search('opera'), [])
+        self.assertEqual(self.search('ballet'), ['Ballet'])
+
+        Event.objects.filter(pk=event.pk).update(description='Swan lake')
+        self.assertEqual(self.search('swan'), ['Ballet'])
+        Event.objects.bulk_create([Event(
+            creator=self.user, title='Swan song', description='Description',
+            date=timezone.now() + timedelta(days=1), type='Type', status='Status', capacity=10,
+        )])
+        self.assertEqual(sorted(self.search('swan')), ['Ballet', 'Swan song'])
+
+        event.delete()
+        self.assertEqual(self.search('swan'), ['Swan song'])
+
+    def test_pagination(self):
+        """
+            Test that ranked results are paged with a cursor without gaps or repeats.
+        """
+        for i in range(5):
+            self.create_event('Concert %d' % i, 'concert ' * i)
+
+        seen = []
+        response = self.client.get(self.url, {'q': 'concert', 'page_size': 2}, format='json')
+        while True:
+            seen.extend(event['id'] for event in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'], format='json')
+
+        expected = list(Event.objects.search('concert').order_by('rank', 'id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_query_syntax_is_not_interpreted(self):
+        """
+            Test that FTS5 operators and quotes in the query neither error nor match everything.
+        """
+        self.create_event('Rock "n" roll')
+        self.assertEqual(self.search('rock AND OR "'), [])
+        self.assertEqual(self.search('"rock"'), ['Rock "n" roll'])
+        self.assertEqual(self.search('*'), [])
+
+    def test_filters_and_missing_query(self):
+        """
+            Test that listing filters apply to search, and that q is required.
+        """
+        self.create_event('Jazz night')
+        self.assertEqual(self.search('jazz', type='Other'), [])
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ranks_the_newest_matches(self):
+        """
+            Test that only the newest EVENT_SEARCH_MAX_CANDIDATES matches are
+            ranked, so an older better match is left out of a common query, and
+            that such results say they are truncated.
+        """
+        self.create_event('Jazz jazz jazz')
+        self.create_event('Garden party', 'Bring a jazz record')
+        self.create_event('Board games', 'Some jazz later')
+
+        with self.settings(EVENT_SEARCH_MAX_CANDIDATES=2):
+            self.assertEqual(sorted(self.search('jazz')), ['Board games', 'Garden party'])
+            self.assertEqual(sorted(self.search('jazz jazz')), ['Board games', 'Garden party'])
+            response = self.client.get(self.url, {'q': 'jazz', 'page_size': 1}, format='json')
+            self.assertTrue(response.data['truncated'])
+            self.assertTrue(self.client.get(response.data['next'], format='json').data['truncated'])
+            self.assertFalse(self.client.get(self.url, {'q': 'jazz record'}, format='json').data['truncated'])
+        cache.clear()
+        self.assertEqual(self.search('jazz')[0], 'Jazz jazz jazz')
+        self.assertFalse(self.client.get(self.url, {'q': 'jazz'}, format='json').data['truncated'])
+
+    def test_index_triggers_are_installed(self):
+        """
+            Test that the migrated database has the triggers that keep the index
+            in sync, and that the system check reports them once dropped (as
+            remaking event_app_event in a migration does).
+        """
+        self.assertEqual(event_search.missing_triggers(connection), [])
+        self.assertEqual(event_search.check_triggers(databases=['default']), [])
+
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER %s_au' % event_search.FTS_TABLE)
+        self.assertEqual(event_search.missing_triggers(connection), ['%s_au' % event_search.FTS_TABLE])
+        self.assertEqual([error.id for error in event_search.check_triggers(databases=['default'])],
+                         ['event_app.E001'])
+
+
+
+class TestSearchMigrations(TransactionTestCase):
+    """
+        This class tests that databases migrated before the search index can
+        still be upgraded.
+    """
+    def test_upgrade_from_before_the_index(self):
+        """
+            Test that `migrate`, with its system checks, upgrades a database
+            migrated to 0003 and leaves the index triggers installed.
+        """
+        self.addCleanup(call_command, 'migrate', verbosity=0)
+        call_command('migrate', 'event_app', '0003', verbosity=0)
+        self.assertNotIn(event_search.FTS_TABLE, connection.introspection.table_names())
+        self.assertEqual(event_search.check_triggers(databases=['default']), [])
+
+        call_command('migrate', verbosity=0, skip_checks=False)
+        self.assertEqual(event_search.missing_triggers(connection), [])
+
+class TestEventExport(APITestCase):
+    """
+        This class tests the streaming NDJSON/CSV event export and the
+        export_events management command.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        start_date = timezone.now() + timedelta(days=1)
+        self.events = Event.objects.bulk_create([
+            Event(
+                creator=self.user,
+                title='Event, %d' % i,
+                description='Description',
+                date=start_date + timedelta(hours=i),
+                type='Type',
+                status='Status',
+                capacity=10
+            )
+            for i in range(5)
+        ])
+        Event.objects.register(self.events[0].pk, self.user)
+        self.url = reverse('event-export')
+
+    def read(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        """
+            Test that every event is exported as one JSON line, in id order.
+        """
+        lines = self.read(self.client.get(self.url)).splitlines()
+        rows = [json.loads(line) for line in lines]
+
+        self.assertEqual([row['id'] for row in rows], [event.id for event in self.events])
+        self.assertEqual(rows[0]['attendee_count'], 1)
+        self.assertEqual(rows[0]['creator'], self.user.id)
+        self.assertNotIn('attendees', rows[0])
+
+    def test_asgi_streams_chunk_by_chunk(self):
+        """
+            Test that under ASGI the export is an async stream read one chunk at
+            a time, rather than a sync iterator Django would collect into a list.
+        """
+        async def export():
+            response = await self.async_client.get(self.url)
+            return response, [part async for part in response.streaming_content]
+
+        with self.settings(EVENT_EXPORT_CHUNK_SIZE=2):
+            response, parts = async_to_sync(export)()
+
+        self.assertTrue(response.is_async)
+        self.assertEqual(len(parts), 3)
+        rows = [json.loads(line) for line in b''.join(parts).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [event.id for event in self.events])
+
+    def test_csv_with_attendees(self):
+        """
+            Test that the CSV export has a header row and space-separated attendee ids.
+        """
+        response = self.client.get(self.url, {'format': 'csv', 'attendees': 'true'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(self.read(response))))
+
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['title'], 'Event, 0')
+        self.assertEqual(rows[0]['attendees'], str(self.user.id))
+        self.assertEqual(rows[1]['attendees'], '')
+
+    def test_filters(self):
+        """
+            Test that the export honours the listing filters.
+        """
+        date_to = self.events[1].date.isoformat()
+        lines = self.read(self.client.get(self.url, {'date_to': date_to})).splitlines()
+        self.assertEqual(len(lines), 2)
+
+    def test_attendees_are_fetched_per_chunk(self):
+        """
+            Test that attendee ids cost one query per chunk of events.
+        """
+        with self.settings(EVENT_EXPORT_CHUNK_SIZE=2):
+            response = self.client.get(self.url, {'attendees': 'true'})
+            with CaptureQueriesContext(connection) as context:
+                lines = self.read(response).splitlines()
+
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(len(context.captured_queries), 1 + 3)
+
+    def test_command(self):
+        """
+            Test that export_events writes the same rows as the endpoint.
+        """
+        output = io.StringIO()
+        call_command('export_events', '--attendees', stdout=output)
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['attendees'], [self.user.id])
+
+
+class TestEventImport(APITestCase):
+    """
+        This class tests the import_events management command.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.attendee = User.objects.create_user(username='attendee', password='testpass')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.date = (timezone.now() + timedelta(days=1)).isoformat()
+
+    def row(self, i, **kwargs):
+        row = {'creator': self.user.id, 'title': 'Imported %d' % i, 'description': 'Description', 'date': self.date,
+               'type': 'Type', 'status': 'Status', 'capacity': 10, 'attendees': [self.attendee.id]}
+        row.update(kwargs)
+        return row
+
+    def write(self, name, rows):
+        path = self.directory / name
+        path.write_text(''.join(json.dumps(row) + '\n' for row in rows))
+        return str(path)
+
+    def test_round_trip(self):
+        """
+            Test that events exported as NDJSON or CSV import with their attendees.
+        """
+        events = Event.objects.bulk_create([
+            Event(creator=self.user, title='Event %d' % i, description='Description',
+                  date=timezone.now() + timedelta(days=1), type='Type', status='Status', capacity=10)
+            for i in range(3)
+        ])
+        Event.objects.register(events[0].pk, self.attendee)
+        paths = [str(self.directory / ('events.%s' % format)) for format in ('ndjson', 'csv')]
+        for path in paths:
+            call_command('export_events', format=path.rsplit('.', 1)[1], attendees=True, output=path)
+        for path in paths:
+            call_command('import_events', path, stdout=io.StringIO())
+
+        imported = Event.objects.exclude(pk__in=[event.pk for event in events]).order_by('id')
+        self.assertEqual([event.title for event in imported], ['Event 0', 'Event 1', 'Event 2'] * 2)
+        self.assertEqual([event.registered_count for event in imported], [1, 0, 0] * 2)
+        self.assertEqual(imported[0].attendees.get(), self.attendee)
+
+    def test_resume_after_invalid_row(self):
+        """
+            Test that an invalid row stops the import after the last full batch,
+            and that --resume continues from there without duplicating events.
+        """
+        rows = [self.row(i) for i in range(5)]
+        rows[3]['attendees'] = [0]
+        path = self.write('events.ndjson', rows)
+
+        with self.assertRaisesMessage(CommandError, 'Row 4 is invalid'):
+            call_command('import_events', path, batch_size=2, stdout=io.StringIO())
+        self.assertEqual(Event.objects.count(), 2)
+        with self.assertRaisesMessage(CommandError, '--resume'):
+            call_command('import_events', path, stdout=io.StringIO())
+
+        rows[3]['attendees'] = []
+        self.write('events.ndjson', rows)
+        output = io.StringIO()
+        call_command('import_events', path, batch_size=2, resume=True, stdout=output)
+
+        self.assertIn('Resuming after row 2.', output.getvalue())
+        self.assertEqual(list(Event.objects.order_by('id').values_list('title', flat=True)),
+                         ['Imported %d' % i for i in range(5)])
+        self.assertTrue(ImportProgress.objects.get(name=path).complete)
+
+        call_command('import_events', path, restart=True, stdout=io.StringIO())
+        self.assertEqual(Event.objects.count(), 10)
+
+    def test_checkpoint_commits_with_its_batch(self):
+        """
+            Test that an import interrupted while saving its checkpoint rolls the
+            batch back with it, so --resume neither repeats nor skips rows.
+        """
+        path = self.write('events.ndjson', [self.row(i) for i in range(5)])
+        save = Checkpoint.save
+
+        def interrupted(checkpoint):
+            if checkpoint.rows > 2:
+                raise KeyboardInterrupt
+            save(checkpoint)
+
+        with mock.patch.object(Checkpoint, 'save', interrupted), self.assertRaises(KeyboardInterrupt):
+            call_command('import_events', path, batch_size=2, stdout=io.StringIO())
+        self.assertEqual(Event.objects.count(), 2)
+        self.assertEqual(ImportProgress.objects.get(name=path).rows, 2)
+
+        call_command('import_events', path, batch_size=2, resume=True, stdout=io.StringIO())
+        self.assertEqual(list(Event.objects.order_by('id').values_list('title', flat=True)),
+                         ['Imported %d' % i for i in range(5)])
+
+    def test_repeated_attendee_is_an_invalid_row(self):
+        """
+            Test that a row listing an attendee twice is reported as invalid
+            rather than failing the import.
+        """
+        path = self.write('events.ndjson', [self.row(0), self.row(1, attendees=[self.attendee.id] * 2)])
+        with self.assertRaisesMessage(CommandError, 'Row 2 is invalid: {"attendees": ["Repeated attendees: %d.'
+                                      % self.attendee.id):
+            call_command('import_events', path, stdout=io.StringIO())
+
+        errors = io.StringIO()
+        call_command('import_events', path, restart=True, skip_invalid=True, stdout=io.StringIO(), stderr=errors)
+        self.assertEqual(list(Event.objects.values_list('title', flat=True)), ['Imported 0'])
+        self.assertIn('Skipped row 2', errors.getvalue())
+
+    def test_skip_invalid(self):
+        """
+            Test that --skip-invalid reports bad rows and imports the others.
+        """
+        path = self.write('events.ndjson', [self.row(0), self.row(1, capacity=0), self.row(2)])
+        with open(path, 'a') as file:
+            file.write('{not json\n')
+        errors = io.StringIO()
+        call_command('import_events', path, skip_invalid=True, stdout=io.StringIO(), stderr=errors)
+
+        self.assertEqual(Event.objects.count(), 2)
+        self.assertIn('Skipped row 2', errors.getvalue())
+        self.assertIn('Skipped row 4: {"non_field_errors": ["Invalid JSON', errors.getvalue())
+
+    def test_batches_cost_fixed_queries(self):
+        """
+            Test that a batch is validated and written with a fixed number of queries.
+        """
+        path = self.write('events.ndjson', [self.row(i) for i in range(50)])
+        with CaptureQueriesContext(connection) as context:
+            call_command('import_events', path, stdout=io.StringIO())
+
+        self.assertEqual(Event.objects.filter(attendees=self.attendee).count(), 50)
+        # Users, events, attendee links and the checkpoint, inside a savepoint.
+        self.assertLessEqual(len(context.captured_queries), 9)
+
+
+class TestCachedAuthentication(APITestCase):
+    """
+        This class tests that JWT-authenticated requests resolve their user from
+        the cache, and that changes to the user take effect at once.
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer %s' % RefreshToken.for_user(self.user).access_token)
+        self.url = reverse('event-list')
+
+    def test_cached_listing_runs_no_queries(self):
+        """
+            Test that a repeated authenticated listing runs no queries at all.
+        """
+        self.client.get(self.url, format='json')
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deactivation_and_deletion(self):
+        """
+            Test that deactivating or deleting a user rejects their token on the next request.
+        """
+        self.assertEqual(self.client.get(self.url, format='json').status_code, status.HTTP_200_OK)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url, format='json').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.user.is_active = True
+        self.user.save()
+        self.assertEqual(self.client.get(self.url, format='json').status_code, status.HTTP_200_OK)
+        self.user.delete()
+        self.assertEqual(self.client.get(self.url, format='json').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change(self):
+        """
+            Test that a password change replaces the cached user.
+        """
+        self.client.get(self.url, format='json')
+        self.user.set_password('newpass')
+        self.user.save()
+        self.assertIsNone(cache.get(event_auth.USER_KEY % self.user.pk))
+
+        self.client.get(self.url, format='json')
+        self.assertTrue(cache.get(event_auth.USER_KEY % self.user.pk).check_password('newpass'))
+
+
+class TestMetrics(APITestCase):
+    """
+        This class tests the per-endpoint metrics middleware and the /metrics endpoint.
+    """
+    def setUp(self):
+        cache.clear()
+        event_metrics.registry.reset()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+
+    def series(self, name, **labels):
+        text = self.client.get(reverse('metrics')).content.decode()
+        label_text = ','.join('%s="%s"' % item for item in labels.items())
+        for line in text.splitlines():
+            if line.startswith('%s{%s' % (name, label_text)):
+                return float(line.rsplit(' ', 1)[1])
+        return None
+
+    def test_records_per_url_name(self):
+        """
+            Test that requests, their SQL queries and response sizes are recorded per URL name.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('event-list'), format='json')
+        queries = len(context.captured_queries)
+        self.client.get(reverse('event-list'), format='json')
+
+        labels = {'view': 'event-list', 'method': 'GET'}
+        self.assertEqual(self.series('http_request_duration_seconds_count', **labels), 2)
+        self.assertEqual(self.series('http_request_sql_queries_sum', **labels), queries)
+        self.assertEqual(self.series('http_response_size_bytes_sum', **labels), 2 * len(response.content))
+        self.assertEqual(self.series('event_list_cache_requests_total', result='hit'), 1)
+
+    def test_async_views_are_measured(self):
+        """
+            Test that queries run by the async views are counted for their request.
+        """
+        async def request():
+            return await self.async_client.get(reverse('async-all-event-list'))
+        async_to_sync(request)()
+
+        self.assertEqual(self.series('http_request_sql_queries_sum', view='async-all-event-list', method='GET'), 1)
+
+    def test_only_local_clients(self):
+        """
+            Test that /metrics is refused to addresses outside METRICS_ALLOWED_IPS.
+        """
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_slow_request_log(self):
+        """
+            Test that requests over METRICS_SLOW_REQUEST_SECONDS are logged with their SQL.
+        """
+        with self.settings(METRICS_SLOW_REQUEST_SECONDS=0), \
+                self.assertLogs('event_app.slow_requests', level='WARNING') as logs:
+            self.client.get(reverse('event-list'), format='json')
+
+        self.assertIn('(event-list)', logs.output[0])
+        self.assertIn('FROM "event_app_event"', logs.output[0])
+
+
+class TestDatabaseRouting(TransactionTestCase):
+    """
+        This class tests that list views read from the replica, that everything
+        else uses the primary, and that SQLite connections are tuned.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.event = Event.objects.create(
+            creator=self.user,
+            title='Test Event',
+            description='Test Description',
+            date=timezone.now() + timedelta(days=1),
+            type='Test Type',
+            status='Test Status',
+            capacity=10
+        )
+        self.auth = {'HTTP_AUTHORIZATION': 'Bearer %s' % RefreshToken.for_user(self.user).access_token}
+
+    def capture(self, method, url, **kwargs):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(self.client, method)(url, **kwargs)
+        return response, len(primary.captured_queries), len(replica.captured_queries)
+
+    def test_list_views_read_from_replica(self):
+        """
+            Test that listings read events from the replica and authenticate on the primary.
+        """
+        response, primary, replica = self.capture('get', reverse('event-list'), **self.auth)
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertEqual(primary, 1)
+        self.assertGreater(replica, 0)
+
+        response = self.client.get(reverse('event-export'))
+        with CaptureQueriesContext(connections['replica']) as replica:
+            self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 1)
+        self.assertEqual(len(replica.captured_queries), 1)
+
+    def test_writes_and_details_use_primary(self):
+        """
+            Test that registration and detail reads never touch the replica.
+        """
+        response, _, replica = self.capture(
+            'post', reverse('event-register'), data={'event_id': self.event.id}, **self.auth
+        )
+        self.assertEqual(response.json(), {'message': 'Registered successfully'})
+        self.assertEqual(replica, 0)
+        _, _, replica = self.capture('get', reverse('event-detail', kwargs={'pk': self.event.id}), **self.auth)
+        self.assertEqual(replica, 0)
+
+    def test_reads_in_transaction_use_primary(self):
+        """
+            Test that reads inside a transaction on the primary stay on the primary.
+        """
+        with event_routers.replica_reads():
+            self.assertEqual(Event.objects.all().db, 'replica')
+            with transaction.atomic():
+                self.assertEqual(Event.objects.all().db, 'default')
+
+    def test_sqlite_pragmas(self):
+        """
+            Test that new SQLite connections use WAL with the configured busy timeout.
+        """
+        with connections['replica'].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+
+
+
+class TestLoadTesting(TransactionTestCase):
+    """
+        This class tests the synthetic data generator and the load-test harness.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+
+    def test_seed_events_keeps_counts_consistent(self):
+        """
+            Test that seeded events are split into batches and that each event's
+            registered count matches its attendee links.
+        """
+        call_command('seed_events', users=20, events=50, attendees=5, batch_size=16, stdout=io.StringIO())
+
+        self.assertEqual(User.objects.filter(username__startswith='seed-').count(), 20)
+        self.assertEqual(Event.objects.count(), 50)
+        for event in Event.objects.annotate(links=Count('attendees')):
+            self.assertEqual(event.registered_count, event.links)
+            self.assertLessEqual(event.registered_count, event.capacity)
+
+    def test_bench_api_saves_results(self):
+        """
+            Test that bench_api drives the endpoints in process and saves
+            throughput, latency percentiles and queries per request.
+        """
+        call_command('seed_events', users=10, events=20, stdout=io.StringIO())
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / 'results.json'
+            call_command('bench_api', endpoints=['all-event-list', 'event-register'], requests=6,
+                         concurrency=2, warmup=1, output=str(output), stdout=io.StringIO())
+            results = json.loads(output.read_text())
+
+        self.assertEqual(results['mode'], 'in-process')
+        self.assertEqual(set(results['endpoints']), {'all-event-list', 'event-register'})
+        for result in results['endpoints'].values():
+            self.assertEqual(result['count'], 6)
+            self.assertGreater(result['throughput_rps'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertEqual(results['endpoints']['all-event-list']['statuses'], {'200': 6})
+        self.assertGreater(results['endpoints']['event-register']['queries_per_request'], 0)
+
+
+class TestEventArchive(APITestCase):
+    """
+        This class tests moving past events to the archive and reading them back.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        now = timezone.now()
+        self.events = Event.objects.bulk_create([
+            Event(creator=self.user, title='Event %d' % i, description='Description', date=now + timedelta(days=days),
+                  type='Type', status='Status', capacity=10)
+            for i, days in enumerate([-90, -60, -1, 5])
+        ])
+        Event.attendees.through.objects.bulk_create([
+            Event.attendees.through(event_id=event.id, user_id=self.user.id) for event in self.events
+        ])
+        Event.objects.refresh_registered_count()
+
+    def archive(self, *args):
+        output = io.StringIO()
+        call_command('archive_events', *args, stdout=output)
+        return output.getvalue()
+
+    def test_command(self):
+        """
+            Test that events older than --days move to the archive with their
+            attendees, in batches, leaving tombstones for the change feed.
+        """
+        output = self.archive('--days', '30', '--batch-size', '1')
+
+        self.assertIn('Archived 2 events and 2 attendee links', output)
+        self.assertEqual(list(Event.objects.order_by('id').values_list('title', flat=True)), ['Event 2', 'Event 3'])
+        archived = ArchivedEvent.objects.order_by('id')
+        self.assertEqual([event.id for event in archived], [self.events[0].id, self.events[1].id])
+        self.assertEqual([event.registered_count for event in archived], [1, 1])
+        self.assertEqual(list(archived[0].attendees.all()), [self.user])
+        self.assertEqual(archived[0].created_at, self.events[0].created_at)
+        self.assertEqual(set(EventTombstone.objects.values_list('id', flat=True)),
+                         {self.events[0].id, self.events[1].id})
+
+        self.archive('--days', '0')
+        self.assertEqual(list(Event.objects.values_list('title', flat=True)), ['Event 3'])
+
+    def test_batch_costs_fixed_queries(self):
+        """
+            Test that archiving a batch takes the same queries for one event as
+            for several, invalidates the listings once and prunes expired
+            tombstones.
+        """
+        expired = timezone.now() - timedelta(days=settings.EVENT_TOMBSTONE_RETENTION_DAYS + 1)
+        EventTombstone.objects.create(id=10 ** 6, deleted_at=expired)
+        version = event_cache.get_version()
+
+        with CaptureQueriesContext(connection) as one:
+            Event.objects.filter(pk=self.events[0].pk).archive()
+        with CaptureQueriesContext(connection) as two, \
+                mock.patch('event_app.cache.invalidate') as invalidate:
+            Event.objects.filter(pk__in=[self.events[1].pk, self.events[2].pk]).archive()
+
+        self.assertEqual(len(one.captured_queries), len(two.captured_queries))
+        invalidate.assert_called_once_with()
+        self.assertGreater(event_cache.get_version(), version)
+        self.assertEqual(set(EventTombstone.objects.values_list('id', flat=True)),
+                         {event.pk for event in self.events[:3]})
+
+    def test_listings(self):
+        """
+            Test that listings read the live events unless the archive is asked for.
+        """
+        self.archive('--days', '0')
+        token = str(RefreshToken.for_user(self.user).access_token)
+
+        for url_name in ('all-event-list', 'event-list', 'my-registrations', 'async-all-event-list'):
+            live = self.client.get(reverse(url_name), HTTP_AUTHORIZATION='Bearer %s' % token).json()
+            archived = self.client.get(reverse(url_name), {'archived': 'true'},
+                                       HTTP_AUTHORIZATION='Bearer %s' % token).json()
+            self.assertEqual([event['title'] for event in live['results']], ['Event 3'], url_name)
+            self.assertEqual([event['title'] for event in archived['results']],
+                             ['Event 0', 'Event 1', 'Event 2'], url_name)
+            self.assertTrue(all(event['is_registered'] for event in archived['results']), url_name)
+
+        # A cached archive page flags the registrations of the requesting user.
+        other = User.objects.create_user(username='other', password='testpass')
+        self.client.force_authenticate(user=other)
+        response = self.client.get(reverse('all-event-list'), {'archived': 'true'})
+        self.assertFalse(any(event['is_registered'] for event in response.data['results']))
+
+        response = self.client.get(reverse('all-event-list'), {'archived': 'maybe'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_register_for_archived_event(self):
+        """
+            Test that registering for an archived event is refused as for any past event.
+        """
+        self.archive('--days', '0')
+        other = User.objects.create_user(username='other', password='testpass')
+
+        self.assertEqual(Event.objects.register(self.events[0].id, other), RegistrationStatus.PAST)
+        self.assertEqual(Event.objects.register(0, other), RegistrationStatus.NOT_FOUND)
+
+
+class TestEventChanges(APITestCase):
+    """
+        This class tests the modification timestamps of events and the change
+        feed built on them, including tombstones for deleted events.
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.other_user = User.objects.create_user(username='otheruser', password='testpass')
+        self.events = [
+            Event.objects.create(
+                creator=self.user,
+                title='Event %d' % i,
+                description='Test Description',
+                date=timezone.now() + timedelta(days=1),
+                type='Test Type',
+                status='Test Status',
+                capacity=10
+            )
+            for i in range(3)
+        ]
+        self.url = reverse('event-changes')
+
+    def changes(self, url=None, **params):
+        response = self.client.get(url or self.url, params, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_timestamps_track_changes(self):
+        """
+            Test that saves, registrations, attendee changes and bulk updates
+            all move `updated_at` forward and leave `created_at` alone.
+        """
+        event = self.events[0]
+        created_at = event.created_at
+        seen = [event.updated_at]
+
+        def updated_at():
+            event.refresh_from_db()
+            self.assertEqual(event.created_at, created_at)
+            return event.updated_at
+
+        event.title = 'Renamed'
+        event.save()
+        seen.append(updated_at())
+        Event.objects.register(event.pk, self.user)
+        seen.append(updated_at())
+        event.attendees.add(self.other_user)
+        seen.append(updated_at())
+        event.capacity = 20
+        Event.objects.bulk_update([event], ['capacity'])
+        seen.append(updated_at())
+
+        self.assertEqual(seen, sorted(seen))
+        self.assertEqual(len(set(seen)), len(seen))
+
+    def test_feed_returns_only_changes_after_the_cursor(self):
+        """
+            Test that a client sees every event once, then only the events
+            changed and the ids of the events deleted since its cursor.
+        """
+        with self.settings(EVENT_CHANGES_OVERLAP_SECONDS=0):
+            first = self.changes()
+            self.assertEqual([event['id'] for event in first.data['results']], [e.pk for e in self.events])
+            self.assertFalse(first.data['has_more'])
+
+            caught_up = self.changes(first.data['next'])
+            self.assertEqual(caught_up.data['results'], [])
+
+            self.events[1].title = 'Renamed'
+            self.events[1].save()
+            deleted = self.events[2].pk
+            self.events[2].delete()
+
+            delta = self.changes(caught_up.data['next'])
+            self.assertEqual([event['title'] for event in delta.data['results']], ['Renamed'])
+            self.assertEqual(delta.data['deleted'], [deleted])
+            self.assertEqual(self.changes(delta.data['next']).data['results'], [])
+
+    def test_feed_pages(self):
+        """
+            Test that following `next` while `has_more` is set walks every change
+            in order, one page at a time.
+        """
+        response = self.changes(page_size=2)
+        ids = [event['id'] for event in response.data['results']]
+        while response.data['has_more']:
+            response = self.changes(response.data['next'])
+            ids.extend(event['id'] for event in response.data['results'])
+
+        self.assertEqual(ids, [event.pk for event in self.events])
+
+    def test_unchanged_poll_is_cached(self):
+        """
+            Test that polling a caught-up cursor returns the same cursor and is
+            served from the cache without queries.
+        """
+        with self.settings(EVENT_CHANGES_OVERLAP_SECONDS=0):
+            caught_up = self.changes(self.changes().data['next'])
+            with self.assertNumQueries(0):
+                poll = self.changes(caught_up.data['next'])
+
+        self.assertEqual(poll.data['next'], caught_up.data['next'])
+        self.assertEqual(poll.data['results'], [])
+
+    def test_recent_changes_are_sent_again(self):
+        """
+            Test that changes newer than the overlap window are repeated on the
+            next poll, so that late commits are not skipped.
+        """
+        first = self.changes()
+        second = self.changes(first.data['next'])
+
+        self.assertEqual(second.data['results'], first.data['results'])
+
+    def test_since(self):
+        """
+            Test the `since` timestamp: later changes only, 400 when it is not a
+            timestamp and 410 when it predates the kept tombstones.
+        """
+        self.assertEqual(self.changes(since=(timezone.now() + timedelta(hours=1)).isoformat()).data['results'], [])
+        self.assertEqual(len(self.changes(since=(timezone.now() - timedelta(hours=1)).isoformat()).data['results']), 3)
+
+        response = self.client.get(self.url, {'since': 'yesterday'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        expired = timezone.now() - timedelta(days=settings.EVENT_TOMBSTONE_RETENTION_DAYS + 1)
+        response = self.client.get(self.url, {'since': expired.isoformat()}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_caught_up_cursor_is_reissued(self):
+        """
+            Test that a client polling without changes gets its cursor reissued
+            the next day, so it outlives EVENT_TOMBSTONE_RETENTION_DAYS, while
+            the cursor it was given first expires.
+        """
+        now = timezone.now()
+        with self.settings(EVENT_CHANGES_OVERLAP_SECONDS=0):
+            stale = self.changes(self.changes().data['next']).data['next']
+            with mock.patch('django.utils.timezone.now', return_value=now + timedelta(days=2)):
+                poll = self.changes(stale)
+            reissued = poll.data['next']
+            self.assertNotEqual(reissued, stale)
+            self.assertEqual(poll.data['results'], [])
+
+            expiry = now + timedelta(days=settings.EVENT_TOMBSTONE_RETENTION_DAYS + 1)
+            with mock.patch('django.utils.timezone.now', return_value=expiry):
+                self.assertEqual(self.client.get(stale, format='json').status_code, status.HTTP_410_GONE)
+                self.assertEqual(self.changes(reissued).data['results'], [])
+
+
+class TestUser(APITestCase):
+    """
+        This class tests the User functionality.
+        It includes tests for user registration and login.
+    """
+    def test_user_registration(self):
+        """
+            Test that a user is registered successfully.
+        """
+        data = {'username': 'testuser', 'password': 'testpass'}
+        url = reverse('register')
+
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(User.objects.count(), 1)
+        self.assertEqual(User.objects.get(username='testuser').username, 'testuser')
+
+    def test_user_registration_with_already_taken_username(self):
+        """
+            Test that a user cannot register with a username that is already taken.
+        """
+        User.objects.create_user(username='testuser', password='testpass')
+
+        data = {'username': 'testuser', 'password': 'testpass2'}
+        url = reverse('register')
+
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_user_login(self):
+        """
+            Test that a user can log in successfully.
+        """
+        User.objects.create_user(username='testuser', password='testpass')
+
+        data = {'username': 'testuser', 'password': 'testpass'}
+        url = reverse('login')
+
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue('access' in response.data)
+        self.assertTrue('refresh' in response.data)
+
+    def test_user_login_with_wrong_credentials(self):
+        """
+            Test that a user cannot log in with wrong credentials.
+        """
+        User.objects.create_user(username='testuser', password='testpass')
+
+        data = {'username': 'testuser', 'password': 'wrongpass'}
+        url = reverse('login')
+
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_registration_writes_once(self):
+        """
+            Test that registering a user inserts the row without saving it again.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(reverse('register'), {'username': 'testuser', 'password': 'testpass'},
+                                        format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        writes = [query['sql'] for query in context.captured_queries if not query['sql'].startswith('SELECT')]
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('INSERT INTO "auth_user"'))
+        self.assertTrue(User.objects.get(username='testuser').check_password('testpass'))
+
+    def test_repeat_login_skips_hashing(self):
+        """
+            Test that repeating a successful login skips verifying the password,
+            until the password changes.
+        """
+        user = User.objects.create_user(username='testuser', password='testpass')
+        data = {'username': 'testuser', 'password': 'testpass'}
+
+        with mock.patch.object(event_passwords, 'check_password', wraps=event_passwords.check_password) as check:
+            for _ in range(2):
+                self.assertEqual(self.client.post(reverse('login'), data, format='json').status_code,
+                                 status.HTTP_200_OK)
+            self.assertEqual(check.call_count, 1)
+
+            user.set_password('newpass')
+            user.save()
+            response = self.client.post(reverse('login'), data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(check.call_count, 2)
+
+    def test_saturated_hashing_pool(self):
+        """
+            Test that logins are turned away with a 503 while the hashing pool is full.
+        """
+        User.objects.create_user(username='testuser', password='testpass')
+        with self.settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE=0):
+            event_passwords.reset()
+            self.addCleanup(event_passwords.reset)
+            release = threading.Event()
+            busy = event_passwords.get_pool().submit(release.wait)
+            try:
+                response = self.client.post(reverse('login'), {'username': 'testuser', 'password': 'testpass'},
+                                            format='json')
+            finally:
+                release.set()
+                busy.result()
+
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertEqual(response['Retry-After'], '1')
+            response = self.client.post(reverse('login'), {'username': 'testuser', 'password': 'testpass'},
+                                        format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_async_registration_and_login(self):
+        """
+            Test that the async views register and log in users like the DRF ones.
+        """
+        data = {'username': 'testuser', 'password': 'testpass'}
+        response = self.client.post(reverse('async-register'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(reverse('async-register'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(reverse('async-login'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access', response.json())
+        response = self.client.post(reverse('async-login'), dict(data, password='wrongpass'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestThrottling(APITestCase):
+    """
+        This class tests the token-bucket throttles: per URL name, per user and
+        per address, in the DRF and the async views.
+    """
+    def setUp(self):
+        caches[settings.THROTTLE_CACHE].clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.other = User.objects.create_user(username='otheruser', password='testpass')
+
+    def test_empty_bucket_refuses_without_queries(self):
+        """
+            Test that a client over its limit gets 429 with Retry-After before
+            the view touches the database, and that the limit is per URL name.
+        """
+        rates = {'*': {}, 'all-event-list': {'ip': '2/m'}}
+        with self.settings(THROTTLE_RATES=rates):
+            for _ in range(2):
+                self.assertEqual(self.client.get(reverse('all-event-list')).status_code, status.HTTP_200_OK)
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(reverse('all-event-list'))
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertEqual(len(context.captured_queries), 0)
+            self.assertEqual(int(response['Retry-After']), 30)
+
+            self.assertEqual(self.client.get(reverse('event-search'), {'q': 'jazz'}).status_code,
+                             status.HTTP_200_OK)
+
+    def test_users_have_their_own_buckets(self):
+        """
+            Test that the user throttle limits each user separately.
+        """
+        with self.settings(THROTTLE_RATES={'*': {'user': '1/m'}}):
+            self.client.force_authenticate(user=self.user)
+            self.assertEqual(self.client.get(reverse('event-list')).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get(reverse('event-list')).status_code,
+                             status.HTTP_429_TOO_MANY_REQUESTS)
+            self.client.force_authenticate(user=self.other)
+            self.assertEqual(self.client.get(reverse('event-list')).status_code, status.HTTP_200_OK)
+
+    def test_async_views_are_throttled(self):
+        """
+            Test that the async views check the same throttles.
+        """
+        with self.settings(THROTTLE_RATES={'async-all-event-list': {'ip': '1/s'}}):
+            self.assertEqual(self.client.get(reverse('async-all-event-list')).status_code, status.HTTP_200_OK)
+            response = self.client.get(reverse('async-all-event-list'))
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertEqual(response['Retry-After'], '1')
+            self.assertIn('detail', response.json())
+
+    def test_bucket_refills(self):
+        """
+            Test that a bucket refills at its rate up to its capacity.
+        """
+        self.assertEqual(event_throttling.parse_rate('60/min'), (60, 1.0))
+        bucket, wait = event_throttling.spend(None, 2, 1.0, 100.0)
+        self.assertEqual((bucket, wait), ((1, 100.0), 0))
+        bucket, wait = event_throttling.spend(bucket, 2, 1.0, 100.0)
+        self.assertEqual(bucket, (0, 100.0))
+        self.assertEqual(event_throttling.spend(bucket, 2, 1.0, 100.25), (None, 0.75))
+        self.assertEqual(event_throttling.spend(bucket, 2, 1.0, 110.0), ((1, 110.0), 0))
+
+
+class TestSchema(APITestCase):
+    """
+        This class tests that the OpenAPI schema can be generated, and that it
+        is served from the prebuilt artifact.
+    """
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'openapi.json'
+        settings_override = self.settings(SCHEMA_ARTIFACT_PATH=self.path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        event_schema.reset()
+        self.addCleanup(event_schema.reset)
+
+    def test_schema_json(self):
+        """
+            Test that the schema documents the pagination and filter parameters of the list views.
+        """
+        response = self.client.get(reverse('schema-json'), HTTP_ACCEPT='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        parameters = response.json()['paths']['/allevents/']['get']['parameters']
+        self.assertEqual({parameter['name'] for parameter in parameters},
+                         {'cursor', 'page_size', 'date_from', 'date_to', 'type', 'status', 'upcoming', 'fields', 'archived'})
+
+    def test_served_from_artifact_with_etag(self):
+        """
+            Test that the schema is written to the artifact once and revalidates with its ETag.
+        """
+        first = self.client.get(reverse('schema-json'))
+        self.assertEqual(first.content, self.path.read_bytes())
+
+        with mock.patch.object(event_schema, 'generate') as generate:
+            response = self.client.get(reverse('schema-json'), HTTP_IF_NONE_MATCH=first['ETag'])
+            ui_schema = self.client.get(reverse('schema-swagger-ui'), {'format': 'openapi'})
+        generate.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(ui_schema.content, first.content)
+        self.assertEqual(self.client.get(reverse('schema-swagger-ui')).status_code, status.HTTP_200_OK)
+
+    def test_stale_artifact_is_rebuilt(self):
+        """
+            Test that an artifact built from other code is replaced, and a current one is reused.
+        """
+        self.path.write_text(json.dumps({event_schema.FINGERPRINT_KEY: 'old'}))
+        self.client.get(reverse('schema-json'))
+        self.assertEqual(json.loads(self.path.read_bytes())[event_schema.FINGERPRINT_KEY], event_schema.fingerprint())
+
+        event_schema.reset()
+        with mock.patch.object(event_schema, 'generate') as generate:
+            self.client.get(reverse('schema-json'))
+        generate.assert_not_called()
+
+    def test_generate_schema_command(self):
+        """
+            Test that generate_schema writes the artifact and --check verifies it.
+        """
+        with self.assertRaises(CommandError):
+            call_command('generate_schema', '--check', stdout=io.StringIO())
+        call_command('generate_schema', stdout=io.StringIO())
+        call_command('generate_schema', '--check', stdout=io.StringIO())
+        self.assertIn('/allevents/', json.loads(self.path.read_bytes())['paths'])
+
+
+class TestStartupProfile(APITestCase):
+    """
+        This class tests the cold-start profile of a worker.
+    """
+    def test_profile_leaves_docs_unloaded(self):
+        """
+            Test that startup_profile reports per-module import costs of a fresh
+            worker, and that starting a worker does not load drf_yasg.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / 'startup.json'
+            stdout = io.StringIO()
+            call_command('startup_profile', repeat=1, limit=5, by='package', output=str(output), stdout=stdout)
+            result = json.loads(output.read_text())
 
+        self.assertIn('Cold start of event_manager.wsgi', stdout.getvalue())
+        self.assertEqual(result['module'], 'event_manager.wsgi')
+        self.assertGreater(result['seconds'], 0)
+        modules = {entry['module']: entry for entry in result['modules']}
+        self.assertIn('event_manager.urls', modules)
+        self.assertGreaterEqual(modules['django.urls']['seconds'], modules['django.urls']['self_seconds'])
+        self.assertFalse([name for name in modules if name.split('.')[0] == 'drf_yasg'])
@@ -0,0 +1,151 @@
+"""
+Load-shedding throttles backed by token buckets in Django's cache.
+
+Each client gets a bucket per view that holds up to `capacity` tokens and
+refills at `capacity / period` tokens per second; a request spends one, and a
+request that finds the bucket empty is answered with 429 and Retry-After. DRF
+checks throttles before the handler runs, so a refused request costs an
+authentication (itself usually a cache hit) and a cache read per throttle, no
+serializer or ORM work.
+
+A bucket is one cache entry, (tokens, timestamp), so checking it is O(1) in
+time and space. Entries expire once the bucket would be full again, which is
+the same as having no entry. The buckets live in the cache named by
+settings.THROTTLE_CACHE: locmem keeps them per process, a shared backend such
+as Redis makes the limits hold across workers. Reading and writing the entry
+are separate calls, so concurrent requests can occasionally share a token;
+that errs towards letting a request through, which is fine for load shedding.
+
+Limits are set per URL name in settings.THROTTLE_RATES, e.g.
+
+    THROTTLE_RATES = {
+        '*': {'user': '100/s', 'ip': '200/s'},
+        'event-register': {'user': '5/s'},
+    }
+
+where '*' applies to views without an entry of their own and a missing scope
+or a None rate means no limit.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+BUCKET_KEY = 'throttle:%s:%s:%s'
+
+
+def parse_rate(rate):
+    """
+        Turn 'count/period' (period: s, m, h or d, or a word starting with
+        one) into (capacity, tokens refilled per second).
+    """
+    count, period = rate.split('/')
+    capacity = int(count)
+    return capacity, capacity / DURATIONS[period[0]]
+
+
+def spend(bucket, capacity, refill, now):
+    """
+        Take a token from `bucket`, a (tokens, timestamp) pair or None for a
+        full bucket. Return the bucket to store, or None when it is empty, and
+        the seconds until it holds a token again.
+    """
+    tokens, stamp = bucket if bucket is not None else (capacity, now)
+    tokens = min(capacity, tokens + (now - stamp) * refill)
+    if tokens < 1:
+        return None, (1 - tokens) / refill
+    return (tokens - 1, now), 0
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+        Base class for the throttles; subclasses name their `scope` and say
+        who a request comes from with `get_client`.
+    """
+    scope = None
+
+    def get_client(self, request):
+        raise NotImplementedError
+
+    def get_rate(self, url_name):
+        rates = settings.THROTTLE_RATES
+        rate = rates.get(url_name, rates.get('*', {})).get(self.scope)
+        return parse_rate(rate) if rate else None
+
+    def prepare(self, request):
+        """
+            Return the cache key, capacity and refill rate that apply to the
+            request, or None when it is not limited.
+        """
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.url_name if match is not None else None
+        rate = self.get_rate(url_name)
+        if rate is None:
+            return None
+        client = self.get_client(request)
+        if client is None:
+            return None
+        return (BUCKET_KEY % (self.scope, url_name, client),) + rate
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        prepared = self.prepare(request)
+        if prepared is None:
+            return True
+        key, capacity, refill = prepared
+        cache = caches[settings.THROTTLE_CACHE]
+        bucket, self.wait_seconds = spend(cache.get(key), capacity, refill, time.time())
+        if bucket is None:
+            # Refusing leaves the bucket as it was: no write on the hot path.
+            return False
+        cache.set(key, bucket, timeout=self.timeout(capacity, refill))
+        return True
+
+    async def aallow_request(self, request, view):
+        """
+            Async variant of `allow_request`, for the async views.
+        """
+        self.wait_seconds = None
+        prepared = self.prepare(request)
+        if prepared is None:
+            return True
+        key, capacity, refill = prepared
+        cache = caches[settings.THROTTLE_CACHE]
+        bucket, self.wait_seconds = spend(await cache.aget(key), capacity, refill, time.time())
+        if bucket is None:
+            return False
+        await cache.aset(key, bucket, timeout=self.timeout(capacity, refill))
+        return True
+
+    def timeout(self, capacity, refill):
+        # Long enough for an empty bucket to fill up again; after that a
+        # missing entry means the same thing.
+        return int(capacity / refill) + 1
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """
+        Limits each authenticated user; anonymous requests are left to the IP throttle.
+    """
+    scope = 'user'
+
+    def get_client(self, request):
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return None
+        return user.pk
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """
+        Limits each client address (honouring NUM_PROXIES for X-Forwarded-For).
+    """
+    scope = 'ip'
+
+    def get_client(self, request):
+        return self.get_ident(request)
@@ -1,35 +1,164 @@
-from drf_yasg import openapi
-from django.utils import timezone
 from django.contrib.auth.models import User
 from rest_framework import status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
-from drf_yasg.utils import swagger_auto_schema
-from django.shortcuts import get_object_or_404
+from django.db import IntegrityError, transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView, ListAPIView
 
-from event_app.serializers import UserRegisterSerializer, UserLoginSerializer, EventSerializer
-from event_app.models import Event
+from event_app.serializers import UserRegisterSerializer, UserLoginSerializer, EventSerializer, \
+    BulkRegistrationSerializer, AttendeeSerializer, EventValuesSerializer
+from event_app.models import ArchivedEvent, Event, RegistrationStatus
+from event_app.filters import EventFilterBackend
+from event_app.cache import CachedListMixin
+from event_app.pagination import AttendeePagination, ChangeFeedPagination, EventSearchPagination
+from event_app import cache, metrics, passwords
+from event_app.docs import openapi, swagger_auto_schema
+from event_app.permissions import IsLocalRequest
+from event_app.routers import ReplicaReadMixin, replica_reads
+from event_app.export import CSVRenderer, NDJSONRenderer, aiterate, export_chunks, export_fields
+
+
+def parse_event_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def event_model(request):
+    """
+        Return ArchivedEvent if `request` opts into the archive with
+        `archived=true`, else Event.
+    """
+    archived = request.query_params.get('archived', '').lower()
+    if archived in EventFilterBackend.true_values:
+        return ArchivedEvent
+    if archived and archived not in EventFilterBackend.false_values:
+        raise ValidationError({'archived': 'Expected true or false.'})
+    return Event
+
+
+FIELDS_PARAMETER = openapi.Parameter(
+    'fields', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+    description='Comma-separated event fields to return, e.g. `title,date`; the id is always included.',
+)
+ARCHIVED_PARAMETER = openapi.Parameter(
+    'archived', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN,
+    description='`true` to list archived past events instead of the current ones.',
+)
+
+
+class ValuesListMixin:
+    """
+        Serve `list()` through EventValuesSerializer from `values()` rows,
+        selecting only the columns of the fields asked for with `?fields=`
+        (plus those the pagination orders by).
+    """
+    def list(self, request, *args, **kwargs):
+        serializer = EventValuesSerializer.from_request(request)
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = [order.lstrip('-') for order in self.paginator.ordering]
+        rows = self.paginate_queryset(queryset.values(*serializer.get_columns(*ordering)))
+        return self.get_paginated_response(serializer.serialize(rows, request.user, queryset.model))
 
 
-class EventListView(ListCreateAPIView):
+@method_decorator(name='get', decorator=swagger_auto_schema(manual_parameters=[FIELDS_PARAMETER, ARCHIVED_PARAMETER]))
+class EventListView(ReplicaReadMixin, CachedListMixin, ValuesListMixin, ListCreateAPIView):
     """
         get:
-        Return a list of all events created by the current user.
+        Return a list of all events created by the current user, ordered by date.
+
+        Past events moved to the archive are listed with `archived=true`.
 
         post:
-        Create a new event instance for the current user.
+        Create a new event instance for the current user. Send a list of events
+        to create them all in one transaction.
+
+        patch:
+        Partially update several events created by the current user in one
+        transaction. Each item must carry the `id` of the event it updates, and
+        an event can only be listed once.
     """
     serializer_class = EventSerializer
+    filter_backends = [EventFilterBackend]
+    cache_per_user = True
 
     def get_queryset(self):
         user = self.request.user
+        model = event_model(self.request) if self.request.method == 'GET' else Event
         if user.is_authenticated:
-            return Event.objects.filter(creator=user)
+            return model.objects.filter(creator=user)
         else:
-            return Event.objects.none()
+            return model.objects.none()
+
+    def get_serializer(self, *args, **kwargs):
+        if isinstance(kwargs.get('data'), list):
+            kwargs['many'] = True
+        return super().get_serializer(*args, **kwargs)
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+
+    @swagger_auto_schema(request_body=EventSerializer(many=True))
+    def patch(self, request):
+        if not isinstance(request.data, list):
+            return Response({'error': 'Expected a list of events'}, status=status.HTTP_400_BAD_REQUEST)
+
+        event_ids = [parse_event_id(item.get('id')) if isinstance(item, dict) else None for item in request.data]
+        events = self.get_queryset().in_bulk([event_id for event_id in event_ids if event_id is not None])
+        errors = [{} if event_id in events else {'id': ['Event not found.']} for event_id in event_ids]
+        seen = set()
+        for index, event_id in enumerate(event_ids):
+            if event_id in seen and not errors[index]:
+                errors[index] = {'id': ['Event listed more than once.']}
+            seen.add(event_id)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_serializer([events[event_id] for event_id in event_ids], data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        try:
+            with transaction.atomic():
+                # Lock the rows and check them again: an event may have been
+                # deleted, or had a seat taken, since it was validated.
+                current = Event.objects.select_for_update().only('registered_count').in_bulk(event_ids)
+                errors = self.row_errors(event_ids, serializer.validated_data, current)
+                if any(errors):
+                    return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+                serializer.save()
+        except IntegrityError:
+            # Without row locks (SQLite) a registration can still take a seat
+            # before the update and trip the capacity constraint.
+            errors = self.row_errors(event_ids, serializer.validated_data, Event.objects.in_bulk(event_ids))
+            if not any(errors):
+                raise
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def row_errors(event_ids, validated_data, events):
+        """
+            Return the errors of a bulk update's rows against the current
+            `events`, by id: those deleted and those whose new capacity is
+            below the attendee count.
+        """
+        errors = []
+        for event_id, attrs in zip(event_ids, validated_data):
+            event = events.get(event_id)
+            if event is None:
+                errors.append({'id': ['Event not found.']})
+            elif 'capacity' in attrs and attrs['capacity'] < event.registered_count:
+                errors.append({'capacity': ['Capacity cannot be lower than the number of registered attendees.']})
+            else:
+                errors.append({})
+        return errors
 
 
 class EventDetailView(RetrieveUpdateDestroyAPIView):
@@ -54,14 +183,146 @@ class EventDetailView(RetrieveUpdateDestroyAPIView):
             return Event.objects.none()
 
 
-class AllEventListView(ListAPIView):
+@method_decorator(name='get', decorator=swagger_auto_schema(manual_parameters=[FIELDS_PARAMETER, ARCHIVED_PARAMETER]))
+class MyRegistrationListView(ReplicaReadMixin, CachedListMixin, ValuesListMixin, ListAPIView):
+    """
+        get:
+        Return the events the current user is registered for, ordered by date.
+        Accepts the same filters as the event listings, e.g. `upcoming=true`
+        or `upcoming=false` for past events, and `archived=true` for the
+        archived ones.
+    """
+    serializer_class = EventSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [EventFilterBackend]
+    cache_per_user = True
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return Event.objects.none()
+        # Reads the user's rows of the through table by the (user_id, event_id) index.
+        return event_model(self.request).objects.filter(attendees=self.request.user)
+
+
+class EventAttendeeListView(ReplicaReadMixin, ListAPIView):
+    """
+        get:
+        List the users attending an event, regardless of creator, in the order
+        they registered.
+    """
+    serializer_class = AttendeeSerializer
+    pagination_class = AttendeePagination
+
+    def get_queryset(self):
+        through = Event.attendees.through
+        if getattr(self, 'swagger_fake_view', False):
+            return through.objects.none()
+        if not Event.objects.filter(pk=self.kwargs['pk']).exists():
+            raise Http404
+        return through.objects.filter(event_id=self.kwargs['pk'])
+
+
+@method_decorator(name='get', decorator=swagger_auto_schema(manual_parameters=[FIELDS_PARAMETER, ARCHIVED_PARAMETER]))
+class AllEventListView(ReplicaReadMixin, CachedListMixin, ValuesListMixin, ListAPIView):
+    """
+        get:
+        Retrieve a list of all events, regardless of creator, ordered by date.
+        Past events moved to the archive are listed with `archived=true`.
+    """
+    serializer_class = EventSerializer
+    filter_backends = [EventFilterBackend]
+
+    def get_queryset(self):
+        return event_model(self.request).objects.all()
+
+
+class EventSearchView(ReplicaReadMixin, CachedListMixin, ValuesListMixin, ListAPIView):
+    """
+        get:
+        Search all events by keywords in their title or description, best
+        match first. Every word of `q` must match; the last one may be a prefix.
+        Only the newest EVENT_SEARCH_MAX_CANDIDATES matches (1000 by default)
+        are ranked and returned; `truncated` is true when more events
+        matched, and adding words to `q` reaches the older ones.
+    """
+    serializer_class = EventSerializer
+    filter_backends = [EventFilterBackend]
+    pagination_class = EventSearchPagination
+
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('q', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True,
+                          description='Keywords to search for.'),
+        FIELDS_PARAMETER,
+    ])
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        text = self.request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': 'This query parameter is required.'})
+        self.paginator.truncated = Event.objects.search_truncated(text)
+        return Event.objects.search(text)
+
+
+class EventChangesView(CachedListMixin, ListAPIView):
     """
         get:
-        Retrieve a list of all events, regardless of creator.
+        Return the events created or changed, and the ids of the events deleted,
+        after a cursor (or the `since` timestamp), oldest change first. Follow
+        `next` to continue; once `has_more` is false, poll `next` later for
+        newer changes. An unchanged poll is answered from the cache, or with 304.
     """
     serializer_class = EventSerializer
+    pagination_class = ChangeFeedPagination
+    # Read from the primary: a lagging replica could let a cursor pass changes
+    # it has not seen yet.
     queryset = Event.objects.all()
 
+    def get_cache_variant(self, request):
+        # Recompute caught-up polls daily, so their cursors are reissued (see
+        # ChangeFeedPagination) rather than answered with 304 until they expire.
+        return timezone.localdate().isoformat()
+
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('since', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME,
+                          description='Start from changes after this time instead of from the beginning.'),
+    ])
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class EventExportView(APIView):
+    """
+        get:
+        Stream all events, regardless of creator, as NDJSON (the default) or
+        CSV (`?format=csv`). Accepts the same filters as the event listings;
+        pass `attendees=true` to include the attendee ids of each event.
+    """
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('format', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['ndjson', 'csv']),
+        openapi.Parameter('attendees', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN),
+    ])
+    def get(self, request):
+        queryset = EventFilterBackend().filter_queryset(request, Event.objects.all(), self)
+        # The response streams after the view returns, so pick the database now.
+        with replica_reads():
+            queryset = queryset.using(queryset.db)
+        attendees = request.query_params.get('attendees', '').lower() in EventFilterBackend.true_values
+        renderer = request.accepted_renderer
+
+        content = renderer.stream(export_chunks(queryset, attendees), export_fields(attendees))
+        if isinstance(request._request, ASGIRequest):
+            content = aiterate(content)
+        response = StreamingHttpResponse(
+            content,
+            content_type='%s; charset=%s' % (renderer.media_type, renderer.charset),
+        )
+        response['Content-Disposition'] = 'attachment; filename="events.%s"' % renderer.format
+        return response
+
 
 class EventRegisterView(APIView):
     """
@@ -80,19 +341,19 @@ class EventRegisterView(APIView):
         },
     ))
     def post(self, request):
-        event_id = request.data.get('event_id', None)
+        event_id = parse_event_id(request.data.get('event_id', None))
         if event_id is None:
             return Response({'error': 'No event_id provided'}, status=status.HTTP_400_BAD_REQUEST)
-        event = get_object_or_404(Event, id=event_id)
+        result = Event.objects.register(event_id, request.user)
 
-        if event.date < timezone.now():
+        if result == RegistrationStatus.NOT_FOUND:
+            raise Http404
+        if result == RegistrationStatus.PAST:
             return Response({'error': 'Cannot register for past events'}, status=status.HTTP_400_BAD_REQUEST)
-
-        if event.attendees.count() >= event.capacity:
+        if result == RegistrationStatus.FULL:
             return Response({'error': 'Event is full'}, status=status.HTTP_400_BAD_REQUEST)
-
-        event.attendees.add(request.user)
-        event.save()
+        if result == RegistrationStatus.ALREADY_REGISTERED:
+            return Response({'message': 'Already registered'}, status=status.HTTP_200_OK)
 
         return Response({'message': 'Registered successfully'}, status=status.HTTP_200_OK)
 
@@ -100,18 +361,84 @@ class EventRegisterView(APIView):
         openapi.Parameter('event_id', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
     ])
     def delete(self, request):
-        event_id = request.query_params.get('event_id', None)
-        event = get_object_or_404(Event, id=event_id)
+        event_id = parse_event_id(request.query_params.get('event_id', None))
+        if event_id is None:
+            return Response({'error': 'No event_id provided'}, status=status.HTTP_400_BAD_REQUEST)
+        result = Event.objects.unregister(event_id, request.user)
 
-        if event.date < timezone.now():
+        if result == RegistrationStatus.NOT_FOUND:
+            raise Http404
+        if result == RegistrationStatus.PAST:
             return Response({'error': 'Cannot unregister from past events'}, status=status.HTTP_400_BAD_REQUEST)
 
-        event.attendees.remove(request.user)
-        event.save()
-
         return Response({'message': 'Unregistered successfully'}, status=status.HTTP_200_OK)
 
 
+class EventBulkRegisterView(APIView):
+    """
+        post:
+        Register the current user for several events at once.
+
+        delete:
+        Unregister the current user from several events at once.
+
+        Both return a map from event id to one of 'registered', 'unregistered',
+        'already_registered', 'not_registered', 'full', 'past' or 'not_found'.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = BulkRegistrationSerializer
+
+    @swagger_auto_schema(request_body=BulkRegistrationSerializer)
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        if serializer.is_valid():
+            results = Event.objects.register_many(serializer.validated_data['event_ids'], request.user)
+            return Response({'results': results}, status=status.HTTP_200_OK)
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('event_ids', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                          description='Comma-separated event IDs'),
+    ])
+    def delete(self, request):
+        event_ids = [value for value in request.query_params.get('event_ids', '').split(',') if value]
+        serializer = self.serializer_class(data={'event_ids': event_ids})
+        if serializer.is_valid():
+            results = Event.objects.unregister_many(serializer.validated_data['event_ids'], request.user)
+            return Response({'results': results}, status=status.HTTP_200_OK)
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class CacheStatsView(APIView):
+    """
+        get:
+        Return the hit, miss and not-modified counters of the event listing cache.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(cache.stats(), status=status.HTTP_200_OK)
+
+
+class MetricsView(APIView):
+    """
+        get:
+        Request metrics per endpoint and listing cache counters in Prometheus
+        text format. Only served to the addresses in METRICS_ALLOWED_IPS.
+    """
+    authentication_classes = []
+    permission_classes = [IsLocalRequest]
+    swagger_schema = None
+
+    def get(self, request):
+        cache_stats = ['# HELP event_list_cache_requests_total Event listing cache lookups by result.',
+                       '# TYPE event_list_cache_requests_total counter']
+        cache_stats += ['event_list_cache_requests_total{result="%s"} %d' % item for item in cache.stats().items()]
+        return HttpResponse(metrics.registry.render(cache_stats), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 class UserRegisterView(APIView):
     """
         post:
@@ -126,8 +453,9 @@ class UserRegisterView(APIView):
             username = serializer.validated_data['username']
             password = serializer.validated_data['password']
 
-            user = User.objects.create_user(username=username, password=password)
-            user.save()
+            User.objects.create(
+                username=User.normalize_username(username), password=passwords.hash_password(password),
+            )
 
             return Response({'message': 'User created successfully'}, status=status.HTTP_201_CREATED)
 
@@ -148,7 +476,7 @@ class UserLoginView(APIView):
             username = serializer.validated_data['username']
             password = serializer.validated_data['password']
 
-            user = authenticate(username=username, password=password)
+            user = passwords.authenticate(username, password)
             if user:
                 refresh = RefreshToken.for_user(user)
                 return Response({
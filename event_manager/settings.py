@@ -12,6 +12,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import importlib.util
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -39,10 +41,17 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'event_app',
     'rest_framework',
-    'drf_yasg',
 ]
 
+# API docs (/swagger/, /redoc/, /swagger.json) are served by drf_yasg, which is
+# imported on the first docs request instead of at startup (event_app/docs.py).
+# It is therefore not an installed app: its templates and static files are
+# found through DRF_YASG_DIR. API_DOCS=off in the environment drops the docs.
+API_DOCS = os.environ.get('API_DOCS', 'on') != 'off'
+DRF_YASG_DIR = Path(importlib.util.find_spec('drf_yasg').origin).parent if API_DOCS else None
+
 MIDDLEWARE = [
+    'event_app.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -57,7 +66,7 @@ ROOT_URLCONF = 'event_manager.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        'DIRS': [DRF_YASG_DIR / 'templates'] if API_DOCS else [],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -72,16 +81,93 @@ TEMPLATES = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'event_app.authentication.CachedJWTAuthentication',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'event_app.pagination.EventPagination',
+    'PAGE_SIZE': 100,
+    'DEFAULT_THROTTLE_CLASSES': (
+        'event_app.throttling.UserTokenBucketThrottle',
+        'event_app.throttling.IPTokenBucketThrottle',
     ),
 }
 
+# Token-bucket throttles (event_app.throttling), per URL name and scope: 'user'
+# limits each authenticated user, 'ip' each client address. 'count/period'
+# allows bursts of `count` requests, refilled evenly over the period. '*'
+# applies to URL names without an entry; a missing scope is not limited.
+THROTTLE_RATES = {
+    '*': {'user': '600/m', 'ip': '1200/m'},
+    'login': {'ip': '60/m'},
+    'register': {'ip': '30/m'},
+    'async-login': {'ip': '60/m'},
+    'async-register': {'ip': '30/m'},
+    'event-register': {'user': '120/m', 'ip': '1200/m'},
+    'async-event-register': {'user': '120/m', 'ip': '1200/m'},
+    'metrics': {},
+}
+# Cache holding the buckets; point it at a shared backend (e.g. Redis) for
+# limits that hold across processes.
+THROTTLE_CACHE = 'throttle'
+
+# Bulk create/update on the events collection: rows per INSERT/UPDATE batch
+# and the most rows accepted in one request.
+EVENT_BULK_BATCH_SIZE = 500
+EVENT_BULK_MAX_ITEMS = 10000
+
+# Matches a search ranks: the newest ones, by id. bm25 scores every match it
+# ranks, so this bounds what a common word costs; older matches are reached by
+# narrowing the query.
+EVENT_SEARCH_MAX_CANDIDATES = 1000
+
+# Rows fetched per database round trip by the streaming event export.
+EVENT_EXPORT_CHUNK_SIZE = 2000
+
+# Rows validated and written per transaction by the import_events command.
+EVENT_IMPORT_BATCH_SIZE = 2000
+
+# archive_events: events that took place more than this many days ago move to
+# ArchivedEvent, this many per transaction.
+EVENT_ARCHIVE_AFTER_DAYS = 30
+EVENT_ARCHIVE_BATCH_SIZE = 1000
+
+# Change feed (/allevents/changes/): days tombstones of deleted events are kept,
+# which is also how long a cursor stays valid, and seconds the cursor trails the
+# newest change so that writes committing out of timestamp order are not skipped.
+EVENT_TOMBSTONE_RETENTION_DAYS = 30
+EVENT_CHANGES_OVERLAP_SECONDS = 5
+
+# Live seat updates (event_app.live, /live/seats/ under ASGI): the broker class,
+# the window over which changes to an event are coalesced, the keepalive
+# interval, and how long one stream lasts before the client reconnects.
+LIVE_BROKER = 'event_app.live.Broker'
+LIVE_COALESCE_SECONDS = 0.25
+LIVE_KEEPALIVE_SECONDS = 15
+LIVE_STREAM_SECONDS = 300
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
+# Request metrics (event_app.metrics): addresses allowed to scrape /metrics, and
+# the latency in seconds above which a request is logged with its SQL (None
+# disables the slow-request log).
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+METRICS_SLOW_REQUEST_SECONDS = None
+
+# Seconds a JWT-authenticated user stays cached; saving or deleting the user drops it earlier.
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# Password hashing (event_app.passwords): threads hashing and verifying
+# passwords, leaving the other cores to event traffic; calls allowed to wait for
+# one before logins are turned away with a 503; and seconds a successful login
+# is remembered so repeating it skips hashing (0 disables).
+PASSWORD_HASHING_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+PASSWORD_HASHING_QUEUE = 32
+AUTH_VERIFIED_CREDENTIAL_TIMEOUT = 300
+
 SWAGGER_SETTINGS = {
+    'DEFAULT_INFO': 'event_app.schema.api_info',
     'SECURITY_DEFINITIONS': {
         'Basic': {
             'type': 'basic'
@@ -92,20 +178,88 @@ SWAGGER_SETTINGS = {
             'name': 'Authorization'
         }
     },
+    'DEFAULT_FILTER_INSPECTORS': [
+        'event_app.inspectors.OperationParametersInspector',
+        'drf_yasg.inspectors.CoreAPICompatInspector',
+    ],
+    'DEFAULT_PAGINATOR_INSPECTORS': [
+        'event_app.inspectors.OperationParametersInspector',
+        'drf_yasg.inspectors.DjangoRestResponsePagination',
+        'drf_yasg.inspectors.CoreAPICompatInspector',
+    ],
 }
 
+# Prebuilt OpenAPI schema, written by `manage.py generate_schema` or on first use.
+SCHEMA_ARTIFACT_PATH = BASE_DIR / 'openapi.json'
+
 WSGI_APPLICATION = 'event_manager.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# The database layer is configured from the environment:
+# - DB_NAME / DB_REPLICA_NAME: SQLite files of the primary and of the read
+#   replica. The replica defaults to the primary file, opened on its own
+#   connection, which stands in for a real replica locally.
+# - DB_CONN_MAX_AGE: seconds a connection is kept across requests (0 closes it
+#   after each request).
+# - DB_BUSY_TIMEOUT_MS: how long a connection waits for a lock before failing.
+DB_NAME = os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'NAME': DB_NAME,
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        # A file rather than the in-memory default, so that tests and benchmarks
+        # can open concurrent connections from several threads.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('DB_REPLICA_NAME', DB_NAME),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+# Read-only list views read from 'replica', everything else uses 'default'
+# (see event_app/routers.py).
+DATABASE_ROUTERS = ['event_app.routers.ReplicaRouter']
+
+# Applied to every new SQLite connection: WAL lets readers proceed while a
+# registration is writing, and synchronous=NORMAL is durable enough under WAL.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.environ.get('DB_BUSY_TIMEOUT_MS', 5000)),
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Point 'default' at a shared backend (Redis, Memcached) when running several
+# workers, so that the event data version is shared between them.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+# Seconds a rendered event listing stays cached; any event change invalidates it earlier.
+EVENT_LIST_CACHE_TIMEOUT = 300
+# Seconds a listing filtered relative to now (`upcoming`) is cached and
+# revalidated for at most: an event that starts leaves it no later than this.
+EVENT_LIST_CACHE_WINDOW = 60
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -139,6 +293,7 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATICFILES_DIRS = [DRF_YASG_DIR / 'static'] if API_DOCS else []
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
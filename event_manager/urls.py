@@ -1,24 +1,13 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenVerifyView
 from event_app.views import UserRegisterView, UserLoginView, EventListView, EventDetailView,\
-    AllEventListView, EventRegisterView
-# Import drf_yasg components
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Event API",
-        default_version='v1',
-        description="Event API for tiko energy",
-        terms_of_service="https://example.com/",
-        contact=openapi.Contact(email="sshkrv@gmail.com"),
-        license=openapi.License(name="Sabir's license"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,)
-)
+    AllEventListView, EventRegisterView, EventBulkRegisterView, CacheStatsView, EventExportView, \
+    EventSearchView, MetricsView, EventChangesView, EventAttendeeListView, MyRegistrationListView
+from event_app.async_views import AsyncEventListView, AsyncEventDetailView, AsyncAllEventListView, \
+    AsyncEventRegisterView, AsyncUserLoginView, AsyncUserRegisterView, SeatUpdatesView
+from django.conf import settings
+# drf_yasg is loaded by the docs views on their first request (see event_app/docs.py).
+from event_app.docs import lazy_view
 
 urlpatterns = [
     path('register/', UserRegisterView.as_view(), name='register'),
@@ -28,10 +17,31 @@ urlpatterns = [
     path('api/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
     path('events/', EventListView.as_view(), name='event-list'),
     path('events/<int:pk>/', EventDetailView.as_view(), name='event-detail'),
+    path('events/<int:pk>/attendees/', EventAttendeeListView.as_view(), name='event-attendees'),
     path('allevents/', AllEventListView.as_view(), name='all-event-list'),
+    path('allevents/search/', EventSearchView.as_view(), name='event-search'),
+    path('allevents/export/', EventExportView.as_view(), name='event-export'),
+    path('allevents/changes/', EventChangesView.as_view(), name='event-changes'),
+    path('me/registrations/', MyRegistrationListView.as_view(), name='my-registrations'),
     path('register_event/', EventRegisterView.as_view(), name='event-register'),
+    path('register_event/bulk/', EventBulkRegisterView.as_view(), name='event-register-bulk'),
+    path('cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 
-    path('swagger.json', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    # Async-native variants of the hot endpoints, for ASGI deployments.
+    path('async/events/', AsyncEventListView.as_view(), name='async-event-list'),
+    path('async/events/<int:pk>/', AsyncEventDetailView.as_view(), name='async-event-detail'),
+    path('async/allevents/', AsyncAllEventListView.as_view(), name='async-all-event-list'),
+    path('async/register_event/', AsyncEventRegisterView.as_view(), name='async-event-register'),
+    path('async/register/', AsyncUserRegisterView.as_view(), name='async-register'),
+    path('async/login/', AsyncUserLoginView.as_view(), name='async-login'),
+    path('live/seats/', SeatUpdatesView.as_view(), name='live-seats'),
 ]
+
+if settings.API_DOCS:
+    urlpatterns += [
+        # The JSON schema is built once and served from memory (see event_app/schema.py).
+        path('swagger.json', lazy_view('without_ui', cache_timeout=0), {'format': '.json'}, name='schema-json'),
+        path('swagger/', lazy_view('with_ui', 'swagger', cache_timeout=0), name='schema-swagger-ui'),
+        path('redoc/', lazy_view('with_ui', 'redoc', cache_timeout=0), name='schema-redoc'),
+    ]